@@ -0,0 +1,85 @@
+"""
+Startup-time benchmark for the fairy CLI.
+
+Runs `fairy --check-naming` (by default) in a fresh interpreter several times
+inside a throwaway project and reports the median wall time, plus the
+slowest imports of one run (from `python -X importtime`).
+
+    python benchmarks/startup.py [--runs 20] [--max-ms 300] [-- <fairy args>]
+
+With --max-ms the script exits with status 1 when the median is slower, so
+it can guard startup time in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MAIN = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'main.py'))
+
+
+def make_project(root):
+    with open(os.path.join(root, '.project_config.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'data_naming_convention_regex': r'^P[0-9]{2}_Exp[A-Z]{1}_[0-9]{4}-[0-9]{2}-[0-9]{2}\.(csv|json)$',
+            'data_directory_name': 'data',
+            'allowed_file_extensions': ['csv', 'json'],
+        }, f)
+    os.makedirs(os.path.join(root, 'data'))
+    for i in range(20):
+        open(os.path.join(root, 'data', f'P{i:02d}_ExpA_2025-06-02.csv'), 'w').close()
+
+
+def time_runs(command, cwd, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def slowest_imports(command, cwd, top=10):
+    result = subprocess.run(
+        [command[0], '-X', 'importtime'] + command[1:],
+        cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Only top-level imports; nested ones are included in their parent's time
+        if not name[1:].startswith(' '):
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--max-ms', type=float, default=None, help='Fail if the median startup is slower')
+    parser.add_argument('fairy_args', nargs='*', default=['--check-naming'])
+    args = parser.parse_args()
+    command = [sys.executable, MAIN] + args.fairy_args
+    with tempfile.TemporaryDirectory() as root:
+        make_project(root)
+        timings = time_runs(command, root, args.runs)
+        imports = slowest_imports(command, root)
+    median = statistics.median(timings)
+    print(f"fairy {' '.join(args.fairy_args)}: median {median:.1f} ms, "
+          f"min {min(timings):.1f} ms, max {max(timings):.1f} ms over {args.runs} runs")
+    print('Slowest top-level imports (cumulative):')
+    for micros, name in imports:
+        print(f'  {micros / 1000:8.1f} ms  {name}')
+    if args.max_ms is not None and median > args.max_ms:
+        print(f'Median startup {median:.1f} ms exceeds {args.max_ms:.1f} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Deterministic synthetic datasets for the FAIRy benchmarks.
+
+Writes a project directory with a data directory of CSV files, a matching
+data dictionary (JSON, and CSV for the Great Expectations converter) and a
+.project_config.json. The same arguments always produce the same bytes.
+
+    python benchmarks/synthetic.py <out_dir> [--rows 100000] [--columns 12]
+                                   [--files 4] [--error-rate 0.01] [--seed 0]
+
+A fraction error_rate of the cells violates its column's rules (wrong type,
+out of range, not allowed, missing), and the same fraction of file names
+breaks the naming convention.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+from datetime import date, timedelta
+
+NAMING_REGEX = r'^P[0-9]{2}_Exp[A-Z]{1}_[0-9]{4}-[0-9]{2}-[0-9]{2}\.(csv|json)$'
+DICTIONARY_FIELDS = ['Variable Name', 'Description', 'Data Type', 'Units', 'Allowed Values / Range',
+                     'Missing Value Representation', 'Source', 'Constraints / Validation Rules',
+                     'Notes / Comments', 'Example Value']
+MANIFEST = 'synthetic.json'
+# Column kinds, cycled through after the leading unique id column
+KINDS = ('integer', 'float', 'boolean', 'date', 'category', 'text')
+CATEGORIES = ('A', 'B', 'C', 'D')
+BASE_DATE = date(2025, 1, 1)
+
+
+def column_specs(n_columns):
+    """Data dictionary columns: a unique id, then the KINDS in turn."""
+    specs = [{'Variable Name': 'id', 'Data Type': 'integer', 'Constraints / Validation Rules': 'unique, not null'}]
+    for i in range(1, n_columns):
+        kind = KINDS[(i - 1) % len(KINDS)]
+        spec = {'Variable Name': f'{kind}_{i}'}
+        if kind == 'integer':
+            spec.update({'Data Type': 'integer', 'Allowed Values / Range': '0-1000'})
+        elif kind == 'float':
+            spec.update({'Data Type': 'float', 'Allowed Values / Range': '0-1'})
+        elif kind == 'boolean':
+            spec.update({'Data Type': 'boolean'})
+        elif kind == 'date':
+            spec.update({'Data Type': 'date'})
+        elif kind == 'category':
+            spec.update({'Data Type': 'string', 'Allowed Values / Range': ','.join(CATEGORIES),
+                         'Missing Value Representation': 'NA'})
+        else:
+            spec.update({'Data Type': 'string', 'Constraints / Validation Rules': 'not null'})
+        specs.append(spec)
+    return [{field: spec.get(field, '') for field in DICTIONARY_FIELDS} for spec in specs]
+
+
+def _value(kind, rng, row_id):
+    if kind == 'integer':
+        return str(rng.randrange(1001))
+    if kind == 'float':
+        return f'{rng.random():.4f}'
+    if kind == 'boolean':
+        return 'true' if rng.random() < 0.5 else 'false'
+    if kind == 'date':
+        return (BASE_DATE + timedelta(days=rng.randrange(3650))).isoformat()
+    if kind == 'category':
+        return CATEGORIES[rng.randrange(len(CATEGORIES))]
+    return f'sample {row_id % 9973}'
+
+
+def _bad_value(kind, rng):
+    """A value that breaks one of the column's rules."""
+    if kind == 'integer':
+        return rng.choice(['1.5', 'x', '5000'])
+    if kind == 'float':
+        return rng.choice(['abc', '7.5'])
+    if kind == 'boolean':
+        return 'maybe'
+    if kind == 'date':
+        return '2025-13-40'
+    if kind == 'category':
+        return 'Z'
+    return ''
+
+
+def file_name(index, misnamed):
+    if misnamed:
+        return f'unnamed file {index}.csv'
+    day = BASE_DATE + timedelta(days=index // 2600)
+    return f'P{index % 100:02d}_Exp{chr(65 + index // 100 % 26)}_{day.isoformat()}.csv'
+
+
+def generate(out_dir, rows=100000, columns=12, files=4, error_rate=0.01, seed=0):
+    """
+    Writes the dataset to out_dir and returns its manifest. An existing
+    dataset generated with the same parameters is reused as it is.
+    """
+    params = {'rows': rows, 'columns': columns, 'files': files, 'error_rate': error_rate, 'seed': seed}
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['params'] == params:
+            return manifest
+    except (OSError, ValueError, KeyError):
+        pass
+    data_dir = os.path.join(out_dir, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    for name in os.listdir(data_dir):
+        os.remove(os.path.join(data_dir, name))
+    specs = column_specs(columns)
+    kinds = ['id'] + [KINDS[(i - 1) % len(KINDS)] for i in range(1, columns)]
+    dictionary = {}
+    rng = random.Random(seed)
+    row_id = 0
+    for index in range(files):
+        n_rows = rows // files + (1 if index < rows % files else 0)
+        fname = file_name(index, rng.random() < error_rate)
+        path = os.path.join(data_dir, fname)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow([spec['Variable Name'] for spec in specs])
+            batch = []
+            for _ in range(n_rows):
+                row = []
+                for kind in kinds:
+                    if kind == 'id':
+                        # A duplicated id now and then breaks uniqueness
+                        row.append(str(row_id - 1 if row_id and rng.random() < error_rate else row_id))
+                    elif rng.random() < error_rate:
+                        row.append(_bad_value(kind, rng))
+                    else:
+                        row.append(_value(kind, rng, row_id))
+                batch.append(row)
+                row_id += 1
+                if len(batch) >= 10000:
+                    writer.writerows(batch)
+                    batch = []
+            writer.writerows(batch)
+        dictionary[fname] = {'path': path, 'columns': specs}
+    dictionary_path = os.path.join(out_dir, 'data_dictionary.json')
+    with open(dictionary_path, 'w', encoding='utf-8') as f:
+        json.dump(dictionary, f, indent=2)
+    dictionary_csv = os.path.join(out_dir, 'data_dictionary.csv')
+    with open(dictionary_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['Filename'] + DICTIONARY_FIELDS)
+        writer.writeheader()
+        for fname, meta in dictionary.items():
+            for spec in meta['columns']:
+                writer.writerow({'Filename': fname, **spec})
+    config_path = os.path.join(out_dir, '.project_config.json')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'data_naming_convention_regex': NAMING_REGEX,
+            'data_directory_name': data_dir,
+            'allowed_file_extensions': ['csv', 'json'],
+        }, f, indent=2)
+    manifest = {
+        'params': params,
+        'data_dir': data_dir,
+        'dictionary': dictionary_path,
+        'dictionary_csv': dictionary_csv,
+        'config': config_path,
+        'dictionary_rows': files * columns,
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('out_dir')
+    parser.add_argument('--rows', type=lambda v: int(float(v)), default=100000)
+    parser.add_argument('--columns', type=int, default=12)
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    manifest = generate(args.out_dir, args.rows, args.columns, args.files, args.error_rate, args.seed)
+    print(f"{manifest['params']['rows']} rows in {manifest['params']['files']} files under {manifest['data_dir']}")
+
+
+if __name__ == '__main__':
+    main()
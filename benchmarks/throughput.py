@@ -0,0 +1,195 @@
+"""
+Throughput benchmark for the FAIRy checks.
+
+Generates synthetic datasets (see synthetic.py) at each requested scale and
+times every target in a fresh interpreter, reporting items per second and
+peak RSS. Targets:
+
+    quality_check             quality_check_tabular_data, python engine (rows)
+    quality_check_vectorized  quality_check_tabular_data, vectorized engine (rows)
+    generate_dictionary       generate_data_dictionary.main (files)
+    profile_dictionary        generate_data_dictionary.main with profile=True (rows)
+    check_naming              the naming convention scan (files)
+    build_expectations        csv_to_ge_suite.build_expectations_from_csv (dictionary rows)
+
+    python benchmarks/throughput.py [--rows 1e3 1e5 1e7] [--targets ...]
+        [--data-dir DIR] [--out results.json]
+        [--save-baseline baseline.json | --baseline baseline.json [--tolerance 0.2]]
+
+With --baseline the script exits with status 1 if any target is more than
+--tolerance slower (items per second) or larger (peak RSS) than in the
+baseline, so it can guard performance in CI.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..', 'src'))
+TARGETS = ('quality_check', 'quality_check_vectorized', 'generate_dictionary', 'profile_dictionary',
+           'check_naming', 'build_expectations')
+DEFAULT_ROWS = (1000, 100000)
+DEFAULT_TOLERANCE = 0.2
+
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_target(target, manifest):
+    """
+    Runs one target on a dataset; returns (seconds, items, unit). Modules,
+    pandas included, are imported before the clock starts: startup.py
+    measures import time.
+    """
+    sys.path.insert(0, SRC_DIR)
+    params = manifest['params']
+    if target in ('quality_check', 'quality_check_vectorized'):
+        from checks import quality_check
+        engine = 'vectorized' if target == 'quality_check_vectorized' else 'python'
+        if engine == 'vectorized':
+            import pandas  # noqa: F401
+        start = time.perf_counter()
+        quality_check.quality_check_tabular_data(
+            manifest['data_dir'], manifest['dictionary'], options=quality_check.CheckOptions(engine)
+        )
+        items, unit = params['rows'], 'rows'
+    elif target in ('generate_dictionary', 'profile_dictionary'):
+        from checks import column_profiler, generate_data_dictionary  # noqa: F401
+        profile = target == 'profile_dictionary'
+        with tempfile.TemporaryDirectory() as tmp:
+            # A fresh output file, so nothing is skipped as unchanged
+            out = os.path.join(tmp, 'data_dictionary.json')
+            start = time.perf_counter()
+            generate_data_dictionary.main(manifest['config'], out, profile=profile)
+            seconds = time.perf_counter() - start
+        return seconds, *((params['rows'], 'rows') if profile else (params['files'], 'files'))
+    elif target == 'check_naming':
+        import re
+        from checks import check_naming_convention
+        with open(manifest['config'], 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        exts = check_naming_convention.normalize_extensions(config['allowed_file_extensions'])
+        pattern = re.compile(config['data_naming_convention_regex'])
+        start = time.perf_counter()
+        list(check_naming_convention.iter_non_compliant(manifest['data_dir'], pattern, exts))
+        items, unit = params['files'], 'files'
+    elif target == 'build_expectations':
+        import pandas  # noqa: F401
+        from utils.csv_to_ge_suite import build_expectations_from_csv
+        start = time.perf_counter()
+        build_expectations_from_csv(manifest['dictionary_csv'])
+        items, unit = manifest['dictionary_rows'], 'dictionary rows'
+    else:
+        raise ValueError(f'Unknown target: {target}')
+    return time.perf_counter() - start, items, unit
+
+
+def worker(target, manifest_path):
+    """Entry point of the child interpreter: prints one JSON result line."""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    import contextlib
+    import io
+    # The targets print their own reports; only the result goes to stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds, items, unit = run_target(target, manifest)
+    print(json.dumps({'seconds': seconds, 'items': items, 'unit': unit, 'peak_rss_mb': peak_rss_mb()}))
+
+
+def measure(target, manifest_path, repeat):
+    """Best time and largest peak RSS of `repeat` runs, each in a fresh interpreter."""
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', target, manifest_path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f'{target} failed:\n{result.stderr}')
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        if best is None:
+            best = run
+        else:
+            best['peak_rss_mb'] = max(best['peak_rss_mb'], run['peak_rss_mb'])
+            best['seconds'] = min(best['seconds'], run['seconds'])
+    best['items_per_sec'] = best['items'] / best['seconds'] if best['seconds'] > 0 else float('inf')
+    return best
+
+
+def compare(results, baseline, tolerance):
+    """Returns a message for each result that regressed against the baseline."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result['items_per_sec'] < base['items_per_sec'] * (1 - tolerance):
+            regressions.append(f"{key}: {result['items_per_sec']:,.0f} {result['unit']}/s, "
+                               f"baseline {base['items_per_sec']:,.0f}")
+        if result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f"{key}: peak RSS {result['peak_rss_mb']:.0f} MB, "
+                               f"baseline {base['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=lambda v: int(float(v)), nargs='+', default=list(DEFAULT_ROWS),
+                        help='Total rows per dataset, e.g. 1e3 1e5 1e7')
+    parser.add_argument('--columns', type=int, default=12)
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=list(TARGETS))
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per target; the fastest counts')
+    parser.add_argument('--data-dir', default=None, help='Keep generated datasets here for reuse')
+    parser.add_argument('--out', default=None, help='Write results as JSON')
+    parser.add_argument('--baseline', default=None, help='Fail on regressions against this results file')
+    parser.add_argument('--save-baseline', default=None, help='Write results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown or RSS growth against the baseline (fraction)')
+    parser.add_argument('--worker', nargs=2, metavar=('TARGET', 'MANIFEST'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(*args.worker)
+        return
+    sys.path.insert(0, BENCH_DIR)
+    import synthetic
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_root = args.data_dir or tmp
+        for rows in args.rows:
+            out_dir = os.path.join(data_root, f'rows-{rows}')
+            synthetic.generate(out_dir, rows, args.columns, args.files, args.error_rate, args.seed)
+            manifest_path = os.path.join(out_dir, synthetic.MANIFEST)
+            for target in args.targets:
+                key = f'{target}@{rows}'
+                results[key] = result = measure(target, manifest_path, args.repeat)
+                print(f"{key:<36} {result['items_per_sec']:>14,.0f} {result['unit']}/s "
+                      f"{result['seconds']:>9.3f} s {result['peak_rss_mb']:>8.1f} MB", flush=True)
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print('Regressions against the baseline:')
+            for message in regressions:
+                print(f'  {message}')
+            sys.exit(1)
+        print('No regressions against the baseline.')
+
+
+if __name__ == '__main__':
+    main()
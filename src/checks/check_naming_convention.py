@@ -1,25 +1,191 @@
 import json
 import os
 import re
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
+
+try:
+    from .compressed_io import COMPRESSION_SUFFIXES
+    from .result_cache import DEFAULT_CACHE_DIR, RACY_WINDOW_SECONDS
+except ImportError:  # executed as a script
+    from compressed_io import COMPRESSION_SUFFIXES
+    from result_cache import DEFAULT_CACHE_DIR, RACY_WINDOW_SECONDS
+
+DEFAULT_WORKERS = 8
+LISTING_CACHE_FILE = 'naming_listings.json'
 
 def load_config(config_path):
     with open(config_path, 'r') as f:
         return json.load(f)
 
-def main():
+def normalize_extensions(allowed_exts: Optional[Iterable[str]]) -> Optional[frozenset]:
+    """Lower-cases allowed extensions and strips leading dots; None or empty allows any extension."""
+    if not allowed_exts:
+        return None
+    return frozenset(ext.lower().lstrip('.') for ext in allowed_exts)
+
+def is_compliant(fname: str, pattern: Pattern, allowed_exts: Optional[frozenset]) -> bool:
+    """
+    A file name complies if it matches the naming pattern and has an allowed
+    extension. A compression suffix is looked through, so 'data.csv.gz'
+    complies wherever 'csv' is allowed ('csv.gz' or 'gz' allow it too).
+    """
+    if pattern.match(fname) is None:
+        return False
+    if allowed_exts is None:
+        return True
+    base, dot, ext = fname.rpartition('.')
+    if not dot:
+        return False
+    ext = ext.lower()
+    if ext in allowed_exts:
+        return True
+    if ext not in COMPRESSION_SUFFIXES:
+        return False
+    _, dot, inner = base.rpartition('.')
+    return bool(dot) and (inner.lower() in allowed_exts or f'{inner.lower()}.{ext}' in allowed_exts)
+
+class ListingCache:
+    """
+    Per-directory scan results keyed by the directory's mtime, stored as JSON.
+    A directory's mtime changes whenever an entry is added, removed or
+    renamed in it, so an unchanged mtime means its file names, and therefore
+    its verdicts, are unchanged; only its subdirectories still need a stat.
+    Entries are only valid for the naming rules they were computed with.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, rules: str = ''):
+        self.path = os.path.join(cache_dir, LISTING_CACHE_FILE)
+        self.rules = rules
+        self.entries: Dict[str, list] = {}
+        self.updated: Dict[str, list] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('rules') == rules:
+                self.entries = data.get('directories', {})
+        except (OSError, ValueError):
+            pass
+
+    def get(self, dir_path: str, mtime_ns: int) -> Optional[Tuple[List[str], List[str]]]:
+        """Returns cached (non-compliant names, subdirectories) if dir_path is unchanged."""
+        entry = self.entries.get(dir_path)
+        if entry is None or entry[0] != mtime_ns:
+            return None
+        self.updated[dir_path] = entry
+        return entry[1], entry[2]
+
+    def put(self, dir_path: str, mtime_ns: int, bad: List[str], subdirs: List[str]) -> None:
+        # A directory changed within the racy window may change again within the same mtime tick
+        if time.time() - mtime_ns / 1e9 >= RACY_WINDOW_SECONDS:
+            self.updated[dir_path] = [mtime_ns, bad, subdirs]
+
+    def save(self) -> None:
+        """Writes the directories seen in this scan; directories that disappeared are dropped."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'rules': self.rules, 'directories': self.updated}, f)
+        os.replace(tmp_path, self.path)
+
+def _scan_directory(
+    dir_path: str,
+    pattern: Pattern,
+    allowed_exts: Optional[frozenset],
+    cache: Optional[ListingCache]
+) -> Tuple[List[str], List[str]]:
+    """Returns the non-compliant file names and the subdirectories to descend into."""
+    mtime_ns = None
+    if cache is not None:
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return [], []
+        cached = cache.get(dir_path, mtime_ns)
+        if cached is not None:
+            return cached
+    bad: List[str] = []
+    subdirs: List[str] = []
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    # Like os.walk, symlinked directories are neither followed nor checked as files
+                    if not entry.is_symlink():
+                        subdirs.append(entry.name)
+                elif not is_compliant(entry.name, pattern, allowed_exts):
+                    bad.append(entry.name)
+    except OSError:
+        # Unreadable directories are skipped, as os.walk does
+        return [], []
+    if cache is not None and mtime_ns is not None:
+        cache.put(dir_path, mtime_ns, bad, subdirs)
+    return bad, subdirs
+
+def iter_non_compliant(
+    data_dir: str,
+    pattern: Pattern,
+    allowed_exts: Optional[frozenset] = None,
+    workers: int = DEFAULT_WORKERS,
+    cache: Optional[ListingCache] = None
+) -> Iterator[str]:
+    """
+    Yields the paths of non-compliant files under data_dir as soon as they are
+    found. Directories are listed with os.scandir by a pool of worker
+    threads, so several directories (e.g. on a network filesystem) are read
+    at once; paths therefore come in no particular order.
+    """
+    if workers <= 1:
+        stack = [data_dir]
+        while stack:
+            dir_path = stack.pop()
+            bad, subdirs = _scan_directory(dir_path, pattern, allowed_exts, cache)
+            for name in bad:
+                yield os.path.join(dir_path, name)
+            stack.extend(os.path.join(dir_path, name) for name in reversed(subdirs))
+        return
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_scan_directory, data_dir, pattern, allowed_exts, cache): data_dir}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dir_path = pending.pop(future)
+                bad, subdirs = future.result()
+                for name in subdirs:
+                    sub_path = os.path.join(dir_path, name)
+                    pending[pool.submit(_scan_directory, sub_path, pattern, allowed_exts, cache)] = sub_path
+                for name in bad:
+                    yield os.path.join(dir_path, name)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=DEFAULT_WORKERS, help='Number of directories listed in parallel')
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_DIR, default=None, metavar='DIR', help='Skip re-listing directories whose mtime is unchanged')
+    args, _ = parser.parse_known_args(argv)
     config = load_config('.project_config.json')
     regex = config['data_naming_convention_regex']
     data_dir = config['data_directory_name']
-    allowed_exts = config['allowed_file_extensions']
-    non_compliant = []
-    for root, _, files in os.walk(data_dir):
-        for fname in files:
-            if not re.match(regex, fname):
-                non_compliant.append(os.path.join(root, fname))
-    if non_compliant:
-        print('Non-compliant files:')
-        for f in non_compliant:
-            print(f)
+    allowed_exts = normalize_extensions(config.get('allowed_file_extensions'))
+    pattern = re.compile(regex)
+    cache = None
+    if args.cache:
+        rules = json.dumps([regex, sorted(allowed_exts or [])])
+        cache = ListingCache(args.cache, rules)
+    n_bad = 0
+    for path in iter_non_compliant(data_dir, pattern, allowed_exts, args.jobs, cache):
+        if not n_bad:
+            print('Non-compliant files:')
+        print(path, flush=True)
+        n_bad += 1
+    if cache is not None:
+        cache.save()
+    if n_bad:
         exit(1)
     else:
         print('All files are compliant.')
@@ -0,0 +1,232 @@
+import csv
+import math
+import random
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+try:
+    from .columnar import is_columnar, iter_columnar_batches, read_columnar_schema
+    from .compressed_io import open_text
+    from .constants import BOOLEAN_VALUES, VECTORIZED_BATCH_ROWS
+    from .json_records import is_json_name, iter_json_records
+except ImportError:  # executed as a script
+    from columnar import is_columnar, iter_columnar_batches, read_columnar_schema
+    from compressed_io import open_text
+    from constants import BOOLEAN_VALUES, VECTORIZED_BATCH_ROWS
+    from json_records import is_json_name, iter_json_records
+
+# Strings commonly used for missing values; '' is always treated as missing
+NULL_TOKENS = frozenset(['NA', 'N/A', 'n/a', 'na', 'NaN', 'nan', 'null', 'NULL', 'Null', 'None', 'none',
+                         '-', '.', '?', 'missing', '#N/A'])
+# Columns with at most this many distinct values get an allowed set
+MAX_ALLOWED_VALUES = 20
+# Fields the profiler may fill in; anything a curator has written is kept
+PROFILED_FIELDS = ('Data Type', 'Allowed Values / Range', 'Missing Value Representation', 'Example Value')
+
+
+class ColumnProfile:
+    """
+    Single-pass summary of one column: which types every value parses as,
+    numeric min/max, null-token counts, a distinct-value counter that gives up
+    beyond max_distinct values, and a reservoir-sampled example value.
+    Memory is bounded by max_distinct, whatever the number of rows.
+    """
+
+    def __init__(self, name: str, max_distinct: int = MAX_ALLOWED_VALUES, seed: int = 0):
+        self.name = name
+        self.max_distinct = max_distinct
+        self.count = 0
+        self.nulls = 0
+        self.null_tokens: Dict[str, int] = {}
+        self.is_integer = True
+        self.is_float = True
+        self.is_boolean = True
+        self.is_date = True
+        self.min_value: Optional[float] = None
+        self.max_value: Optional[float] = None
+        self.min_text = ''
+        self.max_text = ''
+        self.distinct: Optional[Dict[str, int]] = {}
+        self.example: Optional[str] = None
+        # Seeded, so regenerating the dictionary picks the same examples
+        self._rng = random.Random(seed)
+        self._next_sample = 1
+        self._weight = 1.0
+
+    def add(self, v: Optional[str]) -> None:
+        if v is None or v == '':
+            self.nulls += 1
+            return
+        if v in NULL_TOKENS:
+            self.nulls += 1
+            self.null_tokens[v] = self.null_tokens.get(v, 0) + 1
+            return
+        self.count += 1
+        if self.count == self._next_sample:
+            self.example = v
+            self._skip_ahead()
+        if self.distinct is not None:
+            self.distinct[v] = self.distinct.get(v, 0) + 1
+            if len(self.distinct) > self.max_distinct:
+                self.distinct = None
+        if self.is_float:
+            try:
+                fv = float(v)
+            except ValueError:
+                self.is_float = self.is_integer = False
+            else:
+                if self.is_integer:
+                    try:
+                        int(v)
+                    except ValueError:
+                        self.is_integer = False
+                if self.min_value is None or fv < self.min_value:
+                    self.min_value, self.min_text = fv, v.strip()
+                if self.max_value is None or fv > self.max_value:
+                    self.max_value, self.max_text = fv, v.strip()
+        if self.is_boolean and v.lower() not in BOOLEAN_VALUES:
+            self.is_boolean = False
+        if self.is_date:
+            try:
+                datetime.fromisoformat(v)
+            except ValueError:
+                self.is_date = False
+
+    def _skip_ahead(self) -> None:
+        """
+        Reservoir sampling with one slot (Algorithm L): instead of drawing a
+        random number per value, draw how many values to skip until the next
+        replacement. Every value ends up equally likely to be the example.
+        """
+        rng = self._rng
+        self._weight *= 1.0 - rng.random()
+        if self._weight >= 1.0:
+            self._next_sample += 1
+            return
+        self._next_sample += int(math.log(1.0 - rng.random()) / math.log(1.0 - self._weight)) + 1
+
+    def data_type(self) -> str:
+        """Most specific data dictionary type that every non-null value satisfies."""
+        if not self.count:
+            return ''
+        numeric = self.is_integer or self.is_float
+        # Columns of only 0/1 are integers; true/false/yes/no makes them boolean
+        if self.is_boolean and not numeric:
+            return 'boolean'
+        if self.is_integer:
+            return 'integer'
+        if self.is_float:
+            return 'float'
+        if self.is_date:
+            return 'date'
+        return 'string'
+
+    def missing_value(self) -> str:
+        """The most frequent null token other than the empty string."""
+        if not self.null_tokens:
+            return ''
+        return max(self.null_tokens.items(), key=lambda item: item[1])[0]
+
+    def allowed_values(self, data_type: str) -> str:
+        """A range for numeric columns, or the distinct values of low-cardinality text columns."""
+        if data_type in ('integer', 'float', 'decimal'):
+            if self.min_value is None or not (self.is_integer or self.is_float):
+                return ''
+            # Signed bounds read more clearly as an interval than as "-5--1"
+            if '-' in self.min_text or '-' in self.max_text:
+                return f"[{self.min_text}, {self.max_text}]"
+            return f"{self.min_text}-{self.max_text}"
+        if data_type in ('string', '') and self.distinct:
+            values = sorted(self.distinct)
+            # Only worth listing if values repeat, and only if "a,b" syntax can hold them
+            if len(values) < self.count and not any(',' in v or v != v.strip() for v in values):
+                return ','.join(values)
+        return ''
+
+
+def profile_csv(file_path: str, sample_rows: Optional[int] = None) -> Dict[str, ColumnProfile]:
+    """
+    Streams a CSV file once and profiles each column. With sample_rows, only
+    the first sample_rows data rows are read.
+    """
+    with open_text(file_path) as csvfile:
+        reader = csv.reader(csvfile)
+        fieldnames = next(reader, None) or []
+        profiles = [ColumnProfile(name) for name in fieldnames]
+        n_rows = 0
+        for row in reader:
+            # Empty lines are skipped, as csv.DictReader does
+            if not row:
+                continue
+            if sample_rows is not None and n_rows >= sample_rows:
+                break
+            n_rows += 1
+            for i, profile in enumerate(profiles):
+                profile.add(row[i] if i < len(row) else None)
+    # Like csv.DictReader, a repeated header name refers to its last column
+    return {profile.name: profile for profile in profiles}
+
+
+def profile_columnar(file_path: str, sample_rows: Optional[int] = None) -> Dict[str, ColumnProfile]:
+    """
+    Profiles a Parquet or Arrow file from its values rendered as CSV text,
+    so it gets the same dictionary entries as the equivalent CSV file.
+    """
+    names = list(dict.fromkeys(read_columnar_schema(file_path)))
+    profiles = [ColumnProfile(name) for name in names]
+    n_rows = 0
+    for columns in iter_columnar_batches(file_path, names, VECTORIZED_BATCH_ROWS):
+        if sample_rows is not None:
+            columns = [values[:sample_rows - n_rows] for values in columns]
+            if not columns or not len(columns[0]):
+                break
+        for profile, values in zip(profiles, columns):
+            add = profile.add
+            for v in values:
+                add(v)
+        n_rows += len(columns[0]) if columns else 0
+    return {profile.name: profile for profile in profiles}
+
+
+def profile_json(file_path: str, sample_rows: Optional[int] = None) -> Dict[str, ColumnProfile]:
+    """
+    Profiles the flattened field paths of a JSON array or JSON Lines file,
+    in order of first appearance. A field absent from a record counts as
+    missing in that record, including records before its first appearance.
+    """
+    profiles: Dict[str, ColumnProfile] = {}
+    n_rows = 0
+    for flat in iter_json_records(file_path):
+        if sample_rows is not None and n_rows >= sample_rows:
+            break
+        for path in flat:
+            if path not in profiles:
+                profiles[path] = ColumnProfile(path)
+                profiles[path].nulls = n_rows
+        for path, profile in profiles.items():
+            profile.add(flat.get(path))
+        n_rows += 1
+    return profiles
+
+
+def profile_file(file_path: str, sample_rows: Optional[int] = None) -> Dict[str, ColumnProfile]:
+    """Profiles a CSV, JSON, Parquet or Arrow file."""
+    if is_columnar(file_path):
+        return profile_columnar(file_path, sample_rows)
+    if is_json_name(file_path):
+        return profile_json(file_path, sample_rows)
+    return profile_csv(file_path, sample_rows)
+
+
+def apply_profile(col: Dict[str, Any], profile: ColumnProfile) -> None:
+    """Fills the profiled fields of a data dictionary column that are still empty."""
+    inferred: Dict[str, str] = {}
+    data_type = col.get('Data Type') or profile.data_type()
+    inferred['Data Type'] = profile.data_type()
+    inferred['Allowed Values / Range'] = profile.allowed_values(data_type.lower())
+    inferred['Missing Value Representation'] = profile.missing_value()
+    inferred['Example Value'] = profile.example or ''
+    for field in PROFILED_FIELDS:
+        if not col.get(field) and inferred[field]:
+            col[field] = inferred[field]
+
@@ -0,0 +1,114 @@
+import os
+from typing import Any, Iterator, List, Sequence
+
+# Parquet files and Arrow IPC files (Feather v2 is the Arrow IPC file format)
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+COLUMNAR_EXTENSIONS = PARQUET_EXTENSIONS + ARROW_EXTENSIONS
+
+
+def is_columnar(file_path: str) -> bool:
+    """True for Parquet, Arrow and Feather files, judged by their extension."""
+    return file_path.lower().endswith(COLUMNAR_EXTENSIONS)
+
+
+def _load_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('Reading Parquet, Arrow and Feather files requires pyarrow (pip install pyarrow)') from None
+    return pyarrow
+
+
+def _open_ipc(pa: Any, file_path: str) -> Any:
+    """Opens an Arrow IPC file (or, failing that, stream) over a memory map."""
+    source = pa.memory_map(file_path)
+    try:
+        return pa.ipc.open_file(source)
+    except pa.ArrowInvalid:
+        source.seek(0)
+        return pa.ipc.open_stream(source)
+
+
+def read_columnar_schema(file_path: str) -> List[str]:
+    """
+    Returns the column names of a Parquet or Arrow file. Only the schema is
+    read: the footer of a Parquet or Arrow IPC file, the first message of an
+    Arrow stream. No column data is touched.
+    """
+    pa = _load_pyarrow()
+    if file_path.lower().endswith(PARQUET_EXTENSIONS):
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(file_path, memory_map=True).names)
+    return list(_open_ipc(pa, file_path).schema.names)
+
+
+def projected_bytes(file_path: str, columns: Sequence[str]) -> int:
+    """
+    Bytes a read of the named columns touches: their compressed column
+    chunks in a Parquet file, read from its footer. Arrow files keep no
+    per-column sizes outside their record batches, so they count whole.
+    """
+    if not file_path.lower().endswith(PARQUET_EXTENSIONS):
+        return os.path.getsize(file_path)
+    _load_pyarrow()
+    import pyarrow.parquet as pq
+    wanted = set(columns)
+    metadata = pq.read_metadata(file_path, memory_map=True)
+    total = 0
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        for j in range(row_group.num_columns):
+            column = row_group.column(j)
+            if column.path_in_schema.split('.')[0] in wanted:
+                total += column.total_compressed_size
+    return total
+
+
+def _as_strings(pa: Any, array: Any) -> Any:
+    """
+    Renders an Arrow column as the strings a CSV export would hold: numbers,
+    booleans ('true'/'false') and ISO dates as text, and nulls as ''.
+    """
+    import pyarrow.compute as pc
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    try:
+        strings = pc.cast(array, pa.string())
+    except (pa.ArrowNotImplementedError, pa.ArrowInvalid):
+        # Nested and other types without a string cast
+        strings = pa.array([None if v is None else str(v) for v in array.to_pylist()], pa.string())
+    return pc.fill_null(strings, '').to_numpy(zero_copy_only=False)
+
+
+def iter_columnar_batches(
+    file_path: str,
+    columns: Sequence[str],
+    batch_rows: int
+) -> Iterator[List[Any]]:
+    """
+    Yields the named columns of a Parquet or Arrow file as string arrays, in
+    batches of at most batch_rows rows, aligned to `columns`; every name must
+    exist in the file. Only those columns are read: Parquet files row group
+    by row group, Arrow files record batch by record batch, both through a
+    memory map so untouched columns are never paged in.
+    """
+    pa = _load_pyarrow()
+    columns = list(columns)
+    if file_path.lower().endswith(PARQUET_EXTENSIONS):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(file_path, memory_map=True)
+        batches: Iterator[Any] = parquet_file.iter_batches(batch_size=batch_rows, columns=columns)
+    else:
+        reader = _open_ipc(pa, file_path)
+        if hasattr(reader, 'num_record_batches'):
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        else:
+            batches = iter(reader)
+    for batch in batches:
+        if not batch.num_rows:
+            continue
+        batch = batch.select(columns)
+        for start in range(0, batch.num_rows, batch_rows):
+            part = batch.slice(start, batch_rows)
+            yield [_as_strings(pa, column) for column in part.columns]
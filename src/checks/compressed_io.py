@@ -0,0 +1,87 @@
+import io
+from typing import BinaryIO, Optional, TextIO, Tuple
+
+# Compression by file name suffix, and by the magic bytes a file starts with
+COMPRESSION_SUFFIXES = {
+    'gz': 'gzip', 'gzip': 'gzip',
+    'bz2': 'bz2',
+    'xz': 'xz', 'lzma': 'xz',
+    'zst': 'zstd', 'zstd': 'zstd',
+}
+MAGIC_BYTES = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+# Decompressed data is buffered (and zstd input read) in blocks of this
+# size; much larger blocks fall out of the CPU cache and get slower
+DECOMPRESS_BUFFER_SIZE = 256 * 1024
+
+
+def split_compression_suffix(fname: str) -> Tuple[str, Optional[str]]:
+    """Splits 'data.csv.gz' into ('data.csv', 'gzip'); uncompressed names get None."""
+    base, dot, ext = fname.rpartition('.')
+    kind = COMPRESSION_SUFFIXES.get(ext.lower()) if dot else None
+    return (base, kind) if kind else (fname, None)
+
+
+def is_csv_name(fname: str) -> bool:
+    """True for '.csv' file names, compressed ('.csv.gz', '.csv.zst', ...) or not."""
+    return split_compression_suffix(fname)[0].lower().endswith('.csv')
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    """
+    Returns 'gzip', 'bz2', 'xz' or 'zstd' for a compressed file, else None.
+    The file name decides if it has a compression suffix; otherwise the
+    first bytes of the file are checked, so e.g. a gzipped 'data.csv' is
+    still recognised.
+    """
+    kind = split_compression_suffix(file_path)[1]
+    if kind is not None:
+        return kind
+    with open(file_path, 'rb') as f:
+        head = f.read(6)
+    for magic, kind in MAGIC_BYTES:
+        if head.startswith(magic):
+            return kind
+    # 'BZh' alone could start a CSV header; bzip2 follows it with the block size
+    if head[:3] == b'BZh' and head[3:4].isdigit():
+        return 'bz2'
+    return None
+
+
+def _open_zstd(file_path: str, buffer_size: int) -> BinaryIO:
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError('Reading zstd-compressed files requires zstandard (pip install zstandard)') from None
+    raw = open(file_path, 'rb')
+    return zstandard.ZstdDecompressor().stream_reader(raw, read_size=buffer_size, closefd=True)
+
+
+def open_binary(file_path: str, buffer_size: int = DECOMPRESS_BUFFER_SIZE) -> BinaryIO:
+    """
+    Opens a data file for reading, decompressing gzip, bz2, xz and zstd
+    files on the fly. Nothing is written to disk.
+    """
+    kind = detect_compression(file_path)
+    if kind is None:
+        return open(file_path, 'rb', buffering=buffer_size)
+    if kind == 'gzip':
+        import gzip
+        stream: BinaryIO = gzip.open(file_path, 'rb')
+    elif kind == 'bz2':
+        import bz2
+        stream = bz2.open(file_path, 'rb')
+    elif kind == 'xz':
+        import lzma
+        stream = lzma.open(file_path, 'rb')
+    else:
+        stream = _open_zstd(file_path, buffer_size)
+    return io.BufferedReader(stream, buffer_size=buffer_size)
+
+
+def open_text(file_path: str, buffer_size: int = DECOMPRESS_BUFFER_SIZE) -> TextIO:
+    """open_binary as UTF-8 text with newline='', as the csv module expects."""
+    return io.TextIOWrapper(open_binary(file_path, buffer_size), encoding='utf-8', newline='')
@@ -0,0 +1,7 @@
+# Constants shared by quality_check.py and column_profiler.py; the profiler
+# imports them from here so that it does not load the whole quality check
+
+# Spellings of a 'boolean' value, compared in lower case
+BOOLEAN_VALUES = frozenset(['true', 'false', '0', '1', 'yes', 'no'])
+# Rows per vectorized batch, and per batch read from a columnar file
+VECTORIZED_BATCH_ROWS = 65536
@@ -0,0 +1,506 @@
+import abc
+import math
+import operator
+import re
+from datetime import timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+try:
+    from .date_formats import compile_date_parser
+except ImportError:  # executed as a script
+    from date_formats import compile_date_parser
+
+# Signed numbers, exponents and infinities: '-3', '1e-3', '-inf'
+NUMBER = r'[+-]?(?:inf\b|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)'
+_TOKEN = re.compile(rf'''\s*(?:
+    (?P<number>{NUMBER})
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<column>`[^`]+`)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_.]*)
+  | (?P<op><=|>=|==|!=|<|>|=)
+  | (?P<punct>[\[\](),;])
+)''', re.X | re.I)
+# "min-max", the range syntax of 'Allowed Values / Range'
+_DASH_RANGE = re.compile(rf'\s*({NUMBER})\s*-\s*({NUMBER})\s*$', re.I)
+_INTERVAL = re.compile(rf'\s*([\[(])\s*({NUMBER})\s*,\s*({NUMBER})\s*([\])])\s*$', re.I)
+KEYWORDS = frozenset(['unique', 'not', 'null', 'cannot', 'be', 'matches', 'length', 'value', 'in', 'and'])
+OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+}
+
+# Converted values a rule does not apply to (nulls, and values the column's
+# own type rule reports), and values that violate it for not being of the
+# type it compares
+_SKIP = object()
+_INVALID = object()
+
+
+class ConstraintError(ValueError):
+    """Raised for constraint text that does not parse or cannot be applied."""
+
+
+class Interval:
+    """A numeric interval; bounds may be infinite, and open or closed."""
+
+    def __init__(self, lo: float = -math.inf, hi: float = math.inf, lo_open: bool = False, hi_open: bool = False):
+        self.lo = lo
+        self.hi = hi
+        self.lo_open = lo_open
+        self.hi_open = hi_open
+
+    def contains(self, x: float) -> bool:
+        lo, hi = self.lo, self.hi
+        return (lo < x if self.lo_open else lo <= x) and (x < hi if self.hi_open else x <= hi)
+
+    def outside(self, values: Any) -> Any:
+        """Whether a number, or which numbers of an array, are outside the interval; NaN never is."""
+        below = values <= self.lo if self.lo_open else values < self.lo
+        above = values >= self.hi if self.hi_open else values > self.hi
+        return below | above
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Interval) and (self.lo, self.hi, self.lo_open, self.hi_open) == (
+            other.lo, other.hi, other.lo_open, other.hi_open)
+
+    def __repr__(self) -> str:
+        return f"{'(' if self.lo_open else '['}{self.lo:g}, {self.hi:g}{')' if self.hi_open else ']'}"
+
+
+def parse_interval(text: str) -> Optional[Interval]:
+    """
+    Parses a numeric range: 'min-max' ('-5--1', '1e-3 - 2') or interval
+    notation ('[0, 1)', '(-inf, 0]'). Returns None for anything else.
+    """
+    m = _DASH_RANGE.match(text)
+    if m:
+        return Interval(float(m.group(1)), float(m.group(2)))
+    m = _INTERVAL.match(text)
+    if m:
+        return Interval(float(m.group(2)), float(m.group(3)), m.group(1) == '(', m.group(4) == ')')
+    return None
+
+
+class ColumnSpec(NamedTuple):
+    """What rules need to know of a column they read: its kind ('number', 'date' or 'string'), date format and null tokens."""
+    kind: str
+    date_format: Optional[str]
+    null_values: frozenset
+
+
+def _converter(kind: str, spec: ColumnSpec) -> Callable[[Optional[str]], Any]:
+    """Converts raw values of a column for a rule comparing `kind` values."""
+    null_values = spec.null_values
+    # Values the column's own type rule reports are not reported again
+    bad = _SKIP if spec.kind == kind else _INVALID
+    if kind == 'number':
+        def convert(v: Optional[str]) -> Any:
+            if v is None or v in null_values:
+                return _SKIP
+            try:
+                f = float(v)
+            except ValueError:
+                return bad
+            return _SKIP if f != f else f
+    elif kind == 'date':
+        parse = compile_date_parser(spec.date_format)
+
+        def convert(v: Optional[str]) -> Any:
+            if v is None or v in null_values:
+                return _SKIP
+            d = parse(v)
+            if d is None:
+                return bad
+            # Aware and naive datetimes do not compare
+            return d.astimezone(timezone.utc).replace(tzinfo=None) if d.tzinfo else d
+    else:
+        def convert(v: Optional[str]) -> Any:
+            return _SKIP if v is None or v in null_values else v
+    return convert
+
+
+def map_distinct(values: Sequence[Any], fn: Callable[[Any], Any]) -> Any:
+    """
+    Object array of fn(v) for a batch of values, calling fn once per
+    distinct value (None included, if present).
+    """
+    import numpy as np
+    import pandas as pd
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    results = np.empty(len(uniques) + 1, dtype=object)
+    for i, v in enumerate(uniques):
+        results[i] = fn(v)
+    # pd.factorize codes None as -1, the last slot
+    if len(uniques) < len(codes) and (codes < 0).any():
+        results[-1] = fn(None)
+    return results[codes]
+
+
+class ColumnRef(NamedTuple):
+    name: Optional[str]  # None for the rule's own column ('value')
+
+
+class Literal(NamedTuple):
+    value: Union[float, str]
+    text: str
+
+
+Operand = Union[ColumnRef, Literal]
+
+
+class Rule(abc.ABC):
+    """
+    A parsed constraint. columns lists the other columns it reads; rules
+    without any are value rules, checked per value of their own column,
+    the others are row rules.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.columns: List[str] = []
+
+    @abc.abstractmethod
+    def bind_value(self, spec: ColumnSpec) -> Callable[[str], bool]:
+        """Returns a function telling whether a non-null value of the rule's column satisfies it."""
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.source!r})'
+
+
+class Matches(Rule):
+    """`matches "<regex>"`: the whole value matches the regular expression."""
+
+    def __init__(self, source: str, pattern: str):
+        super().__init__(source)
+        try:
+            self.regex = re.compile(pattern)
+        except re.error as e:
+            raise ConstraintError(f'Invalid regular expression {pattern!r}: {e}')
+
+    def bind_value(self, spec: ColumnSpec) -> Callable[[str], bool]:
+        match = self.regex.fullmatch
+        return lambda v: match(v) is not None
+
+
+class Length(Rule):
+    """`length [2, 10]`, `length <= 10`: the number of characters is in the interval."""
+
+    def __init__(self, source: str, interval: Interval):
+        super().__init__(source)
+        self.interval = interval
+
+    def bind_value(self, spec: ColumnSpec) -> Callable[[str], bool]:
+        contains = self.interval.contains
+        return lambda v: contains(len(v))
+
+
+class InInterval(Rule):
+    """`(0, 1]`, `value in [-5, 5)`: the value, as a number, is in the interval."""
+
+    def __init__(self, source: str, interval: Interval):
+        super().__init__(source)
+        self.interval = interval
+
+    def bind_value(self, spec: ColumnSpec) -> Callable[[str], bool]:
+        convert = _converter('number', spec)
+        contains = self.interval.contains
+
+        def check(v: str) -> bool:
+            x = convert(v)
+            if x is _SKIP:
+                return True
+            return x is not _INVALID and contains(x)
+        return check
+
+
+class Compare(Rule):
+    """
+    `<operand> <op> <operand>`, e.g. `end_date >= start_date` or `value != 0`.
+    Operands are columns or literals, compared as numbers if a numeric
+    column or a number is involved, else as dates if a date column is, else
+    as strings. Rows where either column is null are not checked.
+    """
+
+    def __init__(self, source: str, left: Operand, op: str, right: Operand):
+        super().__init__(source)
+        self.left = left
+        self.op = op
+        self.right = right
+        for operand in (left, right):
+            if isinstance(operand, ColumnRef) and operand.name is not None and operand.name not in self.columns:
+                self.columns.append(operand.name)
+        if isinstance(left, Literal) and isinstance(right, Literal):
+            raise ConstraintError(f'{source!r} compares no column')
+
+    def bind_row(self, own: str, specs: Dict[str, ColumnSpec]) -> 'RowCheck':
+        """Binds the rule to the columns it reads; columns missing from specs are treated as text."""
+        columns = [own] + self.columns
+        col_specs = [specs.get(name, ColumnSpec('string', None, frozenset(['']))) for name in columns]
+        kinds = set(spec.kind for spec in col_specs if spec.kind != 'string')
+        if 'number' in kinds or any(isinstance(o, Literal) and isinstance(o.value, float) for o in (self.left, self.right)):
+            kind = 'number'
+        elif 'date' in kinds:
+            kind = 'date'
+        else:
+            kind = 'string'
+        sides: List[Tuple[Optional[int], Any]] = []
+        for operand in (self.left, self.right):
+            if isinstance(operand, ColumnRef):
+                sides.append((columns.index(operand.name or own), None))
+            else:
+                sides.append((None, self._literal(operand, kind, col_specs)))
+        return RowCheck(self.source, columns, [_converter(kind, spec) for spec in col_specs],
+                        sides, OPERATORS[self.op], kind)
+
+    def _literal(self, literal: Literal, kind: str, col_specs: List[ColumnSpec]) -> Any:
+        if kind == 'number':
+            if isinstance(literal.value, float):
+                return literal.value
+            try:
+                return float(literal.value)
+            except ValueError:
+                raise ConstraintError(f'{self.source!r} compares numbers with {literal.text}')
+        if kind == 'date':
+            date_format = next(spec.date_format for spec in col_specs if spec.kind == 'date')
+            value = _converter('date', ColumnSpec('date', date_format, frozenset()))(str(literal.value))
+            if value is _SKIP or value is _INVALID:
+                raise ConstraintError(f'{self.source!r} compares dates with {literal.text}')
+            return value
+        return literal.text if isinstance(literal.value, float) else literal.value
+
+    def bind_value(self, spec: ColumnSpec) -> Callable[[str], bool]:
+        check = self.bind_row('', {'': spec}).check
+        return lambda v: check((v,))
+
+
+class RowCheck:
+    """
+    A Compare bound to the columns it reads, its own column first. check()
+    takes one raw value per column; violations() one sequence of values per
+    column, and compares them as arrays.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        columns: List[str],
+        converters: List[Callable[[Optional[str]], Any]],
+        sides: List[Tuple[Optional[int], Any]],
+        op: Callable[[Any, Any], Any],
+        kind: str
+    ):
+        self.source = source
+        self.columns = columns
+        self.converters = converters
+        self.sides = sides
+        self.op = op
+        self.kind = kind
+
+    def check(self, values: Sequence[Optional[str]]) -> bool:
+        converted = [convert(v) for convert, v in zip(self.converters, values)]
+        if any(x is _SKIP for x in converted):
+            return True
+        if any(x is _INVALID for x in converted):
+            return False
+        (li, left), (ri, right) = self.sides
+        return bool(self.op(converted[li] if li is not None else left, converted[ri] if ri is not None else right))
+
+    def violations(self, arrays: Sequence[Sequence[Optional[str]]]) -> Any:
+        """Boolean array of the rows violating the rule, equal to `not check(row)` for each row."""
+        import numpy as np
+        n = len(arrays[0])
+        converted = [map_distinct(arr, convert) for convert, arr in zip(self.converters, arrays)]
+        skip = np.zeros(n, dtype=bool)
+        invalid = np.zeros(n, dtype=bool)
+        for values in converted:
+            skip |= values == _SKIP
+            invalid |= values == _INVALID
+        result = ~skip & invalid
+        comparable = ~(skip | invalid)
+        if comparable.any():
+            operands = []
+            for index, literal in self.sides:
+                if index is None:
+                    operands.append(literal)
+                else:
+                    values = converted[index][comparable]
+                    operands.append(values.astype(float) if self.kind == 'number' else values)
+            result[comparable] = ~np.asarray(self.op(*operands), dtype=bool)
+        return result
+
+
+class ConstraintSet(NamedTuple):
+    unique: bool
+    not_null: bool
+    rules: List[Rule]
+
+
+class _Parser:
+    def __init__(self, text: str, column: str):
+        self.text = text
+        self.column = column
+        self.tokens: List[Tuple[str, str, int, int]] = []
+        pos = 0
+        while pos < len(text):
+            m = _TOKEN.match(text, pos)
+            if m is None or m.end() == pos:
+                if text[pos:].strip():
+                    raise ConstraintError(f'Unexpected text at {text[pos:pos + 20]!r}')
+                break
+            kind = m.lastgroup or ''
+            self.tokens.append((kind, m.group(kind), m.start(kind), m.end()))
+            pos = m.end()
+        self.pos = 0
+
+    def peek(self) -> Tuple[str, str]:
+        if self.pos < len(self.tokens):
+            kind, value = self.tokens[self.pos][:2]
+            return kind, value.lower() if kind == 'word' else value
+        return '', ''
+
+    def take(self) -> Tuple[str, str]:
+        if self.pos >= len(self.tokens):
+            raise ConstraintError('Unexpected end of constraint')
+        kind, value = self.tokens[self.pos][:2]
+        self.pos += 1
+        return kind, value
+
+    def accept(self, kind: str, value: str) -> bool:
+        if self.peek() == (kind, value):
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, kind: str, value: str) -> None:
+        if not self.accept(kind, value):
+            raise ConstraintError(f'Expected {value!r} at {self._where()}')
+
+    def _where(self) -> str:
+        if self.pos < len(self.tokens):
+            return repr(self.text[self.tokens[self.pos][2]:][:20])
+        return 'the end'
+
+    def parse(self) -> ConstraintSet:
+        unique = not_null = False
+        rules: List[Rule] = []
+        while self.pos < len(self.tokens):
+            start = self.tokens[self.pos][2]
+            if self.accept('word', 'unique'):
+                unique = True
+            elif self.accept('word', 'not'):
+                self.expect('word', 'null')
+                not_null = True
+            elif self.accept('word', 'cannot'):
+                self.expect('word', 'be')
+                self.expect('word', 'null')
+                not_null = True
+            else:
+                rules.append(self.rule(start))
+            if self.pos < len(self.tokens) and not (
+                self.accept('punct', ',') or self.accept('punct', ';') or self.accept('word', 'and')
+            ):
+                raise ConstraintError(f"Expected ',' or 'and' at {self._where()}")
+        return ConstraintSet(unique, not_null, rules)
+
+    def rule(self, start: int) -> Rule:
+        kind, value = self.peek()
+        if self.accept('word', 'matches'):
+            kind, pattern = self.take()
+            if kind != 'string':
+                raise ConstraintError("Expected a quoted regular expression after 'matches'")
+            return Matches(self.source(start), _unquote(pattern))
+        if self.accept('word', 'length'):
+            interval = self.interval_spec()
+            return Length(self.source(start), interval)
+        if (kind, value) in (('punct', '['), ('punct', '(')) or self.accept('word', 'in'):
+            interval = self.interval()
+            return InInterval(self.source(start), interval)
+        left = self.operand()
+        if left == ColumnRef(None) and self.accept('word', 'in'):
+            interval = self.interval()
+            return InInterval(self.source(start), interval)
+        kind, op = self.take()
+        if kind != 'op':
+            raise ConstraintError(f'Expected a comparison after {self.source(start)!r}')
+        right = self.operand()
+        return Compare(self.source(start), left, op, right)
+
+    def source(self, start: int) -> str:
+        return self.text[start:self.tokens[self.pos - 1][3]].strip()
+
+    def operand(self) -> Operand:
+        kind, value = self.take()
+        if kind == 'number':
+            return Literal(float(value), value)
+        if kind == 'string':
+            return Literal(_unquote(value), value)
+        if kind == 'column':
+            value = value[1:-1]
+        elif kind != 'word' or value.lower() in KEYWORDS - {'value'}:
+            raise ConstraintError(f'Unexpected {value!r}')
+        elif value.lower() == 'value':
+            return ColumnRef(None)
+        return ColumnRef(None if value == self.column else value)
+
+    def interval(self) -> Interval:
+        _, opening = self.take()
+        if opening not in ('[', '('):
+            raise ConstraintError(f"Expected '[' or '(' to open an interval, not {opening!r}")
+        lo = self.number()
+        self.expect('punct', ',')
+        hi = self.number()
+        _, closing = self.take()
+        if closing not in (']', ')'):
+            raise ConstraintError(f"Expected ']' or ')' to close an interval, not {closing!r}")
+        return Interval(lo, hi, opening == '(', closing == ')')
+
+    def interval_spec(self) -> Interval:
+        """An interval, optionally after 'in', or a comparison with a number: '<= 10'."""
+        self.accept('word', 'in')
+        kind, op = self.peek()
+        if kind != 'op':
+            return self.interval()
+        self.take()
+        n = self.number()
+        if op == '<':
+            return Interval(hi=n, hi_open=True)
+        if op == '<=':
+            return Interval(hi=n)
+        if op == '>':
+            return Interval(lo=n, lo_open=True)
+        if op == '>=':
+            return Interval(lo=n)
+        if op in ('=', '=='):
+            return Interval(n, n)
+        raise ConstraintError(f'{op!r} cannot bound a length')
+
+    def number(self) -> float:
+        kind, value = self.take()
+        if kind != 'number':
+            raise ConstraintError(f'Expected a number, not {value!r}')
+        return float(value)
+
+
+def _unquote(token: str) -> str:
+    # Only the quote itself is escaped, so regex escapes need no doubling
+    quote = token[0]
+    return token[1:-1].replace('\\' + quote, quote)
+
+
+def parse_constraints(text: str, column: str) -> ConstraintSet:
+    """
+    Parses the 'Constraints / Validation Rules' of a data dictionary column
+    into its flags and rules, once per column. Clauses are separated by ',',
+    ';' or 'and':
+
+        unique, not null (or: cannot be null)
+        matches "[A-Z]{2}[0-9]+"            the whole value matches the regex
+        length [2, 10]  /  length <= 10     number of characters
+        [-5, 5)  /  value in (0, inf]       numeric intervals, open or closed
+        value != 0  /  end_date >= start_date
+                                            comparisons with literals or
+                                            other columns (`quoted name`)
+
+    Raises ConstraintError for text that does not parse.
+    """
+    return _Parser(text, column).parse()
@@ -0,0 +1,109 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+# Tokens of formats like the project config's date_format_choice
+# ("YYYY-MM-DD"); everything else in a format is literal text
+DATE_TOKENS = (
+    ('YYYY', 'year', '[0-9]{4}'),
+    ('YY', 'year2', '[0-9]{2}'),
+    ('MM', 'month', '[0-9]{2}'),
+    ('DD', 'day', '[0-9]{2}'),
+    ('HH', 'hour', '[0-9]{2}'),
+    ('mm', 'minute', '[0-9]{2}'),
+    ('ss', 'second', '[0-9]{2}'),
+)
+
+
+def _parse_iso_date(v: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(v)
+    except ValueError:
+        return None
+
+
+def _strptime_parser(fmt: str) -> Callable[[str], Optional[datetime]]:
+    def parse(v: str) -> Optional[datetime]:
+        try:
+            return datetime.strptime(v, fmt)
+        except ValueError:
+            return None
+    return parse
+
+
+def _token_parser(fmt: str) -> Callable[[str], Optional[datetime]]:
+    pattern: List[str] = []
+    fields: List[str] = []
+    pos = 0
+    while pos < len(fmt):
+        for token, field, regex in DATE_TOKENS:
+            if fmt.startswith(token, pos):
+                pattern.append(f'({regex})')
+                fields.append(field)
+                pos += len(token)
+                break
+        else:
+            pattern.append(re.escape(fmt[pos]))
+            pos += 1
+    if not fields or len(set(fields)) != len(fields) or ('year' in fields and 'year2' in fields):
+        raise ValueError(f'Unsupported date format: {fmt!r}')
+    match = re.compile(''.join(pattern)).fullmatch
+    index: Dict[str, int] = {field: i for i, field in enumerate(fields)}
+    year, year2, month, day = (index.get(f) for f in ('year', 'year2', 'month', 'day'))
+    hour, minute, second = (index.get(f) for f in ('hour', 'minute', 'second'))
+
+    def parse(v: str) -> Optional[datetime]:
+        m = match(v)
+        if m is None:
+            return None
+        groups = m.groups()
+        if year is not None:
+            y = int(groups[year])
+        elif year2 is not None:
+            # The strptime %y pivot: 69-99 are 1969-1999, 00-68 are 2000-2068
+            y = int(groups[year2])
+            y += 1900 if y >= 69 else 2000
+        else:
+            # A leap year, so that 29 February is valid without a year
+            y = 2000
+        try:
+            return datetime(
+                y,
+                int(groups[month]) if month is not None else 1,
+                int(groups[day]) if day is not None else 1,
+                int(groups[hour]) if hour is not None else 0,
+                int(groups[minute]) if minute is not None else 0,
+                int(groups[second]) if second is not None else 0,
+            )
+        except ValueError:
+            return None
+    return parse
+
+
+@lru_cache(maxsize=None)
+def compile_date_parser(fmt: Optional[str]) -> Callable[[str], Optional[datetime]]:
+    """
+    Compiles a date format, once per format, into a function returning the
+    datetime a string holds, or None if it is not a valid date in that
+    format. Formats are either tokens ('YYYY-MM-DD', 'DD/MM/YY HH:mm', see
+    DATE_TOKENS), which become one regex match and a datetime() call, or
+    strptime formats ('%d %b %Y'). No format accepts what
+    datetime.fromisoformat accepts. Raises ValueError for a token format
+    without tokens or with a repeated one.
+    """
+    if not fmt:
+        return _parse_iso_date
+    if '%' in fmt:
+        return _strptime_parser(fmt)
+    return _token_parser(fmt)
+
+
+@lru_cache(maxsize=None)
+def compile_date_format(fmt: Optional[str]) -> Callable[[str], bool]:
+    """Like compile_date_parser, but the function only tells whether a string is a valid date."""
+    parse = compile_date_parser(fmt)
+
+    def is_date(v: str) -> bool:
+        return parse(v) is not None
+    return is_date
@@ -0,0 +1,185 @@
+import json
+from typing import Any, Dict, List, Optional
+
+try:
+    from .sketches import ColumnSketch, load_snapshot
+except ImportError:  # executed as a script
+    from sketches import ColumnSketch, load_snapshot
+
+# A column drifts when its value distributions are further apart than this
+# (Kolmogorov-Smirnov distance)...
+DEFAULT_MAX_DISTANCE = 0.1
+# ...its share of nulls moves by more than this...
+DEFAULT_MAX_NULL_CHANGE = 0.05
+# ...or its distinct count changes by more than this fraction, beyond what
+# the change in rows explains
+DEFAULT_MAX_DISTINCT_CHANGE = 0.25
+
+
+def _relative_change(old: float, new: float) -> float:
+    if old == new:
+        return 0.0
+    return abs(new - old) / max(abs(old), 1.0)
+
+
+def compare_columns(
+    old: ColumnSketch,
+    new: ColumnSketch,
+    max_distance: float = DEFAULT_MAX_DISTANCE,
+    max_null_change: float = DEFAULT_MAX_NULL_CHANGE,
+    max_distinct_change: Optional[float] = DEFAULT_MAX_DISTINCT_CHANGE
+) -> Dict[str, Any]:
+    """
+    Compares two sketches of a column. Returns [old, new] pairs of its rows,
+    null rate, distinct count, min, max and median, the distance between the
+    value distributions (None unless both are numeric), and under 'drift'
+    the thresholds crossed. max_distinct_change=None skips distinct counts,
+    for sketches hashed differently. The distinct count drifts only if both
+    it and its ratio to non-null values changed by more than
+    max_distinct_change, so a larger release of an ID column does not.
+    """
+    null_rates = [sketch.nulls / sketch.count if sketch.count else 0.0 for sketch in (old, new)]
+    distinct = [sketch.distinct.estimate() for sketch in (old, new)]
+    medians: List[Optional[float]] = [None, None]
+    distance = None
+    if old.quantiles is not None and new.quantiles is not None:
+        medians = [old.quantiles.quantile(0.5), new.quantiles.quantile(0.5)]
+        distance = old.quantiles.distance(new.quantiles)
+    drift = []
+    if abs(null_rates[1] - null_rates[0]) > max_null_change:
+        drift.append('null_rate')
+    if max_distinct_change is not None:
+        ratios = [d / max(sketch.count - sketch.nulls, 1) for d, sketch in zip(distinct, (old, new))]
+        if (_relative_change(*distinct) > max_distinct_change
+                and abs(ratios[1] - ratios[0]) / max(ratios[0], 1e-12) > max_distinct_change):
+            drift.append('distinct')
+    if distance is not None and distance > max_distance:
+        drift.append('distribution')
+    return {
+        'rows': [old.count, new.count],
+        'null_rate': null_rates,
+        'distinct': [round(d) for d in distinct] if max_distinct_change is not None else None,
+        'min': [old.minimum, new.minimum],
+        'max': [old.maximum, new.maximum],
+        'median': medians,
+        'distance': distance,
+        'drift': drift,
+    }
+
+
+def compare_snapshots(
+    old: Dict[str, Any],
+    new: Dict[str, Any],
+    max_distance: float = DEFAULT_MAX_DISTANCE,
+    max_null_change: float = DEFAULT_MAX_NULL_CHANGE,
+    max_distinct_change: float = DEFAULT_MAX_DISTINCT_CHANGE
+) -> Dict[str, Any]:
+    """
+    Compares two snapshots (sketches.load_snapshot) file by file and column
+    by column, reading no data. Returns per file present in either snapshot
+    its 'status' ('added', 'removed' or 'compared'), and for compared files
+    the columns only in one snapshot and compare_columns of the others.
+    Distinct counts are compared only if both snapshots hashed values the
+    same way.
+    """
+    same_hashing = old.get('hashing') == new.get('hashing')
+    files: Dict[str, Any] = {}
+    for fname in list(old['files']) + [fname for fname in new['files'] if fname not in old['files']]:
+        if fname not in new['files']:
+            files[fname] = {'status': 'removed'}
+            continue
+        if fname not in old['files']:
+            files[fname] = {'status': 'added'}
+            continue
+        old_columns = old['files'][fname]['columns']
+        new_columns = new['files'][fname]['columns']
+        files[fname] = {
+            'status': 'compared',
+            'added_columns': [col for col in new_columns if col not in old_columns],
+            'removed_columns': [col for col in old_columns if col not in new_columns],
+            'columns': {
+                col: compare_columns(
+                    ColumnSketch.from_dict(old_columns[col]), ColumnSketch.from_dict(new_columns[col]),
+                    max_distance, max_null_change, max_distinct_change if same_hashing else None
+                )
+                for col in old_columns if col in new_columns
+            },
+        }
+    return {'same_hashing': same_hashing, 'files': files}
+
+
+def has_drift(comparison: Dict[str, Any]) -> bool:
+    """Whether any file or column was added, removed or drifted."""
+    for result in comparison['files'].values():
+        if result['status'] != 'compared' or result['added_columns'] or result['removed_columns']:
+            return True
+        if any(column['drift'] for column in result['columns'].values()):
+            return True
+    return False
+
+
+def _percent(rate: float) -> str:
+    return f'{rate:.1%}'
+
+
+def drift_messages(result: Dict[str, Any]) -> List[str]:
+    """A file's result from compare_snapshots as report messages; empty if nothing drifted."""
+    if result['status'] == 'added':
+        return ['Only in the new snapshot']
+    if result['status'] == 'removed':
+        return ['Only in the old snapshot']
+    messages = [f'Column {col}: only in the new snapshot' for col in result['added_columns']]
+    messages += [f'Column {col}: only in the old snapshot' for col in result['removed_columns']]
+    for col, column in result['columns'].items():
+        for reason in column['drift']:
+            if reason == 'null_rate':
+                old, new = column['null_rate']
+                messages.append(f'Column {col}: null rate {_percent(old)} -> {_percent(new)}')
+            elif reason == 'distinct':
+                old, new = column['distinct']
+                messages.append(f'Column {col}: ~{old} -> ~{new} distinct values')
+            else:
+                old, new = column['median']
+                messages.append(
+                    f"Column {col}: distribution shifted (KS distance {column['distance']:.2f}, median "
+                    f"{old:.4g} -> {new:.4g})"
+                )
+    return messages
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs `fairy --drift OLD NEW`: compares two sketch snapshots; returns 1 if anything drifted."""
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drift', nargs=2, required=True, metavar=('OLD', 'NEW'), help='Sketch snapshots written by --quality-check --sketch-out')
+    parser.add_argument('--max-distance', type=float, default=DEFAULT_MAX_DISTANCE, help='Largest Kolmogorov-Smirnov distance between value distributions that is not drift')
+    parser.add_argument('--max-null-change', type=float, default=DEFAULT_MAX_NULL_CHANGE, help='Largest change in the share of nulls that is not drift')
+    parser.add_argument('--max-distinct-change', type=float, default=DEFAULT_MAX_DISTINCT_CHANGE, help='Largest relative change in distinct values that is not drift')
+    parser.add_argument('--json-out', default=None, metavar='PATH', help='Also write the full comparison as JSON')
+    args, _ = parser.parse_known_args(argv)
+    old_path, new_path = args.drift
+    try:
+        old, new = load_snapshot(old_path), load_snapshot(new_path)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    comparison = compare_snapshots(old, new, args.max_distance, args.max_null_change, args.max_distinct_change)
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(comparison, f, indent=2)
+    if not comparison['same_hashing']:
+        print('Note: the snapshots hashed values differently, so distinct counts were not compared.')
+    for fname, result in comparison['files'].items():
+        print(f'File: {fname}')
+        messages = drift_messages(result)
+        for message in messages:
+            print('  ' + message)
+        if not messages:
+            print('  No drift.')
+    drifted = has_drift(comparison)
+    print('\nSome files drifted. See above.' if drifted else '\nNo drift between the snapshots.')
+    return 1 if drifted else 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -1,33 +1,153 @@
 import json
 import os
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    from .columnar import is_columnar, read_columnar_schema
+    from .compressed_io import is_csv_name, open_text
+    from .json_records import discover_fields, is_json_name
+    from .result_cache import RACY_WINDOW_SECONDS
+except ImportError:  # executed as a script
+    from columnar import is_columnar, read_columnar_schema
+    from compressed_io import is_csv_name, open_text
+    from json_records import discover_fields, is_json_name
+    from result_cache import RACY_WINDOW_SECONDS
 
 def load_config(config_path):
     with open(config_path, 'r') as f:
         return json.load(f)
 
-def main():
-    config = load_config(os.environ.get('FAIRY_CONFIG', '.project_config.json'))
+def load_csv_dictionary(dict_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads a data dictionary written as CSV (one row per variable) back into
+    entries, so curator edits survive regeneration. The CSV has no paths
+    or fingerprints, so its files are always read again.
+    """
+    import csv
+    dictionary: Dict[str, Dict[str, Any]] = {}
+    with open(dict_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            fname = row.pop('Filename', None)
+            if fname:
+                col = {key: value or '' for key, value in row.items() if key is not None}
+                dictionary.setdefault(fname, {'columns': []})['columns'].append(col)
+    return dictionary
+
+def is_unchanged(entry: Dict[str, Any], file_path: str, st: os.stat_result, profile: bool = False) -> bool:
+    """
+    True if the dictionary entry was generated from this very file: same path,
+    size and mtime as recorded in its fingerprint. A profiling run also needs
+    the entry to have been profiled before.
+    """
+    fingerprint = entry.get('fingerprint')
+    if not isinstance(fingerprint, dict) or entry.get('path') != file_path:
+        return False
+    if profile and not fingerprint.get('profiled'):
+        return False
+    return fingerprint.get('size') == st.st_size and fingerprint.get('mtime_ns') == st.st_mtime_ns
+
+def file_fingerprint(st: os.stat_result, profiled: bool = False) -> Dict[str, Any]:
+    fingerprint: Dict[str, Any] = {'size': st.st_size}
+    # A file written within the racy window may change again within the same
+    # mtime tick, e.g. a same-size header edit; leaving out its mtime makes
+    # the next run read it again
+    if time.time() - st.st_mtime_ns / 1e9 >= RACY_WINDOW_SECONDS:
+        fingerprint['mtime_ns'] = st.st_mtime_ns
+    if profiled:
+        fingerprint['profiled'] = True
+    return fingerprint
+
+def write_if_changed(path: str, text: str) -> bool:
+    """
+    Atomically replaces path with text unless it already holds exactly that
+    text, so unchanged dictionaries keep their mtime. Returns True if written.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            if f.read() == text:
+                return False
+    except (OSError, ValueError):
+        pass
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return True
+
+def main(config_path=None, dict_path=None, profile=False, sample_rows=None):
+    """
+    Creates or updates the data dictionary with one entry per data file.
+    CSV files contribute their header, Parquet and Arrow/Feather files the
+    schema in their footer, and JSON array / JSON Lines files the dotted
+    paths of all fields of their records. With profile=True each file is
+    streamed once (at most sample_rows data rows) to infer Data Type, Allowed
+    Values / Range, Missing Value Representation and Example Value; fields
+    that are already filled in are never overwritten.
+
+    A JSON dictionary records a fingerprint of each file (size and mtime).
+    Files whose size and mtime are unchanged are not opened again, entries
+    whose file no longer exists are removed, and the dictionary is only
+    rewritten if its content changed. A CSV dictionary is read back to keep
+    curator edits, but has no fingerprints, so every file is read again and
+    rows of files no longer in data_dir are dropped.
+    """
+    if profile:
+        try:
+            from .column_profiler import apply_profile, profile_file
+        except ImportError:  # executed as a script
+            from column_profiler import apply_profile, profile_file
+    config = load_config(config_path or os.environ.get('FAIRY_CONFIG', '.project_config.json'))
     data_dir: str = config['data_directory_name']
     dictionary: dict[str, dict[str, object]] = {}
     # Load existing data dictionary if it exists
-    dict_path = os.environ.get('FAIRY_DD_OUT', 'docs/data_dictionaries/data_dictionary.json')
+    dict_path = dict_path or os.environ.get('FAIRY_DD_OUT', 'docs/data_dictionaries/data_dictionary.json')
     if os.path.exists(dict_path) and dict_path.endswith('.json'):
         with open(dict_path, 'r', encoding='utf-8') as f:
             dictionary = json.load(f)
+    elif os.path.exists(dict_path) and dict_path.endswith('.csv'):
+        dictionary = load_csv_dictionary(dict_path)
+    seen = set()
+    n_read = n_unchanged = 0
     for root, _, files in os.walk(data_dir):
         for fname in files:
             file_path: str = os.path.join(root, fname)
+            seen.add(fname)
+            try:
+                st = os.stat(file_path)
+            except OSError as e:
+                print(f"Warning: Could not read {fname}: {e}")
+                continue
+            if fname in dictionary and is_unchanged(dictionary[fname], file_path, st, profile):
+                n_unchanged += 1
+                continue
+            n_read += 1
             columns: list[str] = []
-            if fname.lower().endswith('.csv'):
+            profiles = {}
+            if is_csv_name(fname) or is_columnar(fname) or is_json_name(fname):
                 try:
-                    import csv
-                    with open(file_path, newline='', encoding='utf-8') as csvfile:
-                        reader = csv.DictReader(csvfile)
-                        columns = list(reader.fieldnames) if reader.fieldnames else []
+                    if is_columnar(fname):
+                        # Parquet and Arrow files only need their footer for the schema
+                        columns = read_columnar_schema(file_path)
+                    elif is_json_name(fname):
+                        # Any record may add fields; a full profile sees them all in the same pass
+                        if profile and sample_rows is None:
+                            profiles = profile_file(file_path)
+                            columns = list(profiles)
+                        else:
+                            columns = discover_fields(file_path)
+                    else:
+                        import csv
+                        with open_text(file_path) as csvfile:
+                            reader = csv.DictReader(csvfile)
+                            columns = list(reader.fieldnames) if reader.fieldnames else []
+                    if profile and not profiles:
+                        profiles = profile_file(file_path, sample_rows)
                 except Exception as e:
                     print(f"Warning: Could not read columns from {fname}: {e}")
             if fname not in dictionary:
                 dictionary[fname] = {"path": file_path, "columns": []}
+            dictionary[fname]["path"] = file_path
             # Ensure columns is a list
             col_list = dictionary[fname]["columns"]
             if not isinstance(col_list, list):
@@ -54,14 +174,27 @@ def main():
                         "Notes / Comments": "",
                         "Example Value": ""
                     })
+            for col in new_col_list:
+                if col.get('Variable Name') in profiles:
+                    apply_profile(col, profiles[col['Variable Name']])
             dictionary[fname]["columns"] = new_col_list
             if not columns:
                 # Fallback for non-CSV or unreadable files
                 dictionary[fname]["columns"] = []
+            if not dict_path.endswith('.csv'):
+                dictionary[fname]["fingerprint"] = file_fingerprint(st, profiled=bool(profiles))
+    # Entries for files that were deleted are dropped; entries that point
+    # outside data_dir, or have no path, are left to the curator
+    removed = [fname for fname, meta in dictionary.items()
+               if fname not in seen and isinstance(meta, dict)
+               and (meta.get('path') and not os.path.exists(meta['path']) or dict_path.endswith('.csv'))]
+    for fname in removed:
+        del dictionary[fname]
     # Auto-detect output format
     if dict_path.endswith('.csv'):
         # Write as CSV (one row per variable)
         import csv
+        import io
         rows = []
         for fname, meta in dictionary.items():
             for col in meta["columns"]:
@@ -71,21 +204,31 @@ def main():
             fieldnames = list(rows[0].keys())
         else:
             fieldnames = ["Filename", "Variable Name", "Description", "Data Type", "Units", "Allowed Values / Range", "Missing Value Representation", "Source", "Constraints / Validation Rules", "Notes / Comments", "Example Value"]
-        with open(dict_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in rows:
-                writer.writerow(row)
-        print(f'Data dictionary generated at {dict_path} (CSV)')
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+        changed = write_if_changed(dict_path, out.getvalue())
+        fmt = 'CSV'
+    else:
+        changed = write_if_changed(dict_path, json.dumps(dictionary, indent=2))
+        fmt = 'JSON'
+    summary = f'{n_read} read, {n_unchanged} unchanged, {len(removed)} removed'
+    if changed:
+        print(f'Data dictionary generated at {dict_path} ({fmt}): {summary}')
     else:
-        with open(dict_path, 'w', encoding='utf-8') as f:
-            json.dump(dictionary, f, indent=2)
-        print(f'Data dictionary generated at {dict_path} (JSON)')
+        print(f'Data dictionary at {dict_path} is up to date ({fmt}): {summary}')
 
 # quality_check_tabular_data has been moved to src/checks/quality_check.py
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--profile', action='store_true', help='Infer types, ranges, null tokens and examples from the data')
+    parser.add_argument('--sample-rows', type=int, default=None, help='Profile at most this many rows per file')
+    args, _ = parser.parse_known_args()
+    main(profile=args.profile, sample_rows=args.sample_rows)
     # Example usage:
     # report = quality_check_tabular_data('data', 'docs/data_dictionaries/data_dictionary.json')
     # print(json.dumps(report, indent=2))
@@ -0,0 +1,167 @@
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Optional
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process so far, in MiB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _per_second(count: int, seconds: float) -> Optional[float]:
+    return count / seconds if seconds > 0 else None
+
+
+class ColumnStats:
+    """
+    Time spent on one column and its values, split by rule. The python engine
+    times a column's unique check on its own and all its other rules under
+    its type; the vectorized engine times each rule separately.
+    """
+
+    def __init__(self, type_rule: str):
+        self.type_rule = type_rule
+        self.seconds = 0.0
+        self.values = 0
+        self.rules: Dict[str, float] = {}
+
+    def add_rule(self, rule: str, seconds: float) -> None:
+        self.rules[rule] = self.rules.get(rule, 0.0) + seconds
+        self.seconds += seconds
+
+    def merge(self, other: 'ColumnStats') -> None:
+        self.values += other.values
+        for rule, seconds in other.rules.items():
+            self.add_rule(rule, seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'seconds': self.seconds,
+            'values': self.values,
+            'values_per_sec': _per_second(self.values, self.seconds),
+            'rules': dict(sorted(self.rules.items(), key=lambda item: -item[1])),
+        }
+
+
+class RuleTimer:
+    """
+    Charges the time since its previous call to a rule of a ColumnStats;
+    a no-op without stats, so batch code can call it unconditionally.
+    """
+
+    def __init__(self, stats: Optional[ColumnStats]):
+        self.stats = stats
+        self.last = time.perf_counter() if stats is not None else 0.0
+
+    def __call__(self, rule: str) -> None:
+        if self.stats is None:
+            return
+        now = time.perf_counter()
+        self.stats.add_rule(rule, now - self.last)
+        self.last = now
+
+
+class FileStats:
+    """
+    Instrumentation of one checked file: wall time, rows, bytes read and
+    peak memory, with time split into phases (reading and parsing, column
+    rules, unique keys, uniqueness confirmation), columns and rules.
+    """
+
+    def __init__(self, fname: str = '', path: str = '', engine: str = 'python'):
+        self.fname = fname
+        self.path = path
+        self.engine = engine
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes_read = 0
+        self.cached = False
+        self.error: Optional[str] = None
+        self.chunks = 1
+        self.phases: Dict[str, float] = {}
+        self.columns: Dict[str, ColumnStats] = {}
+        self.unique_keys: Dict[str, float] = {}
+        self.peak_rss_mb: Optional[float] = None
+
+    def rules(self) -> Dict[str, float]:
+        """Seconds per rule, summed over the file's columns."""
+        totals: Dict[str, float] = {}
+        for column in self.columns.values():
+            for rule, seconds in column.rules.items():
+                totals[rule] = totals.get(rule, 0.0) + seconds
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'engine': self.engine,
+            'cached': self.cached,
+            'error': self.error,
+            'seconds': self.seconds,
+            'rows': self.rows,
+            'bytes_read': self.bytes_read,
+            'rows_per_sec': _per_second(self.rows, self.seconds),
+            'peak_rss_mb': self.peak_rss_mb,
+            'chunks': self.chunks,
+            'phases': self.phases,
+            'rules': self.rules(),
+            'columns': {name: column.to_dict() for name, column in self.columns.items()},
+            'unique_keys': self.unique_keys,
+        }
+
+
+class CheckHooks:
+    """
+    Callbacks of quality_check_tabular_data; subclass and override what you
+    need. Passing hooks turns on instrumentation, which costs a few timer
+    calls per value in the python engine and per batch in the vectorized one.
+    """
+
+    def file_checked(self, fname: str, stats: Dict[str, Any]) -> None:
+        """Called once per file, as soon as its result is known, with FileStats.to_dict()."""
+
+    def run_finished(self, stats: Dict[str, Any]) -> None:
+        """Called at the end of the run with the totals and every file's stats."""
+
+
+class ProfileWriter(CheckHooks):
+    """Writes the run's stats as JSON to path (the --profile-out option)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def run_finished(self, stats: Dict[str, Any]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def summarize_run(files: Dict[str, Dict[str, Any]], engine: str, jobs: int, seconds: float) -> Dict[str, Any]:
+    """Run totals over the per-file stats, plus seconds per rule over all files."""
+    rows = sum(stats['rows'] for stats in files.values())
+    rules: Dict[str, float] = {}
+    for stats in files.values():
+        for rule, rule_seconds in stats['rules'].items():
+            rules[rule] = rules.get(rule, 0.0) + rule_seconds
+    return {
+        'engine': engine,
+        'jobs': jobs,
+        'seconds': seconds,
+        'rows': rows,
+        'bytes_read': sum(stats['bytes_read'] for stats in files.values()),
+        'rows_per_sec': _per_second(rows, seconds),
+        'peak_rss_mb': peak_rss_mb(),
+        'rules': dict(sorted(rules.items(), key=lambda item: -item[1])),
+        'files': files,
+    }
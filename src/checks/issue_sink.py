@@ -0,0 +1,55 @@
+import json
+import sys
+from typing import Any, Dict
+
+
+class ErrorLimitReached(Exception):
+    """Raised while validating a file once its ErrorBudget is spent."""
+
+
+class ErrorBudget:
+    """
+    How many violations a file may record (max_errors). Rules spend from it
+    before they record violations, and a spend beyond the limit raises
+    ErrorLimitReached, so loops over rows need no check of their own. A file
+    with exactly max_errors violations is thus still read to its end, and
+    exceeded tells whether reading stopped early.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.spent = 0
+        self.exceeded = False
+
+    @property
+    def remaining(self) -> int:
+        return max(self.limit - self.spent, 0)
+
+    def spend(self, n: int) -> None:
+        if n > self.remaining:
+            self.spent = max(self.spent, self.limit)
+            self.exceeded = True
+            raise ErrorLimitReached()
+        self.spent += n
+
+
+class NdjsonIssueWriter:
+    """
+    Issue sink for CheckOptions(on_issue=...) that writes each
+    issue as one line of JSON as soon as it arrives, and a final summary line
+    on close. path '-' writes to standard output.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8')
+
+    def __call__(self, issue: Dict[str, Any]) -> None:
+        self.file.write(json.dumps(issue) + '\n')
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        self.file.write(json.dumps(dict(summary, kind='summary')) + '\n')
+        if self.file is sys.stdout:
+            self.file.flush()
+        else:
+            self.file.close()
@@ -0,0 +1,177 @@
+import json
+from typing import Any, Dict, Iterator, List, Tuple
+
+try:
+    from .compressed_io import open_text, split_compression_suffix
+except ImportError:  # executed as a script
+    from compressed_io import open_text, split_compression_suffix
+
+JSON_EXTENSIONS = ('.json', '.jsonl', '.ndjson')
+# Characters of JSON text decoded at a time
+JSON_BLOCK_CHARS = 256 * 1024
+_WHITESPACE = ' \t\n\r'
+
+
+def is_json_name(fname: str) -> bool:
+    """True for '.json', '.jsonl' and '.ndjson' file names, compressed or not."""
+    return split_compression_suffix(fname)[0].lower().endswith(JSON_EXTENSIONS)
+
+
+def iter_json_values(file_path: str, block_chars: int = JSON_BLOCK_CHARS) -> Iterator[Any]:
+    """
+    Yields the records of a JSON file one at a time: the elements of a
+    top-level array, or each value of JSON Lines / concatenated JSON. Text is
+    decoded block by block with JSONDecoder.raw_decode, so memory holds one
+    block and one record, however large the file. Malformed JSON raises
+    JSONDecodeError with its position in the file.
+    """
+    decoder = json.JSONDecoder()
+    with open_text(file_path) as f:
+        buf = ''
+        pos = 0
+        eof = False
+        in_array = None
+        # Position in the file of buf[0]: char offset, line (from 1), column (from 0)
+        where = [0, 1, 0]
+        while True:
+            # Skip whitespace, and commas between array elements
+            while True:
+                while pos < len(buf) and buf[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    break
+                _advance(where, buf)
+                buf, pos = f.read(block_chars), 0
+                eof = not buf
+            if pos >= len(buf):
+                if in_array:
+                    raise ValueError('Unterminated top-level JSON array')
+                return
+            if in_array is None:
+                in_array = buf[pos] == '['
+                if in_array:
+                    pos += 1
+                    continue
+            if in_array:
+                if buf[pos] == ']':
+                    return
+                if buf[pos] == ',':
+                    pos += 1
+                    continue
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                if eof or not _is_truncated(e, buf):
+                    raise _in_file(e, where) from None
+                end = None
+            # A value that runs to the end of the block may continue in the next one
+            if end is None or (end == len(buf) and not eof):
+                more = f.read(block_chars)
+                eof = not more
+                _advance(where, buf[:pos])
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            yield value
+            pos = end
+
+
+def _is_truncated(error: json.JSONDecodeError, buf: str) -> bool:
+    """True if decoding buf failed only because it ends inside a value."""
+    if error.msg.startswith('Unterminated string'):
+        return True
+    # A cut-off number, literal or escape fails within its last few characters
+    return len(buf) - error.pos < len('-Infinity')
+
+
+def _advance(where: List[int], text: str) -> None:
+    """Moves the file position where past text."""
+    where[0] += len(text)
+    newlines = text.count('\n')
+    if newlines:
+        where[1] += newlines
+        where[2] = len(text) - text.rfind('\n') - 1
+    else:
+        where[2] += len(text)
+
+
+def _in_file(error: json.JSONDecodeError, where: List[int]) -> json.JSONDecodeError:
+    """The error of a block, with its position counted from the start of the file."""
+    char = where[0] + error.pos
+    lineno = where[1] + error.lineno - 1
+    colno = error.colno + (where[2] if error.lineno == 1 else 0)
+    moved = json.JSONDecodeError(error.msg, error.doc, error.pos)
+    moved.pos, moved.lineno, moved.colno = char, lineno, colno
+    moved.args = (f'{error.msg}: line {lineno} column {colno} (char {char})',)
+    return moved
+
+
+def value_text(value: Any) -> str:
+    """
+    Renders a JSON value as the text a CSV cell would hold: strings as they
+    are, numbers as Python writes them (1, 2.5, 1e+20), true/false in lower
+    case, null as '', and arrays as compact JSON.
+    """
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return ''
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    value_type = type(value)
+    if value_type is int or value_type is float:
+        return repr(value)
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def flatten_record(record: Any, record_index: int = 0) -> Dict[str, str]:
+    """
+    Flattens a JSON object into {dotted.field.path: text}; nested objects
+    become dotted paths, and arrays stay whole values. Records must be objects.
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f'JSON record {record_index} is not an object')
+    flat: Dict[str, str] = {}
+    _flatten_into(flat, '', record)
+    return flat
+
+
+def _flatten_into(flat: Dict[str, str], prefix: str, obj: Dict[str, Any]) -> None:
+    for key, value in obj.items():
+        # Exact type checks: strings, the common case, skip value_text
+        value_type = type(value)
+        if value_type is str:
+            flat[prefix + key] = value
+        elif value_type is dict and value:
+            _flatten_into(flat, prefix + key + '.', value)
+        else:
+            flat[prefix + key] = value_text(value)
+
+
+def iter_json_records(file_path: str) -> Iterator[Dict[str, str]]:
+    """Yields the flattened records of a JSON file."""
+    for record_index, value in enumerate(iter_json_values(file_path)):
+        yield flatten_record(value, record_index)
+
+
+def row_key(flat: Dict[str, str]) -> Tuple[str, ...]:
+    """
+    Whole-record key for "*" unique keys: field paths and values, sorted by
+    path, so records with the same fields in another order are equal.
+    """
+    key: List[str] = []
+    for path in sorted(flat):
+        key += (path, flat[path])
+    return tuple(key)
+
+
+def discover_fields(file_path: str) -> List[str]:
+    """Flattened field paths of all records, in order of first appearance."""
+    fields: Dict[str, None] = {}
+    for flat in iter_json_records(file_path):
+        for path in flat:
+            if path not in fields:
+                fields[path] = None
+    return list(fields)
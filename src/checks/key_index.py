@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from .result_cache import RACY_WINDOW_SECONDS, file_fingerprint
+    from .uniqueness import DEFAULT_MEMORY_BUDGET, HashRunStore, hash_key_columns
+except ImportError:  # executed as a script
+    from result_cache import RACY_WINDOW_SECONDS, file_fingerprint
+    from uniqueness import DEFAULT_MEMORY_BUDGET, HashRunStore, hash_key_columns
+
+# Bump when the index layout changes in a way that makes old indexes stale
+INDEX_VERSION = 1
+INDEX_DIR_NAME = 'key_index'
+_WRITE_BLOCK = 1 << 16
+
+
+def hashing_scheme() -> str:
+    """
+    Names the key hashing hash_key_columns uses here: pandas' (versioned) or
+    blake2b. An index built with another scheme is rebuilt, not misread.
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        return 'blake2b'
+    return f'pandas-{pd.__version__}'
+
+
+def drop_missing(
+    key_columns: List[Sequence[Optional[str]]],
+    null_values: List[FrozenSet[str]]
+) -> Tuple[Sequence[int], List[Sequence[Optional[str]]]]:
+    """
+    Drops the keys with a missing part: None (a short row or absent field) or
+    a null token of that part's column. Returns the positions of the keys
+    kept and their key columns.
+    """
+    try:
+        import numpy as np
+        import pandas as pd
+    except ImportError:
+        rows = [i for i, key in enumerate(zip(*key_columns))
+                if not any(v is None or v in nulls for v, nulls in zip(key, null_values))]
+        return rows, [[col[i] for i in rows] for col in key_columns]
+    arrays = [np.asarray(col, dtype=object) for col in key_columns]
+    missing = np.zeros(len(arrays[0]) if arrays else 0, dtype=bool)
+    for values, nulls in zip(arrays, null_values):
+        series = pd.Series(values, dtype=object)
+        missing |= (series.isna() | series.isin(list(nulls))).to_numpy()
+    if not missing.any():
+        return np.arange(len(missing)), arrays
+    rows = np.flatnonzero(~missing)
+    return rows, [values[rows] for values in arrays]
+
+
+def _write_distinct(store: HashRunStore, path: str) -> int:
+    """Writes the distinct hashes of store to path in ascending order; returns how many there are."""
+    with open(path, 'wb') as f:
+        if not store.runs:
+            try:
+                import numpy as np
+            except ImportError:
+                hashes: Any = array('Q', sorted(set(store.buffer)))
+            else:
+                hashes = np.unique(np.frombuffer(store.buffer, dtype=np.uint64))
+            hashes.tofile(f)
+            return len(hashes)
+        count = 0
+        block = array('Q')
+        previous = None
+        for key_hash in store.iter_sorted():
+            if key_hash == previous:
+                continue
+            previous = key_hash
+            block.append(key_hash)
+            if len(block) >= _WRITE_BLOCK:
+                block.tofile(f)
+                count += len(block)
+                block = array('Q')
+        block.tofile(f)
+        return count + len(block)
+
+
+class KeyIndex:
+    """
+    The distinct 64-bit hashes of one file's keys, sorted in a file on disk.
+    Lookups memory-map it and binary-search a batch of hashes at a time, so
+    an index larger than memory costs only the pages they touch. Pickles as
+    plain data (path, count, fingerprint) for worker processes.
+    fingerprint is the indexed file's, or None if the file was modified too
+    recently for the index to be trusted beyond this run.
+    """
+
+    def __init__(self, path: str, count: int, fingerprint: Optional[Dict[str, Any]]):
+        self.path = path
+        self.count = count
+        self.fingerprint = fingerprint
+        self._hashes: Any = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state['_hashes'] = None
+        return state
+
+    def _load(self) -> Any:
+        if self._hashes is None:
+            try:
+                import numpy as np
+            except ImportError:
+                hashes = array('Q')
+                with open(self.path, 'rb') as f:
+                    hashes.fromfile(f, self.count)
+                self._hashes = hashes
+            else:
+                # np.memmap cannot map an empty file
+                self._hashes = (np.memmap(self.path, dtype=np.uint64, mode='r', shape=(self.count,))
+                                if self.count else np.zeros(0, dtype=np.uint64))
+        return self._hashes
+
+    def contains(self, key_hashes: Any) -> Any:
+        """Whether each hash is in the index: a bool array for a NumPy array of hashes, else a list."""
+        hashes = self._load()
+        if hasattr(key_hashes, 'dtype'):
+            import numpy as np
+            if not self.count:
+                return np.zeros(len(key_hashes), dtype=bool)
+            positions = np.minimum(np.searchsorted(hashes, key_hashes), self.count - 1)
+            return hashes[positions] == key_hashes
+        found = []
+        for key_hash in key_hashes:
+            i = bisect_left(hashes, key_hash)
+            found.append(i < self.count and int(hashes[i]) == key_hash)
+        return found
+
+
+class KeyIndexStore:
+    """
+    Key indexes of referenced files under index_dir, one per file and key
+    columns. An index is reused for as long as its file's fingerprint and
+    the hashing scheme are unchanged, and rebuilt otherwise. Building
+    spills sorted hash runs beyond memory_budget bytes, like uniqueness
+    checks, and merges them into the index file.
+    """
+
+    def __init__(
+        self,
+        index_dir: str,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        spill_dir: Optional[str] = None,
+        content_hash: bool = False
+    ):
+        self.index_dir = index_dir
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.content_hash = content_hash
+        self.built = 0
+        self.reused = 0
+
+    def _paths(self, file_path: str, columns: List[str]) -> Tuple[str, str]:
+        payload = json.dumps([os.path.abspath(file_path), columns], ensure_ascii=False)
+        base = os.path.join(self.index_dir, hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32])
+        return base + '.idx', base + '.json'
+
+    def get(
+        self,
+        file_path: str,
+        columns: List[str],
+        read_keys: Callable[[], Iterable[List[Sequence[Optional[str]]]]]
+    ) -> KeyIndex:
+        """
+        Returns the index of file_path's key columns. If there is no current
+        one, it is built from the batches of key columns read_keys yields,
+        which should leave out keys with missing parts (see drop_missing).
+        """
+        index_path, meta_path = self._paths(file_path, columns)
+        fingerprint = file_fingerprint(file_path, self.content_hash)
+        meta: Dict[str, Any] = {
+            'version': INDEX_VERSION,
+            'scheme': hashing_scheme(),
+            'path': os.path.abspath(file_path),
+            'columns': columns,
+            'fingerprint': fingerprint,
+        }
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = None
+        if (isinstance(stored, dict) and all(stored.get(key) == value for key, value in meta.items())
+                and os.path.exists(index_path)):
+            self.reused += 1
+            return KeyIndex(index_path, stored['count'], fingerprint)
+        os.makedirs(self.index_dir, exist_ok=True)
+        # The old metadata goes first, so a failed build never looks current
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        store = HashRunStore(self.memory_budget, self.spill_dir)
+        try:
+            for key_columns in read_keys():
+                store.extend(hash_key_columns(key_columns))
+            count = _write_distinct(store, index_path + '.tmp')
+        finally:
+            store.close()
+        os.replace(index_path + '.tmp', index_path)
+        self.built += 1
+        if time.time() - fingerprint['mtime_ns'] / 1e9 < RACY_WINDOW_SECONDS:
+            # The file may still change within the same mtime tick
+            return KeyIndex(index_path, count, None)
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(dict(meta, count=count), f)
+        os.replace(meta_path + '.tmp', meta_path)
+        return KeyIndex(index_path, count, fingerprint)
@@ -1,131 +1,2431 @@
+import copy
 import json
 import os
 import csv
-from typing import Dict, List, Any, Set
+import io
+import itertools
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
-def quality_check_tabular_data(data_dir: str, data_dictionary_path: str) -> Dict[str, Any]:
+try:
+    from .columnar import is_columnar, iter_columnar_batches, projected_bytes, read_columnar_schema
+    from .compressed_io import detect_compression, open_text
+    from .constants import BOOLEAN_VALUES, VECTORIZED_BATCH_ROWS
+    from .constraints import (
+        ColumnSpec, ConstraintError, ConstraintSet, Interval, RowCheck, map_distinct, parse_constraints, parse_interval
+    )
+    from .date_formats import compile_date_format
+    from .instrumentation import (
+        CheckHooks, ColumnStats, FileStats, ProfileWriter, RuleTimer, peak_rss_mb, summarize_run
+    )
+    from .issue_sink import ErrorBudget, ErrorLimitReached, NdjsonIssueWriter
+    from .json_records import is_json_name, iter_json_records, row_key
+    from .key_index import INDEX_DIR_NAME, KeyIndex, KeyIndexStore, drop_missing
+    from .result_cache import ResultCache
+    from .sampling import (
+        DEFAULT_ROWS_PER_SEEK, SampleSpec, allocate_files, parse_sample, plan_csv_sample, sample_csv_records,
+        sample_messages, sample_summary
+    )
+    from .sketches import SKETCH_FILE_NAME, ColumnSketch, SnapshotBuilder
+    from .uniqueness import DEFAULT_MEMORY_BUDGET, KeyTracker, hash_key, hash_key_columns
+except ImportError:  # executed as a script
+    from columnar import is_columnar, iter_columnar_batches, projected_bytes, read_columnar_schema
+    from compressed_io import detect_compression, open_text
+    from constants import BOOLEAN_VALUES, VECTORIZED_BATCH_ROWS
+    from constraints import (
+        ColumnSpec, ConstraintError, ConstraintSet, Interval, RowCheck, map_distinct, parse_constraints, parse_interval
+    )
+    from date_formats import compile_date_format
+    from instrumentation import (
+        CheckHooks, ColumnStats, FileStats, ProfileWriter, RuleTimer, peak_rss_mb, summarize_run
+    )
+    from issue_sink import ErrorBudget, ErrorLimitReached, NdjsonIssueWriter
+    from json_records import is_json_name, iter_json_records, row_key
+    from key_index import INDEX_DIR_NAME, KeyIndex, KeyIndexStore, drop_missing
+    from result_cache import ResultCache
+    from sampling import (
+        DEFAULT_ROWS_PER_SEEK, SampleSpec, allocate_files, parse_sample, plan_csv_sample, sample_csv_records,
+        sample_messages, sample_summary
+    )
+    from sketches import SKETCH_FILE_NAME, ColumnSketch, SnapshotBuilder
+    from uniqueness import DEFAULT_MEMORY_BUDGET, KeyTracker, hash_key, hash_key_columns
+
+NUMERIC_TYPES = frozenset(['integer', 'float', 'decimal'])
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+ENGINES = ('python', 'vectorized')
+# With max_errors, vectorized batches start this small and double up to
+# the full batch size, so a dirty file stops after few rows
+FIRST_BATCH_ROWS = 1024
+# Offending values/rows kept per rule and column; None keeps all of them
+DEFAULT_MAX_SAMPLES: Optional[int] = 20
+# When profiling the python engine, one value (or key) in this many is timed
+PROFILE_SAMPLE_EVERY = 16
+# Verdicts of the python engine are memoized per column value, up to this
+# many distinct values at a time. Verdict bits:
+MEMO_MAX_ENTRIES = 4096
+TYPE_ERROR, OUT_OF_RANGE, NOT_ALLOWED = 1, 2, 4
+# ...then one bit per constraint, from this one up
+FIRST_CONSTRAINT_BIT = 8
+# A memo that fills up within fewer than this many rows per entry is
+# switched off for the rest of the file: its values rarely repeat
+MEMO_MIN_ROWS_PER_ENTRY = 4
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+class ColumnPlan:
     """
-    Checks tabular data files in data_dir against the data dictionary.
-    Returns a report dict with file-level and column-level issues.
+    Compiled rules for one data dictionary column.
+    Everything that depends only on the dictionary (type, null tokens, allowed
+    set, range bounds, constraints) is resolved once here instead of per value.
     """
-    report: Dict[str, Any] = {}
-    # Load data dictionary
-    with open(data_dictionary_path, 'r', encoding='utf-8') as f:
-        data_dict = json.load(f)
-    for fname, meta in data_dict.items():
-        file_path = meta.get('path', '')
-        columns_meta = meta.get('columns', [])
-        if not file_path or not columns_meta or not os.path.exists(file_path):
-            report[fname] = {'error': 'File missing or no columns defined in data dictionary.'}
+
+    def __init__(self, col_meta: Dict[str, Any]):
+        self.name: str = col_meta['Variable Name']
+        self.dtype: str = col_meta.get('Data Type', '').lower()
+        self.null_values = frozenset(['', col_meta.get('Missing Value Representation', '')])
+        self.numeric = self.dtype in NUMERIC_TYPES
+        self.range_bounds: Optional[Interval] = None
+        self.allowed_values: Optional[frozenset] = None
+        self.range_error: Optional[str] = None
+        allowed = col_meta.get('Allowed Values / Range', '')
+        if allowed:
+            # 'min-max' with signed bounds, or an interval such as '(0, 1]'
+            self.range_bounds = parse_interval(allowed) if self.numeric else None
+            if self.range_bounds is None:
+                allowed_vals = frozenset(a.strip() for a in allowed.split(',') if a.strip())
+                if self.numeric and not all(_is_number(a) for a in allowed_vals):
+                    # Such as '1-2-3': no numeric value could match it, so it is not applied
+                    self.range_error = f'{allowed!r} is neither a range nor a list of numbers'
+                elif allowed_vals:
+                    self.allowed_values = allowed_vals
+        constraints = col_meta.get('Constraints / Validation Rules', '')
+        self.constraint_error: Optional[str] = None
+        try:
+            parsed = parse_constraints(constraints, self.name)
+        except ConstraintError as e:
+            # Free text from before the rule language: only its keywords count
+            lowered = constraints.lower()
+            parsed = ConstraintSet('unique' in lowered, 'not null' in lowered or 'cannot be null' in lowered, [])
+            if not (parsed.unique or parsed.not_null):
+                self.constraint_error = str(e)
+        self.check_unique = parsed.unique
+        self.check_not_null = parsed.not_null
+        # Rules reading only this column are checked per value, the others per row
+        self.rules = parsed.rules
+        self.row_rules = [rule for rule in self.rules if rule.columns]
+        # Overrides the run's date format (CheckOptions.date_format)
+        self.date_format: Optional[str] = col_meta.get('Date Format') or None
+        # Whether a value's verdict takes more than a set lookup, so is worth memoizing
+        self.memoize = self.numeric or self.dtype in ('boolean', 'date') or len(self.row_rules) < len(self.rules)
+
+    def spec(self, date_format: Optional[str]) -> ColumnSpec:
+        """The column as constraint rules see it, given the run's date format."""
+        kind = 'number' if self.numeric else 'date' if self.dtype == 'date' else 'string'
+        return ColumnSpec(kind, self.date_format or date_format, self.null_values)
+
+
+class FilePlan:
+    """Compiled rules for one data dictionary entry."""
+
+    def __init__(self, fname: str, meta: Dict[str, Any]):
+        self.fname = fname
+        self.path: str = meta.get('path', '')
+        self.columns_meta: List[Dict[str, Any]] = meta.get('columns', [])
+        self.columns = [ColumnPlan(col_meta) for col_meta in self.columns_meta]
+        self.column_names = set(col.name for col in self.columns)
+        # Composite keys as lists of column names; "*" declares whole rows unique
+        self.unique_keys: List[Any] = meta.get('unique_keys', [])
+        self.foreign_keys = [ForeignKey(spec) for spec in meta.get('foreign_keys', [])]
+
+
+def _column_list(value: Any) -> List[str]:
+    return [value] if isinstance(value, str) else list(value or [])
+
+
+class ForeignKey:
+    """
+    A `foreign_keys` entry of a file: columns whose combined values must
+    appear in columns of another data dictionary entry, e.g.
+    {"columns": ["sample_id"], "references": {"file": "samples.csv", "columns": ["id"]}}.
+    Either side may be a single column name; the referenced columns default
+    to the same names, and "references" may be just the entry name.
+    """
+
+    def __init__(self, spec: Any):
+        spec = spec if isinstance(spec, dict) else {}
+        references = spec.get('references') or {}
+        if isinstance(references, str):
+            references = {'file': references}
+        self.columns = _column_list(spec.get('columns'))
+        self.ref_file: str = references.get('file', '')
+        self.ref_columns = _column_list(references.get('columns', self.columns))
+        self.label = f"({', '.join(self.columns)}) -> {self.ref_file} ({', '.join(self.ref_columns)})"
+        self.error: Optional[str] = None
+        if not self.columns or not self.ref_file:
+            self.error = 'it needs columns and a referenced file'
+        elif len(self.columns) != len(self.ref_columns):
+            self.error = 'it references a different number of columns'
+
+    @property
+    def reference(self) -> Tuple[str, Tuple[str, ...]]:
+        """The referenced entry and columns, which key CheckOptions.key_indexes."""
+        return self.ref_file, tuple(self.ref_columns)
+
+
+class ValidationPlan:
+    """
+    A data dictionary compiled into per-file, per-column validators.
+    Plans hold only plain data, so they can be cached, reused across files and
+    runs, and pickled to worker processes.
+    """
+
+    def __init__(self, data_dict: Dict[str, Any]):
+        self.files: Dict[str, FilePlan] = {
+            fname: FilePlan(fname, meta) for fname, meta in data_dict.items()
+        }
+
+
+_plan_cache: Dict[Tuple[str, int, int], ValidationPlan] = {}
+
+
+def compile_plan(data_dict: Dict[str, Any]) -> ValidationPlan:
+    """Compiles a loaded data dictionary into a ValidationPlan."""
+    return ValidationPlan(data_dict)
+
+
+def load_plan(data_dictionary_path: str) -> ValidationPlan:
+    """
+    Loads and compiles data_dictionary.json, reusing the compiled plan for as
+    long as the file's size and modification time are unchanged.
+    """
+    st = os.stat(data_dictionary_path)
+    key = (os.path.abspath(data_dictionary_path), st.st_mtime_ns, st.st_size)
+    plan = _plan_cache.get(key)
+    if plan is None:
+        with open(data_dictionary_path, 'r', encoding='utf-8') as f:
+            plan = compile_plan(json.load(f))
+        _plan_cache.clear()
+        _plan_cache[key] = plan
+    return plan
+
+
+class CheckOptions:
+    """
+    Settings of a check run, the one way to pass them to
+    quality_check_tabular_data, check_file and the other checks.
+    Plain data, so it can be pickled to worker processes; the hooks and
+    on_issue callbacks stay in the process that started the run.
+    """
+
+    def __init__(
+        self,
+        engine: str = 'python',
+        max_samples: Optional[int] = DEFAULT_MAX_SAMPLES,
+        unique_memory_bytes: int = DEFAULT_MEMORY_BUDGET,
+        spill_dir: Optional[str] = None,
+        profile: bool = False,
+        max_errors: Optional[int] = None,
+        date_format: Optional[str] = None,
+        key_indexes: Optional[Dict[Tuple[str, Tuple[str, ...]], Any]] = None,
+        sample: Optional[SampleSpec] = None,
+        sketches: bool = False,
+        sketch_path: Optional[str] = None,
+        hooks: Optional[CheckHooks] = None,
+        on_issue: Optional[Callable[[Dict[str, Any]], None]] = None,
+        keep_report: bool = True
+    ):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}; expected one of {ENGINES}")
+        # 'python' (the reference, one value at a time) or 'vectorized'
+        # (whole-column pandas operations, same report)
+        self.engine = engine
+        # Offending values and rows kept per rule and column; None keeps all
+        self.max_samples = max_samples
+        # Hashes of `unique` columns and unique_keys held in memory per key;
+        # the rest spills to temporary files in spill_dir
+        self.unique_memory_bytes = unique_memory_bytes
+        self.spill_dir = spill_dir
+        # Time columns, rules and keys for FileStats
+        self.profile = profile
+        # Stop reading a file, and the run, once it has this many violations
+        # (report_error_count); parallel workers each stop at it, so a
+        # parallel run may find more in total
+        self.max_errors = max_errors
+        # Format of 'date' columns without their own (see date_formats.py);
+        # None accepts ISO 8601. The config's date_format_choice is about
+        # file names and is not applied to values
+        self.date_format = date_format
+        # Key indexes of the files foreign keys reference, by
+        # ForeignKey.reference: a KeyIndex, or why there is none
+        # (see build_key_indexes)
+        self.key_indexes = key_indexes if key_indexes is not None else {}
+        # Check a random sample of each CSV file's rows instead of all of
+        # them (see check_file_sampled); a row count is split over the files
+        # in proportion to their size
+        self.sample = sample
+        # Build a ColumnSketch of every column while checking it (see sketches.py)
+        self.sketches = sketches
+        # Write a snapshot of the run's sketches here, for drift.py; files
+        # that errored or stopped early are left out
+        self.sketch_path = sketch_path
+        # Instrumentation: hooks.file_checked gets each file's stats,
+        # hooks.run_finished the run's totals (see instrumentation.py)
+        self.hooks = hooks
+        # Called with each issue record (iter_report_issues) as soon as its
+        # file is done; keep_report=False then keeps only each file's
+        # issue_count (and any error, stopped or skipped entry)
+        self.on_issue = on_issue
+        self.keep_report = keep_report
+
+    @property
+    def vectorized(self) -> bool:
+        return self.engine == 'vectorized'
+
+    def report_settings(self) -> Dict[str, Any]:
+        """Settings that change report contents, for result cache keys."""
+        settings: Dict[str, Any] = {'max_samples': self.max_samples, 'date_format': self.date_format}
+        if self.sample is not None:
+            settings['sample'] = self.sample.to_dict()
+        if self.sketches:
+            settings['sketches'] = True
+        return settings
+
+
+class RuleIssues:
+    """
+    Bounded record of one rule's violations in one column: the total count,
+    the first max_samples offending values and rows, and the offending rows
+    compressed into [first, last] ranges (also at most max_samples of them).
+    max_samples=None keeps every violation. Violations are spent from budget,
+    if given, before they are recorded, so none beyond it is recorded.
+    """
+
+    def __init__(
+        self,
+        rule: str,
+        max_samples: Optional[int] = DEFAULT_MAX_SAMPLES,
+        key_label: str = '',
+        budget: Optional[ErrorBudget] = None
+    ):
+        self.rule = rule
+        self.budget = budget
+        self.key_label = key_label
+        self.max_samples = max_samples
+        self.count = 0
+        self.samples: List[Any] = []
+        self.rows: List[int] = []
+        self.row_ranges: List[List[int]] = []
+        self.ranges_complete = True
+
+    def add(self, row_index: int, value: Any) -> None:
+        if self.budget is not None:
+            self.budget.spend(1)
+        self.count += 1
+        limit = self.max_samples
+        if limit is None or len(self.rows) < limit:
+            self.rows.append(row_index)
+            self.samples.append(value)
+        if self.ranges_complete:
+            ranges = self.row_ranges
+            if ranges and ranges[-1][1] == row_index - 1:
+                ranges[-1][1] = row_index
+            elif limit is None or len(ranges) < limit:
+                ranges.append([row_index, row_index])
+            else:
+                self.ranges_complete = False
+
+    def add_many(self, row_indices: Sequence[int], values: Sequence[Any]) -> None:
+        """
+        Adds violations in row order, doing per-row work only while samples
+        or ranges are still open. With a budget, only as many as it has left
+        are added before ErrorLimitReached is raised.
+        """
+        n = len(row_indices)
+        if not n:
+            return
+        if self.budget is not None:
+            allowed = self.budget.remaining
+            if n > allowed:
+                self._add_many(row_indices[:allowed], values[:allowed])
+            self.budget.spend(n)
+        self._add_many(row_indices, values)
+
+    def _add_many(self, row_indices: Sequence[int], values: Sequence[Any]) -> None:
+        n = len(row_indices)
+        if not n:
+            return
+        limit = self.max_samples
+        open_slots = n if limit is None else max(limit - len(self.rows), 0)
+        for i in range(min(open_slots, n)):
+            self.rows.append(int(row_indices[i]))
+            self.samples.append(values[i])
+        if self.ranges_complete:
+            ranges = self.row_ranges
+            for row in row_indices:
+                row = int(row)
+                if ranges and ranges[-1][1] == row - 1:
+                    ranges[-1][1] = row
+                elif limit is None or len(ranges) < limit:
+                    ranges.append([row, row])
+                else:
+                    self.ranges_complete = False
+                    break
+        self.count += n
+
+    def merge(self, other: 'RuleIssues', row_offset: int) -> None:
+        """Appends violations of rules that saw later rows, shifting their rows by row_offset."""
+        count = self.count + other.count
+        limit = self.max_samples
+        open_slots = len(other.rows) if limit is None else max(limit - len(self.rows), 0)
+        self.rows.extend(row + row_offset for row in other.rows[:open_slots])
+        self.samples.extend(other.samples[:open_slots])
+        if self.ranges_complete:
+            for first, last in other.row_ranges:
+                first, last = first + row_offset, last + row_offset
+                if self.row_ranges and self.row_ranges[-1][1] == first - 1:
+                    self.row_ranges[-1][1] = last
+                elif limit is None or len(self.row_ranges) < limit:
+                    self.row_ranges.append([first, last])
+                else:
+                    self.ranges_complete = False
+                    break
+            if not other.ranges_complete:
+                self.ranges_complete = False
+        self.count = count
+
+    @property
+    def truncated(self) -> bool:
+        return self.count > len(self.samples)
+
+    def to_dict(self) -> Dict[str, Any]:
+        details = {
+            'rule': self.rule,
+            'count': self.count,
+            'samples': list(self.samples),
+            'rows': list(self.rows),
+            'row_ranges': [list(r) for r in self.row_ranges],
+            'truncated': self.truncated or not self.ranges_complete,
+        }
+        if self.key_label:
+            details['constraint' if self.rule == 'constraint' else 'key'] = self.key_label
+        return details
+
+
+class ColumnAccumulator:
+    """
+    Streaming rule state for one compiled column.
+    Values are fed one row at a time; only the rule state (hashes of values
+    for `unique`, bounded violation records) is kept, never the column itself.
+    The python engine memoizes verdicts per distinct value in memo, which is
+    not an LRU: once it holds MEMO_MAX_ENTRIES values it is cleared and
+    refilled, or dropped for the rest of the file if it filled up too fast
+    (see _remember).
+    """
+
+    def __init__(
+        self,
+        plan: ColumnPlan,
+        options: Optional[CheckOptions] = None,
+        budget: Optional[ErrorBudget] = None
+    ):
+        options = options or CheckOptions()
+        self.plan = plan
+        self.max_samples = options.max_samples
+        self.type_errors = RuleIssues('type', self.max_samples, budget=budget)
+        self.out_of_range = RuleIssues('range', self.max_samples, budget=budget)
+        self.invalid_values = RuleIssues('allowed_values', self.max_samples, budget=budget)
+        self.nulls = RuleIssues('not_null', self.max_samples, budget=budget)
+        self.duplicates = RuleIssues('unique', self.max_samples)
+        # One per rule of plan.rules; row rules are fed by RowRuleChecks
+        self.constraints = [RuleIssues('constraint', self.max_samples, rule.source, budget) for rule in plan.rules]
+        self.unique: Optional[KeyTracker] = None
+        if plan.check_unique:
+            self.unique = KeyTracker(plan.name, [plan.name], options.unique_memory_bytes, options.spill_dir)
+        self.stats: Optional[ColumnStats] = None
+        if options.profile:
+            self.stats = ColumnStats(f'type:{plan.dtype}' if plan.dtype else 'values')
+        self.sketch: Optional[ColumnSketch] = ColumnSketch(plan.numeric, plan.null_values) if options.sketches else None
+        self.date_format = plan.date_format or options.date_format
+        self._bind()
+        # Verdict bits per distinct value, see _remember
+        self.memo: Optional[Dict[str, int]] = {} if plan.memoize else None
+        self.memo_since = 0
+
+    def _bind(self) -> None:
+        """Compiles the date parser and the value rules, as (verdict bit, check, issues)."""
+        plan = self.plan
+        self.is_date: Optional[Callable[[str], bool]] = None
+        if plan.dtype == 'date':
+            self.is_date = compile_date_format(self.date_format)
+        spec = plan.spec(self.date_format)
+        self.value_checks = [
+            (FIRST_CONSTRAINT_BIT << i, rule.bind_value(spec), issues)
+            for i, (rule, issues) in enumerate(zip(plan.rules, self.constraints)) if not rule.columns
+        ]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Chunk workers send accumulators back: the memo is left behind and
+        # the date parser and value rules, closures, are bound again on arrival
+        state = self.__dict__.copy()
+        state['memo'] = None
+        state['is_date'] = None
+        state['value_checks'] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._bind()
+
+    def adder(self) -> Any:
+        """The per-value entry point: add, or add_timed when profiling, feeding the sketch first if there is one."""
+        add = self.add if self.stats is None else self.add_timed
+        if self.sketch is None:
+            return add
+        add_to_sketch = self.sketch.add
+
+        def add_sketched(row_index: int, v: Optional[str]) -> None:
+            add_to_sketch(v)
+            add(row_index, v)
+        return add_sketched
+
+    def add_timed(self, row_index: int, v: Optional[str]) -> None:
+        """
+        add, timing the unique check and the column's other rules separately.
+        Timer calls cost as much as the rules, so only one value in
+        PROFILE_SAMPLE_EVERY is timed and its times are scaled up.
+        """
+        stats = self.stats
+        assert stats is not None
+        stats.values += 1
+        if stats.values % PROFILE_SAMPLE_EVERY:
+            self.add(row_index, v)
+            return
+        unique = self.unique
+        if unique is not None and v is not None:
+            start = time.perf_counter()
+            unique.add_value(v)
+            stats.add_rule('unique', (time.perf_counter() - start) * PROFILE_SAMPLE_EVERY)
+        # Splitting add in two would slow down every unprofiled value, so
+        # its unique check is switched off for this call instead
+        start = time.perf_counter()
+        self.unique = None
+        try:
+            self.add(row_index, v)
+        finally:
+            self.unique = unique
+        stats.add_rule(stats.type_rule, (time.perf_counter() - start) * PROFILE_SAMPLE_EVERY)
+
+    def add(self, row_index: int, v: Optional[str]) -> None:
+        plan = self.plan
+        if self.unique is not None and v is not None:
+            self.unique.add_value(v)
+        if v is None or v in plan.null_values:
+            if plan.check_not_null:
+                self.nulls.add(row_index, v)
+            return
+        memo = self.memo
+        if memo is not None:
+            verdict = memo.get(v)
+            if verdict is not None:
+                if verdict:
+                    self._record(row_index, v, verdict)
+                return
+        verdict = 0
+        dtype = plan.dtype
+        if plan.numeric:
+            # One float parse serves both the type and the range check
+            try:
+                fv: Optional[float] = float(v)
+            except ValueError:
+                fv = None
+            if dtype == 'integer':
+                try:
+                    int(v)
+                except ValueError:
+                    verdict = TYPE_ERROR
+            elif fv is None:
+                verdict = TYPE_ERROR
+            if plan.range_bounds is not None:
+                if fv is not None and plan.range_bounds.outside(fv):
+                    verdict |= OUT_OF_RANGE
+            elif plan.allowed_values is not None and v not in plan.allowed_values:
+                verdict |= NOT_ALLOWED
+        else:
+            if dtype == 'boolean':
+                if v.lower() not in BOOLEAN_VALUES:
+                    verdict = TYPE_ERROR
+            elif dtype == 'date':
+                if not self.is_date(v):  # type: ignore[misc]
+                    verdict = TYPE_ERROR
+            if plan.allowed_values is not None and v not in plan.allowed_values:
+                verdict |= NOT_ALLOWED
+        if self.value_checks:
+            for bit, check, _ in self.value_checks:
+                if not check(v):
+                    verdict |= bit
+        if memo is not None:
+            self._remember(row_index, v, verdict)
+        if verdict:
+            self._record(row_index, v, verdict)
+
+    def _record(self, row_index: int, v: str, verdict: int) -> None:
+        if verdict & TYPE_ERROR:
+            self.type_errors.add(row_index, v)
+        if verdict & OUT_OF_RANGE:
+            self.out_of_range.add(row_index, v)
+        if verdict & NOT_ALLOWED:
+            self.invalid_values.add(row_index, v)
+        if verdict >= FIRST_CONSTRAINT_BIT:
+            for bit, _, issues in self.value_checks:
+                if verdict & bit:
+                    issues.add(row_index, v)
+
+    def _remember(self, row_index: int, v: str, verdict: int) -> None:
+        """
+        Memoizes a value's verdict. A full memo is emptied and refilled, a
+        cheap stand-in for LRU eviction, unless it filled up in so few rows
+        that the column looks high-cardinality; the memo is then dropped, so
+        such columns only pay for it until MEMO_MAX_ENTRIES distinct values.
+        """
+        memo = self.memo
+        assert memo is not None
+        if len(memo) >= MEMO_MAX_ENTRIES:
+            if row_index - self.memo_since < MEMO_MAX_ENTRIES * MEMO_MIN_ROWS_PER_ENTRY:
+                self.memo = None
+                return
+            memo.clear()
+            self.memo_since = row_index
+        memo[v] = verdict
+
+    def merge(self, other: 'ColumnAccumulator', row_offset: int) -> None:
+        """
+        Appends the state of an accumulator that saw the rows directly after
+        this one's. Row indices of `other` are relative to its own first row
+        and are shifted by row_offset, the number of rows seen before it.
+        """
+        self.type_errors.merge(other.type_errors, row_offset)
+        self.out_of_range.merge(other.out_of_range, row_offset)
+        self.invalid_values.merge(other.invalid_values, row_offset)
+        self.nulls.merge(other.nulls, row_offset)
+        for issues, other_issues in zip(self.constraints, other.constraints):
+            issues.merge(other_issues, row_offset)
+        if self.unique is not None and other.unique is not None:
+            self.unique.merge(other.unique)
+        if self.stats is not None and other.stats is not None:
+            self.stats.merge(other.stats)
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+
+    def rule_issues(self) -> List[RuleIssues]:
+        """Returns the rules that found violations, in report order."""
+        rules = [self.type_errors, self.out_of_range, self.invalid_values, *self.constraints, self.duplicates, self.nulls]
+        return [rule for rule in rules if rule.count]
+
+    def checked_rules(self) -> List[RuleIssues]:
+        """
+        Returns the per-row rules the column checks, whether or not they found
+        violations, in report order. `unique` is left out: a duplicate is a
+        property of the column, not of a row.
+        """
+        plan = self.plan
+        rules = []
+        if plan.numeric or plan.dtype in ('boolean', 'date'):
+            rules.append(self.type_errors)
+        if plan.range_bounds is not None:
+            rules.append(self.out_of_range)
+        if plan.allowed_values is not None:
+            rules.append(self.invalid_values)
+        rules.extend(self.constraints)
+        if plan.check_not_null:
+            rules.append(self.nulls)
+        return rules
+
+    def issues(self) -> List[str]:
+        """Returns the column's issue messages in report order."""
+        col_issues: List[str] = []
+        for rule in self.rule_issues():
+            col_issues.extend(format_rule_issues(rule))
+        return col_issues
+
+
+class UniqueKeyCheck:
+    """
+    A `unique_keys` entry of a file: several columns whose combined values
+    must be unique, or the whole row (columns=None) for "*".
+    """
+
+    def __init__(self, columns: Optional[List[str]], options: CheckOptions):
+        self.columns = columns
+        if columns is None:
+            self.label = 'row'
+            self.issues = RuleIssues('unique_row', options.max_samples, '*')
+        else:
+            self.label = '(' + ', '.join(columns) + ')'
+            self.issues = RuleIssues('unique_key', options.max_samples, self.label)
+        self.tracker = KeyTracker(self.label, columns, options.unique_memory_bytes, options.spill_dir)
+        # Seconds spent hashing and tracking keys, when profiling
+        self.seconds: Optional[float] = 0.0 if options.profile else None
+
+    def adder(self) -> Any:
+        """The per-row entry point: tracker.add, timed when profiling."""
+        if self.seconds is None:
+            return self.tracker.add
+        add = self.tracker.add
+        n_keys = 0
+
+        def add_timed(key: Tuple[Any, ...]) -> None:
+            # Sampled like ColumnAccumulator.add_timed
+            nonlocal n_keys
+            n_keys += 1
+            if n_keys % PROFILE_SAMPLE_EVERY:
+                add(key)
+                return
+            start = time.perf_counter()
+            add(key)
+            self.seconds += (time.perf_counter() - start) * PROFILE_SAMPLE_EVERY
+        return add_timed
+
+    def add_batch(self, key_columns: List[Sequence[Optional[str]]]) -> None:
+        if self.seconds is None:
+            self.tracker.add_batch(key_columns)
+            return
+        start = time.perf_counter()
+        self.tracker.add_batch(key_columns)
+        self.seconds += time.perf_counter() - start
+
+    def merge(self, other: 'UniqueKeyCheck', row_offset: int = 0) -> None:
+        """Takes over the keys of a later chunk; keys record no rows, so row_offset is not needed."""
+        self.tracker.merge(other.tracker)
+        if self.seconds is not None and other.seconds is not None:
+            self.seconds += other.seconds
+
+
+def _unique_key_checks(
+    unique_keys: List[Any],
+    fieldnames: List[str],
+    options: CheckOptions
+) -> Tuple[List[str], List[UniqueKeyCheck]]:
+    """
+    Compiles a file's `unique_keys` against its header. Keys that use columns
+    missing from the data are reported as file issues and not checked.
+    """
+    file_issues: List[str] = []
+    checks: List[UniqueKeyCheck] = []
+    for spec in unique_keys:
+        if spec == '*':
+            checks.append(UniqueKeyCheck(None, options))
+            continue
+        columns = [spec] if isinstance(spec, str) else list(spec)
+        missing = [col for col in columns if col not in fieldnames]
+        if missing:
+            file_issues.append(f"Unique key ({', '.join(columns)}) uses columns missing in data: {missing}")
+        else:
+            checks.append(UniqueKeyCheck(columns, options))
+    return file_issues, checks
+
+
+class ForeignKeyCheck:
+    """
+    A `foreign_keys` entry of a file, checked against the KeyIndex of the
+    referenced file. Keys with a missing part (None or a null token of its
+    column) are skipped; the others are hashed and looked up a batch at a
+    time, and those absent from the index are recorded with their rows. A
+    hash collision can hide a missing reference but never invent one.
+    Keys from add are buffered until flush, which must be called once the
+    rows are read; with a budget the buffer starts small and doubles, like
+    vectorized batches, so that a dirty file stops early.
+    """
+
+    # Nothing to confirm in a second pass, unlike UniqueKeyCheck
+    tracker = None
+
+    def __init__(
+        self,
+        foreign_key: ForeignKey,
+        index: KeyIndex,
+        null_values: List[frozenset],
+        options: CheckOptions,
+        budget: Optional[ErrorBudget] = None
+    ):
+        self.columns = foreign_key.columns
+        self.label = foreign_key.label
+        self.index = index
+        self.null_values = null_values
+        self.issues = RuleIssues('foreign_key', options.max_samples, foreign_key.label, budget)
+        self.seconds: Optional[float] = None
+        self.n_rows = 0
+        self.pending: List[Tuple[Optional[str], ...]] = []
+        self.batch_rows = VECTORIZED_BATCH_ROWS if budget is None else FIRST_BATCH_ROWS
+
+    def adder(self) -> Any:
+        return self.add
+
+    def add(self, key: Tuple[Optional[str], ...]) -> None:
+        self.pending.append(key)
+        if len(self.pending) >= self.batch_rows:
+            self.batch_rows = min(self.batch_rows * 2, VECTORIZED_BATCH_ROWS)
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending:
+            keys, self.pending = self.pending, []
+            self.add_batch([list(column) for column in zip(*keys)])
+
+    def add_batch(self, key_columns: List[Sequence[Optional[str]]]) -> None:
+        n_rows = len(key_columns[0]) if key_columns else 0
+        rows, present = drop_missing(key_columns, self.null_values)
+        if len(rows):
+            found = self.index.contains(hash_key_columns(present))
+            if isinstance(found, list):
+                missing: Any = [i for i, hit in enumerate(found) if not hit]
+            else:
+                import numpy as np
+                missing = np.flatnonzero(~found)
+            if len(missing):
+                limit = self.issues.max_samples
+                n_samples = len(missing) if limit is None else max(limit - len(self.issues.rows), 0)
+                samples = [present[0][i] if len(present) == 1 else [col[i] for col in present]
+                           for i in missing[:n_samples]]
+                self.issues.add_many([int(rows[i]) + self.n_rows for i in missing], samples)
+        self.n_rows += n_rows
+
+    def merge(self, other: 'ForeignKeyCheck', row_offset: int) -> None:
+        """Appends the missing references a later chunk found, its rows shifted by row_offset."""
+        self.issues.merge(other.issues, row_offset)
+
+
+def _null_values(column_plans: List[ColumnPlan], columns: List[str]) -> List[frozenset]:
+    """Null tokens of each of columns; columns the dictionary does not describe only treat '' as null."""
+    tokens = {plan.name: plan.null_values for plan in column_plans}
+    return [tokens.get(col, frozenset([''])) for col in columns]
+
+
+def _foreign_key_checks(
+    foreign_keys: List[ForeignKey],
+    fieldnames: Optional[Sequence[str]],
+    column_plans: List[ColumnPlan],
+    options: CheckOptions,
+    budget: Optional[ErrorBudget] = None
+) -> Tuple[List[str], List[ForeignKeyCheck]]:
+    """
+    Compiles a file's `foreign_keys` against its header (None skips that, for
+    JSON files whose fields are only known at the end). Invalid keys, keys
+    using columns missing from the data and keys whose referenced file has
+    no index in options.key_indexes are reported as file issues and not
+    checked.
+    """
+    file_issues: List[str] = []
+    checks: List[ForeignKeyCheck] = []
+    for foreign_key in foreign_keys:
+        if foreign_key.error is not None:
+            file_issues.append(f"Invalid foreign key {foreign_key.label}: {foreign_key.error}")
+            continue
+        missing = [col for col in foreign_key.columns if fieldnames is not None and col not in fieldnames]
+        if missing:
+            file_issues.append(f"Foreign key {foreign_key.label} uses columns missing in data: {missing}")
+            continue
+        index = options.key_indexes.get(foreign_key.reference, 'the referenced file was not indexed')
+        if not isinstance(index, KeyIndex):
+            file_issues.append(f"Foreign key {foreign_key.label} not checked: {index}")
+            continue
+        null_values = _null_values(column_plans, foreign_key.columns)
+        checks.append(ForeignKeyCheck(foreign_key, index, null_values, options, budget))
+    return file_issues, checks
+
+
+def _key_checks(
+    unique_keys: Optional[List[Any]],
+    foreign_keys: Optional[List[ForeignKey]],
+    fieldnames: List[str],
+    column_plans: List[ColumnPlan],
+    options: CheckOptions,
+    budget: Optional[ErrorBudget] = None
+) -> Tuple[List[str], List[Any]]:
+    """A file's unique key checks followed by its foreign key checks, with the file issues of both."""
+    key_issues, key_checks = _unique_key_checks(unique_keys or [], fieldnames, options)
+    fk_issues, fk_checks = _foreign_key_checks(foreign_keys or [], fieldnames, column_plans, options, budget)
+    return key_issues + fk_issues, key_checks + fk_checks
+
+
+def _flush_foreign_keys(key_checks: Sequence[Any]) -> None:
+    """Looks up the keys foreign key checks still buffer; an exceeded budget only ends the lookups."""
+    try:
+        for check in key_checks:
+            if isinstance(check, ForeignKeyCheck):
+                check.flush()
+    except ErrorLimitReached:
+        pass
+
+
+class RowRuleCheck:
+    """
+    A row rule of a column (a comparison with other columns), fed the values
+    of the columns it reads; violations go to the column accumulator's
+    RuleIssues for the rule, with samples mapping those columns to values.
+    """
+
+    def __init__(self, check: RowCheck, issues: RuleIssues):
+        self.columns = check.columns
+        self.check = check
+        self.issues = issues
+
+    def add(self, row_index: int, values: Tuple[Optional[str], ...]) -> None:
+        if not self.check.check(values):
+            self.issues.add(row_index, dict(zip(self.columns, values)))
+
+    def add_batch(self, arrays: List[Sequence[Optional[str]]], row_offset: int) -> None:
+        import numpy as np
+        bad = np.flatnonzero(self.check.violations(arrays))
+        if not len(bad):
+            return
+        limit = self.issues.max_samples
+        # Samples are only built for the violations that are kept
+        n_samples = len(bad) if limit is None else max(limit - len(self.issues.rows), 0)
+        samples = [dict(zip(self.columns, (arr[i] for arr in arrays))) for i in bad[:n_samples]]
+        self.issues.add_many(bad + row_offset, samples)
+
+
+def _row_rule_checks(
+    accumulators: List[ColumnAccumulator],
+    column_plans: List[ColumnPlan],
+    options: CheckOptions,
+    data_columns: Optional[Any] = None
+) -> List[RowRuleCheck]:
+    """
+    Binds the row rules of the accumulators' columns to the types of the
+    columns they read. Rules reading columns missing from data_columns are
+    left out (_file_issues reports them); None keeps every rule.
+    """
+    specs = {plan.name: plan.spec(options.date_format) for plan in column_plans}
+    checks: List[RowRuleCheck] = []
+    for acc in accumulators:
+        for rule, issues in zip(acc.plan.rules, acc.constraints):
+            if rule.columns and (data_columns is None or all(col in data_columns for col in rule.columns)):
+                checks.append(RowRuleCheck(rule.bind_row(acc.plan.name, specs), issues))
+    return checks
+
+
+def _dict_row_key(columns: Optional[List[str]], row: Dict[Any, Any], names: List[str]) -> Tuple[Any, ...]:
+    """Key of a csv.DictReader row; whole rows also include fields beyond the header."""
+    if columns is None:
+        return tuple(row.get(name) for name in names) + tuple(row.get(None, ()))
+    return tuple(row.get(col) for col in columns)
+
+
+def _raw_row_key(
+    columns: Optional[List[str]],
+    row: List[str],
+    positions: Dict[str, int],
+    n_fields: int
+) -> Tuple[Any, ...]:
+    """Key of a csv.reader row, equal to _dict_row_key of the same row."""
+    keys = positions if columns is None else columns
+    key = tuple(row[positions[col]] if positions[col] < len(row) else None for col in keys)
+    if columns is None:
+        key += tuple(row[n_fields:])
+    return key
+
+
+def _batch_key_columns(
+    columns: List[str],
+    batch_columns: List[Sequence[Optional[str]]],
+    positions: Dict[str, int],
+    n_rows: int
+) -> List[Sequence[Optional[str]]]:
+    """Selects a key's columns from a transposed batch; short rows yield None."""
+    key_columns = []
+    for col in columns:
+        pos = positions[col]
+        key_columns.append(batch_columns[pos] if pos < len(batch_columns) else (None,) * n_rows)
+    return key_columns
+
+
+def _confirm_uniqueness(
+    file_path: str,
+    fieldnames: List[str],
+    accumulators: List['ColumnAccumulator'],
+    key_checks: List[UniqueKeyCheck],
+    batch_rows: int = VECTORIZED_BATCH_ROWS,
+    confirm: bool = True
+) -> List[KeyTracker]:
+    """
+    Finishes the uniqueness checks of a file and fills in their issues. Keys
+    that outgrew the memory budget were tracked as hashes; if any hash was
+    seen twice, the file is read again and the actual keys behind those
+    hashes are compared. Spilled hash runs are removed afterwards.
+    Returns the trackers that needed that second pass. With confirm=False
+    (a file whose reading stopped early) there is no second pass, and only
+    duplicates found without one are reported.
+    """
+    pending: List[KeyTracker] = []
+    checks = [(acc.unique, acc.duplicates) for acc in accumulators if acc.unique is not None]
+    checks += [(check.tracker, check.issues) for check in key_checks if check.tracker is not None]
+    try:
+        pending = [tracker for tracker, _ in checks if tracker.start_confirmation()]
+        if not confirm:
+            pending = []
+        if pending:
+            _confirm_pass(file_path, fieldnames, pending, batch_rows)
+    finally:
+        for tracker, _ in checks:
+            tracker.close()
+    for tracker, issues in checks:
+        # Sorted like the values themselves; None (short rows) sorts first
+        keys = sorted(tracker.duplicate_keys, key=lambda key: [(v is not None, v or '') for v in key])
+        issues.count = len(keys)
+        issues.samples = [key[0] if tracker.columns is not None and len(key) == 1 else list(key)
+                          for key in keys[:issues.max_samples]]
+    return pending
+
+
+def _confirm_pass(file_path: str, fieldnames: List[str], pending: List[KeyTracker], batch_rows: int) -> None:
+    if is_json_name(file_path):
+        _confirm_json_pass(file_path, pending, batch_rows)
+        return
+    if is_columnar(file_path):
+        names = _key_columns(fieldnames, pending)
+        batches: Iterator[Tuple[List[Any], List[Sequence[Optional[str]]]]] = (
+            (list(zip(*columns)), columns) for columns in iter_columnar_batches(file_path, names, batch_rows)
+        )
+        _confirm_batches(batches, names, pending)
+        return
+    with open_text(file_path) as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader, None)
+        _confirm_batches(_csv_row_batches(reader, batch_rows), fieldnames, pending)
+
+
+def _key_columns(fieldnames: List[str], trackers: Sequence[KeyTracker]) -> List[str]:
+    """The columns a confirmation pass reads: the key columns, or all of them for whole-row keys."""
+    if any(tracker.columns is None for tracker in trackers):
+        return list(dict.fromkeys(fieldnames))
+    return list(dict.fromkeys(col for tracker in trackers for col in tracker.columns or ()))
+
+
+def _confirm_json_pass(file_path: str, pending: List[KeyTracker], batch_rows: int) -> None:
+    """Confirmation pass over JSON records; whole-record keys are compared by row_key."""
+    column_trackers = [tracker for tracker in pending if tracker.columns is not None]
+    row_trackers = [tracker for tracker in pending if tracker.columns is None]
+    names = list(dict.fromkeys(col for tracker in column_trackers for col in tracker.columns))
+    records = iter_json_records(file_path)
+    while True:
+        batch = list(itertools.islice(records, batch_rows))
+        if not batch:
+            break
+        if column_trackers:
+            rows = [tuple(flat.get(col) for col in names) for flat in batch]
+            _confirm_batches(iter([(rows, list(zip(*rows)))]), names, column_trackers)
+        if row_trackers:
+            _confirm_batches(iter([([row_key(flat) for flat in batch], [])]), [], row_trackers)
+
+
+def _csv_row_batches(
+    reader: Iterator[List[str]],
+    batch_rows: int
+) -> Iterator[Tuple[List[List[str]], List[Sequence[Optional[str]]]]]:
+    """Yields the non-empty rows of a csv.reader in batches, along with their transposed columns."""
+    while True:
+        batch = list(itertools.islice(reader, batch_rows))
+        if not batch:
+            break
+        rows = [row for row in batch if row]
+        if rows:
+            yield rows, list(itertools.zip_longest(*rows))
+
+
+def _confirm_batches(
+    batches: Iterator[Tuple[List[Any], List[Sequence[Optional[str]]]]],
+    fieldnames: List[str],
+    pending: List[KeyTracker]
+) -> None:
+    positions = {name: i for i, name in enumerate(fieldnames)}
+    n_fields = len(fieldnames)
+    for rows, batch_columns in batches:
+        for tracker in pending:
+            if tracker.columns is None:
+                hashes: Any = [hash_key(_raw_row_key(None, row, positions, n_fields)) for row in rows]
+            else:
+                hashes = hash_key_columns(_batch_key_columns(tracker.columns, batch_columns, positions, len(rows)))
+            candidates = tracker.candidates
+            if hasattr(hashes, 'dtype'):
+                import numpy as np
+                hit_rows: Any = np.flatnonzero(np.isin(hashes, np.fromiter(candidates, dtype=np.uint64)))
+            else:
+                hit_rows = [i for i, h in enumerate(hashes) if h in candidates]
+            for i in hit_rows:
+                key = _raw_row_key(tracker.columns, rows[i], positions, n_fields)
+                if tracker.skips_missing and None in key:
+                    continue
+                tracker.confirm(int(hashes[i]), key)
+
+
+def format_rule_issues(rule: RuleIssues) -> List[str]:
+    """
+    Renders a rule's violations as report messages. Messages are identical to
+    an unbounded report whenever nothing was truncated; otherwise they note
+    how many violations were left out.
+    """
+    more = rule.count - len(rule.samples)
+    suffix = f" (and {more} more)" if more else ''
+    if rule.rule == 'type':
+        return [f"Type errors: {rule.samples}{suffix}"]
+    if rule.rule in ('range', 'allowed_values'):
+        label = 'Out of range' if rule.rule == 'range' else 'Invalid value'
+        messages = [f"{label}: {v}" for v in rule.samples]
+        if more:
+            messages.append(f"{label}: {more} more values not shown")
+        return messages
+    if rule.rule == 'unique':
+        return [f"Duplicate values: {rule.samples}{suffix}"]
+    if rule.rule == 'unique_key':
+        return [f"Duplicate values for key {rule.key_label}: {rule.samples}{suffix}"]
+    if rule.rule == 'unique_row':
+        return [f"Duplicate rows: {rule.samples}{suffix}"]
+    if rule.rule == 'constraint':
+        return [f"Violates '{rule.key_label}': {rule.samples}{suffix}"]
+    if rule.rule == 'foreign_key':
+        return [f"Values not found for foreign key {rule.key_label}: {rule.samples}{suffix}"]
+    return [f"Null/missing values at rows: {rule.rows}{suffix}"]
+
+
+def _parse_floats(values: Any) -> Tuple[Any, Any]:
+    """
+    Parses a pandas Series of strings with Python float() semantics.
+    Returns the parsed float array (NaN where parsing failed) and a boolean
+    mask of values that are not valid floats.
+    """
+    import numpy as np
+    arr = values.to_numpy(dtype=object)
+    try:
+        # numpy converts object arrays with float() per element, in C
+        return arr.astype(float), np.zeros(len(arr), dtype=bool)
+    except ValueError:
+        pass
+    parsed = np.full(len(arr), np.nan)
+    bad = np.zeros(len(arr), dtype=bool)
+    for i, v in enumerate(arr):
+        try:
+            parsed[i] = float(v)
+        except ValueError:
+            bad[i] = True
+    return parsed, bad
+
+
+def _integer_errors(values: Any) -> Any:
+    """Returns a mask of values in a pandas Series of strings that int() rejects."""
+    import numpy as np
+    arr = values.to_numpy(dtype=object)
+    bad = np.zeros(len(arr), dtype=bool)
+    try:
+        # numpy converts object arrays with int() per element, in C
+        arr.astype(np.int64)
+        return bad
+    except (ValueError, OverflowError):
+        pass
+    for i, v in enumerate(arr):
+        try:
+            int(v)
+        except ValueError:
+            bad[i] = True
+    return bad
+
+
+def validate_column_vectorized(
+    acc: ColumnAccumulator,
+    values: Sequence[Optional[str]],
+    row_offset: int
+) -> None:
+    """
+    Applies a column's rules to a batch of values as whole-column pandas
+    operations, updating acc exactly as feeding each value to acc.add would.
+    row_offset is the row index of the first value in the batch.
+    """
+    import numpy as np
+    import pandas as pd
+    plan = acc.plan
+    s = pd.Series(values, dtype=object)
+    # Building the Series counts as reading, not as any rule
+    lap = RuleTimer(acc.stats)
+    if acc.stats is not None:
+        acc.stats.values += len(values)
+    if acc.sketch is not None:
+        acc.sketch.add_batch(values)
+        lap('sketch')
+    is_none = s.isna().to_numpy()
+    if acc.unique is not None:
+        acc.unique.add_batch([s.to_numpy(dtype=object)])
+        lap('unique')
+    null_mask = is_none | s.isin(list(plan.null_values)).to_numpy()
+    if plan.check_not_null and null_mask.any():
+        null_rows = np.flatnonzero(null_mask)
+        acc.nulls.add_many(null_rows + row_offset, s.to_numpy(dtype=object)[null_rows])
+    present = s[~null_mask]
+    lap('not_null')
+    if present.empty:
+        return
+    arr = present.to_numpy(dtype=object)
+    rows = present.index.to_numpy() + row_offset
+    dtype = plan.dtype
+    type_rule = f'type:{dtype}' if dtype else 'values'
+    if plan.numeric:
+        fv, float_errors = _parse_floats(present)
+        type_errors = _integer_errors(present) if dtype == 'integer' else float_errors
+        acc.type_errors.add_many(rows[type_errors], arr[type_errors])
+        lap(type_rule)
+        if plan.range_bounds is not None:
+            with np.errstate(invalid='ignore'):
+                out_of_range = plan.range_bounds.outside(fv)
+            acc.out_of_range.add_many(rows[out_of_range], arr[out_of_range])
+            lap('range')
+    elif dtype == 'boolean':
+        invalid = ~present.str.lower().isin(list(BOOLEAN_VALUES)).to_numpy(dtype=bool)
+        acc.type_errors.add_many(rows[invalid], arr[invalid])
+        lap(type_rule)
+    elif dtype == 'date':
+        # One parse per distinct value of the batch
+        invalid = ~map_distinct(arr, acc.is_date).astype(bool)
+        acc.type_errors.add_many(rows[invalid], arr[invalid])
+        lap(type_rule)
+    if plan.allowed_values is not None:
+        invalid = ~present.isin(list(plan.allowed_values)).to_numpy(dtype=bool)
+        acc.invalid_values.add_many(rows[invalid], arr[invalid])
+        lap('allowed_values')
+    if acc.value_checks:
+        for _, check, issues in acc.value_checks:
+            invalid = ~map_distinct(arr, check).astype(bool)
+            issues.add_many(rows[invalid], arr[invalid])
+        lap('constraints')
+
+
+def _budget_slices(
+    accumulators: List[ColumnAccumulator],
+    row_rules: List[RowRuleCheck],
+    column: Callable[[str], Sequence[Optional[str]]],
+    n_batch: int,
+    options: CheckOptions,
+    budget: Optional[ErrorBudget]
+) -> List[Tuple[int, int]]:
+    """
+    Splits a batch, checked one column at a time, so that budget is spent in
+    row order as the python engine spends it: the rows before the one whose
+    violations exceed what is left of budget, that row alone, and the rest.
+    Violations are first counted on scratch accumulators without budget;
+    foreign keys, looked up in batches by both engines, are not counted.
+    """
+    whole = [(0, n_batch)]
+    if budget is None:
+        return whole
+    # At most one type, range and allowed-values violation per value, or a null
+    per_row = sum(3 + len(acc.constraints) for acc in accumulators)
+    if budget.remaining >= n_batch * per_row:
+        return whole
+    scratch_options = CheckOptions(options.engine, None, date_format=options.date_format)
+    counts = [0] * n_batch
+    for acc in accumulators:
+        plan = copy.copy(acc.plan)
+        plan.check_unique = False
+        scratch = ColumnAccumulator(plan, scratch_options)
+        values = column(plan.name)
+        if options.vectorized:
+            validate_column_vectorized(scratch, values, 0)
+        else:
+            for row_index, v in enumerate(values):
+                scratch.add(row_index, v)
+        for issues in [scratch.type_errors, scratch.out_of_range, scratch.invalid_values, scratch.nulls] + scratch.constraints:
+            for row_index in issues.rows:
+                counts[row_index] += 1
+    for rule in row_rules:
+        check = RowRuleCheck(rule.check, RuleIssues('constraint', None))
+        arrays = [column(col) for col in rule.columns]
+        if options.vectorized:
+            check.add_batch(arrays, 0)
+        else:
+            for row_index, row_values in enumerate(zip(*arrays)):
+                check.add(row_index, row_values)
+        for row_index in check.issues.rows:
+            counts[row_index] += 1
+    for cut, spent in enumerate(itertools.accumulate(counts)):
+        if spent > budget.remaining:
+            return [(0, cut), (cut, cut + 1), (cut + 1, n_batch)]
+    return whole
+
+
+def _as_column_plans(columns: List[Any]) -> List[ColumnPlan]:
+    return [col if isinstance(col, ColumnPlan) else ColumnPlan(col) for col in columns]
+
+
+def _file_issues(data_columns: Set[str], column_plans: List[ColumnPlan]) -> List[str]:
+    """Reports dictionary columns missing from the data and undocumented extra columns."""
+    file_issues: List[str] = []
+    dict_columns = set(col.name for col in column_plans)
+    missing_in_data = dict_columns - data_columns
+    extra_in_data = data_columns - dict_columns
+    if missing_in_data:
+        file_issues.append(f"Missing columns in data: {sorted(list(missing_in_data))}")
+    if extra_in_data:
+        file_issues.append(f"Extra columns in data: {sorted(list(extra_in_data))}")
+    for col in column_plans:
+        if col.constraint_error:
+            file_issues.append(f"Invalid constraint for column {col.name}: {col.constraint_error}")
+        if col.range_error:
+            file_issues.append(f"Invalid range for column {col.name}: {col.range_error}")
+        if col.name not in data_columns:
             continue
-        # Read data
-        with open(file_path, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            data_rows = list(reader)
-        file_issues: List[str] = []
-        # Check for missing columns
-        data_columns = set(reader.fieldnames or [])
-        dict_columns = set(col['Variable Name'] for col in columns_meta)
-        missing_in_data = dict_columns - data_columns
-        extra_in_data = data_columns - dict_columns
-        if missing_in_data:
-            file_issues.append(f"Missing columns in data: {sorted(list(missing_in_data))}")
-        if extra_in_data:
-            file_issues.append(f"Extra columns in data: {sorted(list(extra_in_data))}")
-        # Per-column checks
-        col_issues: Dict[str, List[str]] = {}
-        for col_meta in columns_meta:
-            col = col_meta['Variable Name']
-            if col not in data_columns:
+        for rule in col.row_rules:
+            missing = [name for name in rule.columns if name not in data_columns]
+            if missing:
+                file_issues.append(f"Constraint '{rule.source}' of column {col.name} uses columns missing in data: {missing}")
+    return file_issues
+
+
+def _validate_rows(
+    reader: csv.DictReader,
+    column_plans: List[ColumnPlan],
+    data_columns: Set[str],
+    options: CheckOptions,
+    key_checks: Sequence[UniqueKeyCheck] = (),
+    budget: Optional[ErrorBudget] = None
+) -> Tuple[int, List[ColumnAccumulator]]:
+    """
+    Feeds every row of reader to one accumulator per dictionary column present
+    in the data, and its keys to key_checks. Returns the number of rows read
+    and the accumulators. Reading stops at the first violation beyond budget.
+    """
+    accumulators = [ColumnAccumulator(col, options, budget) for col in column_plans if col.name in data_columns]
+    bound = [(acc.plan.name, acc.adder()) for acc in accumulators]
+    row_rules = [(check.columns, check.add)
+                 for check in _row_rule_checks(accumulators, column_plans, options, data_columns)]
+    names = list(dict.fromkeys(reader.fieldnames or []))
+    keys = [(check.columns, check.adder()) for check in key_checks]
+    n_rows = 0
+    try:
+        for row_index, row in enumerate(reader):
+            for col, add in bound:
+                add(row_index, row.get(col, None))
+            for columns, add_row in row_rules:
+                add_row(row_index, tuple(row.get(col) for col in columns))
+            for columns, add_key in keys:
+                add_key(_dict_row_key(columns, row, names))
+            n_rows = row_index + 1
+    except ErrorLimitReached:
+        pass
+    return n_rows, accumulators
+
+
+def _validate_rows_vectorized(
+    reader: Iterator[List[str]],
+    fieldnames: List[str],
+    column_plans: List[ColumnPlan],
+    options: CheckOptions,
+    key_checks: Sequence[UniqueKeyCheck] = (),
+    batch_rows: int = VECTORIZED_BATCH_ROWS,
+    budget: Optional[ErrorBudget] = None
+) -> Tuple[int, List[ColumnAccumulator]]:
+    """
+    Vectorized counterpart of _validate_rows. Rows from a csv.reader are
+    transposed into column batches of up to batch_rows values, and each
+    column's rules run on the whole batch at once. With a budget, a batch is
+    split where it runs out (see _budget_slices), so reading stops on the
+    same row as with the python engine.
+    """
+    # Like csv.DictReader, a repeated header name maps to its last position
+    positions = {name: i for i, name in enumerate(fieldnames)}
+    accumulators = [ColumnAccumulator(col, options, budget) for col in column_plans if col.name in positions]
+    row_rules = _row_rule_checks(accumulators, column_plans, options, positions)
+    n_fields = len(fieldnames)
+    n_rows = 0
+    size = batch_rows if budget is None else min(FIRST_BATCH_ROWS, batch_rows)
+
+    def columns_of(rows: List[List[str]]) -> Callable[[str], Sequence[Optional[str]]]:
+        columns = list(itertools.zip_longest(*rows))
+
+        def column(name: str) -> Sequence[Optional[str]]:
+            pos = positions[name]
+            return columns[pos] if pos < len(columns) else (None,) * len(rows)
+        return column
+
+    try:
+        while True:
+            batch = list(itertools.islice(reader, size))
+            size = min(size * 2, batch_rows)
+            if not batch:
+                break
+            # csv.DictReader skips empty rows, so they do not count as row indices
+            rows = [row for row in batch if row]
+            if not rows:
                 continue
-            values = [row.get(col, None) for row in data_rows]
-            # Data Type check (basic)
-            dtype = col_meta.get('Data Type', '').lower()
-            if dtype:
-                type_errors: List[str] = []
-                for v in values:
-                    if v in (None, '', col_meta.get('Missing Value Representation', '')):
+            column = columns_of(rows)
+            slices = _budget_slices(accumulators, row_rules, column, len(rows), options, budget)
+            for start, stop in slices:
+                if start == stop:
+                    continue
+                part = rows
+                if len(slices) > 1:
+                    part = rows[start:stop]
+                    column = columns_of(part)
+                for acc in accumulators:
+                    validate_column_vectorized(acc, column(acc.plan.name), n_rows)
+                for rule in row_rules:
+                    rule.add_batch([column(col) for col in rule.columns], n_rows)
+                for check in key_checks:
+                    if check.columns is None:
+                        add_key = check.adder()
+                        for row in part:
+                            add_key(_raw_row_key(None, row, positions, n_fields))
+                    else:
+                        check.add_batch([column(col) for col in check.columns])
+                n_rows += len(part)
+    except ErrorLimitReached:
+        pass
+    return n_rows, accumulators
+
+
+def _validate_columnar(
+    file_path: str,
+    fieldnames: List[str],
+    column_plans: List[ColumnPlan],
+    options: CheckOptions,
+    key_checks: Sequence[UniqueKeyCheck] = (),
+    batch_rows: int = VECTORIZED_BATCH_ROWS,
+    budget: Optional[ErrorBudget] = None
+) -> Tuple[int, List[ColumnAccumulator]]:
+    """
+    Validates a Parquet or Arrow file, reading only the dictionary columns
+    present in it and the columns of its unique keys. Values arrive as the
+    strings a CSV export would hold, so both engines report exactly what
+    they would for that CSV. Reading stops at the first violation beyond budget.
+    """
+    names = list(dict.fromkeys(fieldnames))
+    accumulators = [ColumnAccumulator(col, options, budget) for col in column_plans if col.name in names]
+    row_rules = _row_rule_checks(accumulators, column_plans, options, set(names))
+    if any(check.columns is None for check in key_checks):
+        projection = names
+    else:
+        wanted = set(acc.plan.name for acc in accumulators)
+        wanted.update(col for check in key_checks for col in check.columns or ())
+        wanted.update(col for rule in row_rules for col in rule.columns)
+        projection = [name for name in names if name in wanted]
+    positions = {name: i for i, name in enumerate(projection)}
+    n_rows = 0
+    try:
+        for batch in iter_columnar_batches(file_path, projection, batch_rows):
+            n_batch = len(batch[0]) if batch else 0
+            slices = _budget_slices(accumulators, row_rules, lambda name: batch[positions[name]],
+                                    n_batch, options, budget)
+            for start, stop in slices:
+                if start == stop:
+                    continue
+                columns = batch if len(slices) == 1 else [values[start:stop] for values in batch]
+                for acc in accumulators:
+                    values = columns[positions[acc.plan.name]]
+                    if options.vectorized:
+                        validate_column_vectorized(acc, values, n_rows)
+                    else:
+                        add = acc.adder()
+                        for row_index, v in enumerate(values, n_rows):
+                            add(row_index, v)
+                for rule in row_rules:
+                    arrays = [columns[positions[col]] for col in rule.columns]
+                    if options.vectorized:
+                        rule.add_batch(arrays, n_rows)
+                    else:
+                        for row_index, row_values in enumerate(zip(*arrays), n_rows):
+                            rule.add(row_index, row_values)
+                for check in key_checks:
+                    if check.columns is None:
+                        add_key = check.adder()
+                        for key in zip(*columns):
+                            add_key(key)
+                    else:
+                        check.add_batch([columns[positions[col]] for col in check.columns])
+                n_rows += stop - start
+    except ErrorLimitReached:
+        pass
+    return n_rows, accumulators
+
+
+def _validate_json(
+    file_path: str,
+    column_plans: List[ColumnPlan],
+    options: CheckOptions,
+    unique_keys: List[Any],
+    batch_rows: int = VECTORIZED_BATCH_ROWS,
+    budget: Optional[ErrorBudget] = None,
+    foreign_keys: Sequence[ForeignKey] = ()
+) -> Tuple[List[str], int, List[ColumnAccumulator], List[str], List[Any]]:
+    """
+    Validates the flattened records of a JSON array or JSON Lines file, one
+    record (python engine) or batch of records (vectorized engine) at a
+    time. A field absent from a record counts like a missing cell of a short
+    CSV row. Which fields exist is only known at the end, so every
+    dictionary column and key is tracked, and those the file never has are
+    dropped afterwards. Returns the field paths seen, in order of first
+    appearance, the number of records, the accumulators that apply to the
+    fields seen, and the file issues and checks of the keys, as _key_checks
+    would for those fields. Reading stops at the first violation beyond budget.
+    """
+    accumulators = [ColumnAccumulator(col, options, budget) for col in column_plans]
+    # Missing fields read as None, which row rules skip
+    row_rules = _row_rule_checks(accumulators, column_plans, options)
+    key_checks: List[Any] = [
+        UniqueKeyCheck(None if spec == '*' else [spec] if isinstance(spec, str) else list(spec), options)
+        for spec in unique_keys
+    ]
+    fk_issues, fk_checks = _foreign_key_checks(list(foreign_keys), None, column_plans, options, budget)
+    key_checks += fk_checks
+    seen: Dict[str, None] = {}
+    records = iter_json_records(file_path)
+    n_rows = 0
+    try:
+        if options.vectorized:
+            # Only the needed fields are collected per batch, not whole records
+            names = list(dict.fromkeys([acc.plan.name for acc in accumulators] +
+                                       [col for check in key_checks for col in check.columns or ()] +
+                                       [col for rule in row_rules for col in rule.columns]))
+            row_checks = [check.adder() for check in key_checks if check.columns is None]
+            size = batch_rows if budget is None else min(FIRST_BATCH_ROWS, batch_rows)
+            while True:
+                columns: Dict[str, List[Optional[str]]] = {name: [] for name in names}
+                n_batch = 0
+                for flat in itertools.islice(records, size):
+                    for path in flat:
+                        if path not in seen:
+                            seen[path] = None
+                    for name, values in columns.items():
+                        values.append(flat.get(name))
+                    for add_key in row_checks:
+                        add_key(row_key(flat))
+                    n_batch += 1
+                if not n_batch:
+                    break
+                size = min(size * 2, batch_rows)
+                slices = _budget_slices(accumulators, row_rules, columns.__getitem__, n_batch, options, budget)
+                for start, stop in slices:
+                    if start == stop:
                         continue
-                    if dtype == 'integer':
-                        try:
-                            int(v)
-                        except Exception:
-                            type_errors.append(str(v))
-                    elif dtype == 'float' or dtype == 'decimal':
-                        try:
-                            float(v)
-                        except Exception:
-                            type_errors.append(str(v))
-                    elif dtype == 'boolean':
-                        if str(v).lower() not in ['true', 'false', '0', '1', 'yes', 'no']:
-                            type_errors.append(str(v))
-                    elif dtype == 'date':
-                        from datetime import datetime
-                        try:
-                            datetime.fromisoformat(v)
-                        except Exception:
-                            type_errors.append(str(v))
-                if type_errors:
-                    col_issues[col] = col_issues.get(col, []) + [f"Type errors: {type_errors}"]
-            # Allowed Values / Range check
-            allowed = col_meta.get('Allowed Values / Range', '')
-            if allowed:
-                if dtype in ['integer', 'float', 'decimal'] and '-' in allowed:
-                    try:
-                        minv, maxv = allowed.split('-')
-                        minv, maxv = float(minv.strip()), float(maxv.strip())
-                        for v in values:
-                            if v in (None, '', col_meta.get('Missing Value Representation', '')):
-                                continue
-                            try:
-                                fv = float(v)
-                                if fv < minv or fv > maxv:
-                                    col_issues[col] = col_issues.get(col, []) + [f"Out of range: {v}"]
-                            except Exception:
-                                continue
-                    except Exception:
-                        pass
+                    part = columns
+                    if len(slices) > 1:
+                        part = {name: values[start:stop] for name, values in columns.items()}
+                    for acc in accumulators:
+                        validate_column_vectorized(acc, part[acc.plan.name], n_rows)
+                    for rule in row_rules:
+                        rule.add_batch([part[col] for col in rule.columns], n_rows)
+                    for check in key_checks:
+                        if check.columns is not None:
+                            check.add_batch([part[col] for col in check.columns])
+                    n_rows += stop - start
+        else:
+            bound = [(acc.plan.name, acc.adder()) for acc in accumulators]
+            keys = [(check.columns, check.adder()) for check in key_checks]
+            for row_index, flat in enumerate(records):
+                for path in flat:
+                    if path not in seen:
+                        seen[path] = None
+                for col, add in bound:
+                    add(row_index, flat.get(col))
+                for rule in row_rules:
+                    rule.add(row_index, tuple(flat.get(col) for col in rule.columns))
+                for columns, add_key in keys:
+                    add_key(row_key(flat) if columns is None else tuple(flat.get(col) for col in columns))
+                n_rows = row_index + 1
+    except ErrorLimitReached:
+        pass
+    accumulators = [acc for acc in accumulators if acc.plan.name in seen]
+    unique_issues: List[str] = []
+    used: List[Any] = []
+    for check in key_checks:
+        missing = [col for col in check.columns or () if col not in seen]
+        if not missing:
+            used.append(check)
+        elif isinstance(check, ForeignKeyCheck):
+            fk_issues.append(f"Foreign key {check.label} uses columns missing in data: {missing}")
+        else:
+            unique_issues.append(f"Unique key ({', '.join(check.columns)}) uses columns missing in data: {missing}")
+            if check.tracker is not None:
+                check.tracker.close()
+    return list(seen), n_rows, accumulators, unique_issues + fk_issues, used
+
+
+def _build_report(
+    file_issues: List[str],
+    accumulators: List[ColumnAccumulator],
+    key_checks: Sequence[UniqueKeyCheck] = ()
+) -> Dict[str, Any]:
+    key_details: List[Dict[str, Any]] = []
+    for check in key_checks:
+        if check.issues.count:
+            file_issues.extend(format_rule_issues(check.issues))
+            key_details.append(check.issues.to_dict())
+    col_issues: Dict[str, List[str]] = {}
+    issue_details: Dict[str, List[Dict[str, Any]]] = {}
+    for acc in accumulators:
+        rules = acc.rule_issues()
+        if rules:
+            for rule in rules:
+                col_issues.setdefault(acc.plan.name, []).extend(format_rule_issues(rule))
+            issue_details.setdefault(acc.plan.name, []).extend(rule.to_dict() for rule in rules)
+    # Always add file_issues and column_issues to report, even if empty
+    return {
+        'file_issues': file_issues,
+        'column_issues': col_issues,
+        'issue_details': issue_details,
+        'key_issue_details': key_details
+    }
+
+
+def _sketch_report(accumulators: List[ColumnAccumulator]) -> Dict[str, Any]:
+    """The 'sketches' entry of a report: each column's ColumnSketch as a dict."""
+    return {acc.plan.name: acc.sketch.to_dict() for acc in accumulators if acc.sketch is not None}
+
+
+def check_file(
+    file_path: str,
+    columns: List[Any],
+    unique_keys: Optional[List[Any]] = None,
+    options: Optional[CheckOptions] = None,
+    stats: Optional[FileStats] = None,
+    foreign_keys: Optional[List[ForeignKey]] = None
+) -> Dict[str, Any]:
+    """
+    Validates one CSV, JSON (array or JSON Lines), Parquet or Arrow/Feather
+    file against its data dictionary columns in a single streaming pass. Compressed CSV files
+    (gzip, bz2, xz, zstd) are decompressed as they are read; columnar files
+    are read through a memory map, only for the columns the dictionary
+    names. Peak memory depends on the number of columns and rules, not on
+    the number of rows.
+    `columns` may be compiled ColumnPlans or raw data dictionary column dicts.
+    Each rule keeps its violation count but only the first
+    options.max_samples offending values and rows.
+    unique_keys lists composite keys (lists of column names, or "*" for whole
+    rows) that must be unique. Uniqueness keeps 8-byte hashes, spilling them
+    to disk beyond the options' memory budget, and confirms candidate
+    duplicates in a second pass only when there are any.
+    foreign_keys (ForeignKey entries) must find their keys in the key
+    indexes of the files they reference, which options.key_indexes holds
+    (see build_key_indexes).
+    With options.max_errors, the file records at most that many violations,
+    counting file issues such as missing columns first, and reading stops at
+    the first one beyond them; the report is then partial and says so under
+    'stopped'. A file with exactly max_errors violations is read to its end.
+    With options.sketches, a complete report also holds each column's
+    ColumnSketch as a dict under 'sketches'.
+    stats, if given, is filled in with the file's rows, bytes read and time
+    per phase; per column and rule too if options.profile is set.
+    """
+    options = options or CheckOptions()
+    column_plans = _as_column_plans(columns)
+    budget = ErrorBudget(options.max_errors) if options.max_errors is not None else None
+    n_rows = 0
+    accumulators: List[ColumnAccumulator] = []
+    start = time.perf_counter()
+    if is_json_name(file_path):
+        # Missing fields are only known at the end, so they cannot stop reading
+        fieldnames, n_rows, accumulators, key_issues, key_checks = _validate_json(
+            file_path, column_plans, options, unique_keys or [], budget=budget, foreign_keys=foreign_keys or []
+        )
+        file_issues = _file_issues(set(fieldnames), column_plans)
+    elif is_columnar(file_path):
+        fieldnames = read_columnar_schema(file_path)
+        file_issues = _file_issues(set(fieldnames), column_plans)
+        key_issues, key_checks = _key_checks(unique_keys, foreign_keys, fieldnames, column_plans, options, budget)
+        if _spend_file_issues(budget, file_issues + key_issues):
+            n_rows, accumulators = _validate_columnar(
+                file_path, fieldnames, column_plans, options, key_checks, budget=budget
+            )
+    else:
+        with open_text(file_path) as csvfile:
+            if options.vectorized:
+                reader = csv.reader(csvfile)
+                fieldnames = next(reader, None) or []
+                file_issues = _file_issues(set(fieldnames), column_plans)
+                key_issues, key_checks = _key_checks(
+                    unique_keys, foreign_keys, fieldnames, column_plans, options, budget
+                )
+                if _spend_file_issues(budget, file_issues + key_issues):
+                    n_rows, accumulators = _validate_rows_vectorized(
+                        reader, fieldnames, column_plans, options, key_checks, budget=budget
+                    )
+            else:
+                dict_reader = csv.DictReader(csvfile)
+                fieldnames = list(dict_reader.fieldnames or [])
+                data_columns = set(fieldnames)
+                file_issues = _file_issues(data_columns, column_plans)
+                key_issues, key_checks = _key_checks(
+                    unique_keys, foreign_keys, fieldnames, column_plans, options, budget
+                )
+                if _spend_file_issues(budget, file_issues + key_issues):
+                    n_rows, accumulators = _validate_rows(
+                        dict_reader, column_plans, data_columns, options, key_checks, budget
+                    )
+    _flush_foreign_keys(key_checks)
+    stopped = budget is not None and budget.exceeded
+    validated = time.perf_counter()
+    confirmed = _confirm_uniqueness(file_path, fieldnames, accumulators, key_checks, confirm=not stopped)
+    if stats is not None:
+        _record_file_stats(
+            stats, file_path, fieldnames, n_rows, accumulators, key_checks, confirmed,
+            validated - start, time.perf_counter() - validated
+        )
+    report = _build_report(file_issues + key_issues, accumulators, key_checks)
+    if stopped:
+        report['stopped'] = {'rows_checked': n_rows}
+    elif options.sketches:
+        report['sketches'] = _sketch_report(accumulators)
+    return report
+
+
+def _spend_file_issues(budget: Optional[ErrorBudget], issues: List[str]) -> bool:
+    """Spends a file's issues from budget; False if they exceed it, so its rows need not be read."""
+    if budget is None or not issues:
+        return True
+    try:
+        budget.spend(len(issues))
+    except ErrorLimitReached:
+        return False
+    return True
+
+
+def _bytes_read(file_path: str, columns: Optional[List[str]]) -> int:
+    """Bytes one pass over a file reads: all of a text file, on disk, or the given columns of a columnar one."""
+    if columns is not None and is_columnar(file_path):
+        return projected_bytes(file_path, columns)
+    return os.path.getsize(file_path)
+
+
+def _record_file_stats(
+    stats: FileStats,
+    file_path: str,
+    fieldnames: List[str],
+    n_rows: int,
+    accumulators: List[ColumnAccumulator],
+    key_checks: Sequence[UniqueKeyCheck],
+    confirmed: List[KeyTracker],
+    validate_seconds: Optional[float],
+    confirm_seconds: float
+) -> None:
+    """
+    Fills in stats from a file's finished accumulators and key checks.
+    validate_seconds is None for files validated in chunks, whose reading
+    time cannot be told apart from the work of parallel workers.
+    """
+    stats.rows = n_rows
+    stats.columns = {acc.plan.name: acc.stats for acc in accumulators if acc.stats is not None}
+    stats.unique_keys = {check.label: check.seconds for check in key_checks if check.seconds is not None}
+    columns_seconds = sum(column.seconds for column in stats.columns.values())
+    keys_seconds = sum(stats.unique_keys.values())
+    stats.phases = {'columns': columns_seconds, 'unique_keys': keys_seconds, 'confirm': confirm_seconds}
+    if validate_seconds is not None:
+        # Reading and parsing is what validation spent outside the rules
+        stats.phases['read'] = max(validate_seconds - columns_seconds - keys_seconds, 0.0)
+        stats.seconds = validate_seconds + confirm_seconds
+    projection = list(dict.fromkeys(
+        [acc.plan.name for acc in accumulators] + [col for check in key_checks for col in check.columns or ()]
+    ))
+    if any(check.columns is None for check in key_checks):
+        projection = list(dict.fromkeys(fieldnames))
+    stats.bytes_read = _bytes_read(file_path, projection)
+    if confirmed:
+        stats.bytes_read += _bytes_read(file_path, _key_columns(fieldnames, confirmed))
+    stats.peak_rss_mb = peak_rss_mb()
+
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of the bytes [start, end) of a binary file."""
+
+    def __init__(self, raw: BinaryIO, start: int, end: int):
+        self.raw = raw
+        self.raw.seek(start)
+        self.remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b: Any) -> int:
+        if self.remaining <= 0:
+            return 0
+        view = memoryview(b)[:self.remaining]
+        n = self.raw.readinto(view) or 0
+        self.remaining -= n
+        return n
+
+
+class CsvChunkLayout:
+    """Header and record-aligned byte ranges of a CSV file split for parallel validation."""
+
+    def __init__(self, fieldnames: List[str], ranges: List[Tuple[int, int]]):
+        self.fieldnames = fieldnames
+        self.ranges = ranges
+
+
+def find_record_boundaries(file_path: str, chunk_size: int, block_size: int = 1 << 20) -> List[int]:
+    """
+    Returns byte offsets just past a record-terminating newline: the end of the
+    header, then roughly every chunk_size bytes.
+    A newline ends a record only if the number of quote characters before it
+    is even, so newlines inside quoted fields never split a record. Counting
+    quotes runs at memory speed, far faster than parsing the CSV.
+    """
+    boundaries: List[int] = []
+    target = 0
+    quotes = 0
+    offset = 0
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            counted = 0
+            search = max(target - offset, 0)
+            while search < len(block):
+                nl = block.find(b'\n', search)
+                if nl < 0:
+                    break
+                quotes += block.count(b'"', counted, nl)
+                counted = nl
+                if quotes % 2 == 0:
+                    boundary = offset + nl + 1
+                    boundaries.append(boundary)
+                    target = boundary + chunk_size
+                    search = target - offset
                 else:
-                    allowed_vals = [a.strip() for a in allowed.split(',') if a.strip()]
-                    if allowed_vals:
-                        for v in values:
-                            if v in (None, '', col_meta.get('Missing Value Representation', '')):
-                                continue
-                            if v not in allowed_vals:
-                                col_issues[col] = col_issues.get(col, []) + [f"Invalid value: {v}"]
-            # Constraints / Validation Rules (basic: unique, not null)
-            constraints = col_meta.get('Constraints / Validation Rules', '').lower()
-            if 'unique' in constraints:
-                seen: Set[str] = set()
-                dups: Set[str] = set()
-                for v in values:
-                    if v in seen:
-                        dups.add(str(v))
+                    search = nl + 1
+            quotes += block.count(b'"', counted)
+            offset += len(block)
+    return boundaries
+
+
+def plan_csv_chunks(file_path: str, chunk_size: int) -> Optional[CsvChunkLayout]:
+    """
+    Splits a CSV file into record-aligned byte ranges of about chunk_size bytes.
+    Returns None when the file is too small to be worth splitting, is not a
+    plain CSV file (columnar, JSON or compressed), or its header cannot be
+    located.
+    """
+    if is_columnar(file_path) or is_json_name(file_path):
+        return None
+    size = os.path.getsize(file_path)
+    # Compressed streams have no byte offsets to split at
+    if size <= chunk_size or detect_compression(file_path) is not None:
+        return None
+    boundaries = find_record_boundaries(file_path, chunk_size)
+    if len(boundaries) < 2:
+        return None
+    with open(file_path, 'rb') as f:
+        header = f.read(boundaries[0]).decode('utf-8')
+    fieldnames = next(csv.reader(io.StringIO(header, newline='')), [])
+    if not fieldnames:
+        return None
+    starts = boundaries
+    ends = boundaries[1:] + [size]
+    ranges = [(start, end) for start, end in zip(starts, ends) if end > start]
+    return CsvChunkLayout(fieldnames, ranges)
+
+
+def check_file_chunk(
+    file_path: str,
+    fieldnames: List[str],
+    columns: List[Any],
+    start: int,
+    end: int,
+    options: Optional[CheckOptions] = None,
+    unique_keys: Optional[List[Any]] = None,
+    foreign_keys: Optional[List[ForeignKey]] = None
+) -> Tuple[int, List[ColumnAccumulator], List[Any], bool]:
+    """
+    Validates the records in bytes [start, end) of a CSV file whose header is
+    fieldnames. Row indices in the returned accumulators are relative to the
+    chunk; merge_chunk_results shifts them to file-global indices. The last
+    element is True if options.max_errors stopped the chunk early.
+    """
+    options = options or CheckOptions()
+    column_plans = _as_column_plans(columns)
+    budget = ErrorBudget(options.max_errors) if options.max_errors is not None else None
+    _, key_checks = _key_checks(unique_keys, foreign_keys, fieldnames, column_plans, options, budget)
+    with open(file_path, 'rb') as raw:
+        buffered = io.BufferedReader(_ByteRange(raw, start, end), buffer_size=1 << 20)
+        text = io.TextIOWrapper(buffered, encoding='utf-8', newline='')
+        if options.vectorized:
+            n_rows, accumulators = _validate_rows_vectorized(
+                csv.reader(text), fieldnames, column_plans, options, key_checks, budget=budget
+            )
+        else:
+            reader = csv.DictReader(text, fieldnames=fieldnames)
+            n_rows, accumulators = _validate_rows(
+                reader, column_plans, set(fieldnames), options, key_checks, budget
+            )
+    _flush_foreign_keys(key_checks)
+    return n_rows, accumulators, key_checks, budget is not None and budget.exceeded
+
+
+def merge_chunk_results(
+    file_path: str,
+    layout: CsvChunkLayout,
+    columns: List[Any],
+    parts: List[Tuple[int, List[ColumnAccumulator], List[Any], bool]],
+    unique_keys: Optional[List[Any]] = None,
+    options: Optional[CheckOptions] = None,
+    stats: Optional[FileStats] = None,
+    foreign_keys: Optional[List[ForeignKey]] = None
+) -> Dict[str, Any]:
+    """
+    Merges per-chunk results, in file order, into the report a sequential
+    check_file run would produce: row indices become global and duplicate
+    keys spanning chunks are detected. Candidate duplicates are confirmed
+    here, in a single pass over the whole file. A chunk stopped early by
+    options.max_errors ends the report: later chunks are dropped, as their
+    rows cannot be numbered. stats, if given, is filled in as by
+    check_file, except for the wall time, which only the caller knows.
+    """
+    options = options or CheckOptions()
+    column_plans = _as_column_plans(columns)
+    data_columns = set(layout.fieldnames)
+    key_issues, _ = _key_checks(unique_keys, foreign_keys, layout.fieldnames, column_plans, options)
+    merged: List[ColumnAccumulator] = []
+    merged_keys: List[Any] = []
+    row_offset = 0
+    stopped = False
+    for n_rows, accumulators, key_checks, chunk_stopped in parts:
+        if stopped:
+            for acc in accumulators:
+                if acc.unique is not None:
+                    acc.unique.close()
+            for check in key_checks:
+                if check.tracker is not None:
+                    check.tracker.close()
+            continue
+        if not merged and not merged_keys:
+            merged, merged_keys = accumulators, key_checks
+        else:
+            for acc, other in zip(merged, accumulators):
+                acc.merge(other, row_offset)
+            for check, other_check in zip(merged_keys, key_checks):
+                check.merge(other_check, row_offset)
+        row_offset += n_rows
+        stopped = chunk_stopped
+    start = time.perf_counter()
+    confirmed = _confirm_uniqueness(file_path, layout.fieldnames, merged, merged_keys, confirm=not stopped)
+    if stats is not None:
+        _record_file_stats(
+            stats, file_path, layout.fieldnames, row_offset, merged, merged_keys, confirmed,
+            None, time.perf_counter() - start
+        )
+        stats.chunks = len(parts)
+    report = _build_report(_file_issues(data_columns, column_plans) + key_issues, merged, merged_keys)
+    if stopped:
+        report['stopped'] = {'rows_checked': row_offset}
+    elif options.sketches:
+        report['sketches'] = _sketch_report(merged)
+    return report
+
+
+def check_file_sampled(
+    file_path: str,
+    columns: List[Any],
+    unique_keys: Optional[List[Any]] = None,
+    options: Optional[CheckOptions] = None,
+    stats: Optional[FileStats] = None,
+    foreign_keys: Optional[List[ForeignKey]] = None
+) -> Dict[str, Any]:
+    """
+    Validates a seeded random sample of a CSV file's rows, options.sample
+    (see sampling.py), instead of all of them, and estimates each rule's
+    violation rate over the whole file with a Wilson interval, under the
+    report's 'sample' entry. Issues are those of the sampled rows, which
+    are numbered within the sample. Uniqueness only sees duplicates within
+    the sample, and there is no confirmation pass. Files that cannot be
+    seeked into (sampling.sample_unsupported), or that the sample would cover
+    anyway, are checked in full by check_file; their 'sample' entry says
+    why under 'full_scan'.
+    """
+    if options is None or options.sample is None:
+        raise ValueError('check_file_sampled needs options.sample')
+    spec = options.sample
+    reason, start_offset, n_sample = plan_csv_sample(file_path, spec)
+    if reason is not None:
+        report = check_file(
+            file_path, columns, unique_keys=unique_keys, options=options, stats=stats, foreign_keys=foreign_keys
+        )
+        report['sample'] = {'full_scan': reason}
+        return report
+    column_plans = _as_column_plans(columns)
+    budget = ErrorBudget(options.max_errors) if options.max_errors is not None else None
+    with open(file_path, 'rb') as f:
+        header = f.read(start_offset).decode('utf-8')
+    fieldnames = next(csv.reader(io.StringIO(header, newline='')), [])
+    file_issues = _file_issues(set(fieldnames), column_plans)
+    key_issues, key_checks = _key_checks(unique_keys, foreign_keys, fieldnames, column_plans, options, budget)
+    start = time.perf_counter()
+    sample = sample_csv_records(file_path, start_offset, n_sample, spec)
+    n_rows = 0
+    accumulators: List[ColumnAccumulator] = []
+    if _spend_file_issues(budget, file_issues + key_issues):
+        text = io.StringIO(sample.text, newline='')
+        if options.vectorized:
+            n_rows, accumulators = _validate_rows_vectorized(
+                csv.reader(text), fieldnames, column_plans, options, key_checks, budget=budget
+            )
+        else:
+            reader = csv.DictReader(text, fieldnames=fieldnames)
+            n_rows, accumulators = _validate_rows(
+                reader, column_plans, set(fieldnames), options, key_checks, budget
+            )
+    _flush_foreign_keys(key_checks)
+    stopped = budget is not None and budget.exceeded
+    validated = time.perf_counter()
+    _confirm_uniqueness(file_path, fieldnames, accumulators, key_checks, confirm=False)
+    if stats is not None:
+        _record_file_stats(
+            stats, file_path, fieldnames, n_rows, accumulators, key_checks, [],
+            validated - start, time.perf_counter() - validated
+        )
+        stats.bytes_read = start_offset + sample.sampled_bytes + sample.scanned_bytes
+    report = _build_report(file_issues + key_issues, accumulators, key_checks)
+    if stopped:
+        report['stopped'] = {'rows_checked': n_rows}
+    report['sample'] = sample_summary(
+        spec, sample, n_rows,
+        {acc.plan.name: {rule.key_label or rule.rule: rule.count for rule in acc.checked_rules()}
+         for acc in accumulators if acc.checked_rules()},
+        {check.label: check.issues.count for check in key_checks if isinstance(check, ForeignKeyCheck)}
+    )
+    return report
+
+
+def _iter_key_batches(
+    file_path: str,
+    columns: List[str],
+    batch_rows: int = VECTORIZED_BATCH_ROWS
+) -> Iterator[List[Sequence[Optional[str]]]]:
+    """Yields the given columns of a CSV, JSON or columnar file in batches of rows; missing cells are None."""
+    if is_json_name(file_path):
+        records = iter_json_records(file_path)
+        while True:
+            batch = list(itertools.islice(records, batch_rows))
+            if not batch:
+                return
+            yield [[flat.get(col) for flat in batch] for col in columns]
+    elif is_columnar(file_path):
+        yield from iter_columnar_batches(file_path, columns, batch_rows)
+    else:
+        with open_text(file_path) as csvfile:
+            reader = csv.reader(csvfile)
+            positions = {name: i for i, name in enumerate(next(reader, None) or [])}
+            for rows, batch_columns in _csv_row_batches(reader, batch_rows):
+                yield _batch_key_columns(columns, batch_columns, positions, len(rows))
+
+
+def _file_columns(file_path: str) -> Optional[List[str]]:
+    """The header of a CSV file or the schema of a columnar one; None for JSON, whose fields are not declared."""
+    if is_json_name(file_path):
+        return None
+    if is_columnar(file_path):
+        return read_columnar_schema(file_path)
+    with open_text(file_path) as csvfile:
+        return next(csv.reader(csvfile), None) or []
+
+
+def _key_index(ref_plan: Optional[FilePlan], columns: List[str], store: KeyIndexStore) -> Any:
+    """The KeyIndex of columns of a referenced entry, or why there is none."""
+    if ref_plan is None:
+        return 'the referenced file is not in the data dictionary'
+    if not ref_plan.path or not os.path.exists(ref_plan.path):
+        return f'the referenced file {ref_plan.fname} is missing'
+    try:
+        fieldnames = _file_columns(ref_plan.path)
+        missing = [col for col in columns if fieldnames is not None and col not in fieldnames]
+        if missing:
+            return f'columns missing in {ref_plan.fname}: {missing}'
+        null_values = _null_values(ref_plan.columns, columns)
+
+        def read_keys() -> Iterator[List[Sequence[Optional[str]]]]:
+            for key_columns in _iter_key_batches(ref_plan.path, columns):
+                yield drop_missing(key_columns, null_values)[1]
+        return store.get(ref_plan.path, columns, read_keys)
+    except Exception as e:
+        return f'could not index {ref_plan.fname}: {e}'
+
+
+def build_key_indexes(plan: ValidationPlan, store: KeyIndexStore) -> Dict[Tuple[str, Tuple[str, ...]], Any]:
+    """
+    Builds, or reuses from store, the key index of every entry and columns
+    that foreign keys of plan reference, for CheckOptions.key_indexes.
+    Referenced keys with a missing part are not indexed. A reference that
+    cannot be indexed (an unknown entry, a missing file or columns, a read
+    error) maps to the reason, which the referencing files report.
+    """
+    indexes: Dict[Tuple[str, Tuple[str, ...]], Any] = {}
+    for file_plan in plan.files.values():
+        for foreign_key in file_plan.foreign_keys:
+            if foreign_key.error is None and foreign_key.reference not in indexes:
+                indexes[foreign_key.reference] = _key_index(
+                    plan.files.get(foreign_key.ref_file), foreign_key.ref_columns, store
+                )
+    return indexes
+
+
+def check_entry(
+    file_plan: FilePlan,
+    options: Optional[CheckOptions] = None,
+    stats: Optional[FileStats] = None
+) -> Dict[str, Any]:
+    """
+    Validates one data dictionary entry, turning a missing file or any failure
+    while reading it into an 'error' report for that file only.
+    """
+    file_path = file_plan.path
+    if not file_path or not file_plan.columns or not os.path.exists(file_path):
+        report = {'error': 'File missing or no columns defined in data dictionary.'}
+    else:
+        try:
+            check = check_file_sampled if options is not None and options.sample is not None else check_file
+            report = check(
+                file_path, file_plan.columns, unique_keys=file_plan.unique_keys, options=options, stats=stats,
+                foreign_keys=file_plan.foreign_keys
+            )
+        except Exception as e:
+            report = {'error': f'Could not check file: {e}'}
+    if stats is not None and 'error' in report:
+        stats.error = report['error']
+    return report
+
+
+def _new_file_stats(file_plan: FilePlan, options: CheckOptions) -> FileStats:
+    return FileStats(file_plan.fname, file_plan.path, options.engine)
+
+
+def _check_entry_with_stats(file_plan: FilePlan, options: CheckOptions) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """check_entry for worker processes: returns the report and its FileStats as a dict."""
+    stats = _new_file_stats(file_plan, options)
+    start = time.perf_counter()
+    report = check_entry(file_plan, options, stats)
+    stats.seconds = time.perf_counter() - start
+    return report, stats.to_dict()
+
+
+def _iter_entries_parallel(
+    file_plans: List[FilePlan],
+    jobs: int,
+    chunk_size: Optional[int],
+    options: Optional[CheckOptions] = None
+) -> Iterator[Tuple[FilePlan, Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """
+    Runs check_entry for each file plan in a process pool, yielding each
+    file's plan, report and (with options.profile) FileStats dict as its
+    result arrives. CSV files larger than chunk_size are split into
+    record-aligned byte ranges that are validated in separate workers and
+    merged back in file order; their stats report the wall time from
+    submitting their chunks to the merged result.
+    If a worker process dies, the pool is broken for every pending file, so
+    those files are retried one at a time in fresh single-worker pools and
+    only the file that actually crashes is reported as errored.
+    Closing the iterator early cancels the files not yet started.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    options = options or CheckOptions()
+    retry: List[FilePlan] = []
+    tasks: List[Tuple[FilePlan, Optional[CsvChunkLayout]]] = []
+
+    def failed(file_plan: FilePlan, report: Dict[str, Any]) -> Tuple[FilePlan, Dict[str, Any], Optional[Dict[str, Any]]]:
+        if not options.profile:
+            return file_plan, report, None
+        stats = _new_file_stats(file_plan, options)
+        stats.error = report['error']
+        return file_plan, report, stats.to_dict()
+
+    for file_plan in file_plans:
+        layout = None
+        if chunk_size and file_plan.columns and file_plan.path and os.path.exists(file_plan.path):
+            try:
+                layout = plan_csv_chunks(file_plan.path, chunk_size)
+            except Exception as e:
+                yield failed(file_plan, {'error': f'Could not check file: {e}'})
+                continue
+        tasks.append((file_plan, layout))
+    entry_task: Any = _check_entry_with_stats if options.profile else check_entry
+    n_tasks = sum(len(layout.ranges) if layout else 1 for _, layout in tasks)
+    if n_tasks:
+        with ProcessPoolExecutor(max_workers=min(jobs, n_tasks)) as pool:
+            try:
+                submitted = []
+                for file_plan, layout in tasks:
+                    if layout is None:
+                        futures = [pool.submit(entry_task, file_plan, options)]
                     else:
-                        seen.add(str(v))
-                if dups:
-                    col_issues[col] = col_issues.get(col, []) + [f"Duplicate values: {sorted(list(dups))}"]
-            if 'not null' in constraints or 'cannot be null' in constraints:
-                nulls = [i for i, v in enumerate(values) if v in (None, '', col_meta.get('Missing Value Representation', ''))]
-                if nulls:
-                    col_issues[col] = col_issues.get(col, []) + [f"Null/missing values at rows: {nulls}"]
-        # Always add file_issues and column_issues to report, even if empty
-        report[fname] = {
-            'file_issues': file_issues,
-            'column_issues': col_issues
-        }
+                        futures = [
+                            pool.submit(
+                                check_file_chunk, file_plan.path, layout.fieldnames, file_plan.columns,
+                                start, end, options, file_plan.unique_keys, file_plan.foreign_keys
+                            )
+                            for start, end in layout.ranges
+                        ]
+                    submitted.append((file_plan, layout, futures, time.perf_counter()))
+                for file_plan, layout, futures, submitted_at in submitted:
+                    try:
+                        parts = [future.result() for future in futures]
+                    except BrokenProcessPool:
+                        retry.append(file_plan)
+                        continue
+                    except Exception as e:
+                        yield failed(file_plan, {'error': f'Could not check file: {e}'})
+                        continue
+                    if layout is None:
+                        yield (file_plan, *parts[0]) if options.profile else (file_plan, parts[0], None)
+                        continue
+                    stats = _new_file_stats(file_plan, options) if options.profile else None
+                    report = merge_chunk_results(
+                        file_plan.path, layout, file_plan.columns, parts, file_plan.unique_keys, options, stats,
+                        file_plan.foreign_keys
+                    )
+                    if stats is None:
+                        yield file_plan, report, None
+                    else:
+                        stats.seconds = time.perf_counter() - submitted_at
+                        stats.error = report.get('error')
+                        yield file_plan, report, stats.to_dict()
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+    for file_plan in retry:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            try:
+                result = pool.submit(entry_task, file_plan, options).result()
+            except Exception as e:
+                yield failed(file_plan, {'error': f'Worker crashed while checking file: {e!r}'})
+                continue
+        yield (file_plan, *result) if options.profile else (file_plan, result, None)
+
+
+def report_error_count(report: Dict[str, Any]) -> int:
+    """
+    Number of violations in a file's report: each rule's full count, each
+    other file issue, or 1 for a file that could not be checked.
+    """
+    if 'error' in report:
+        return 1
+    if 'skipped' in report:
+        return 0
+    key_details = report.get('key_issue_details', [])
+    count = len(report['file_issues']) - len(key_details) + sum(detail['count'] for detail in key_details)
+    for details in report['issue_details'].values():
+        count += sum(detail['count'] for detail in details)
+    return count
+
+
+def _rule_messages(details: Dict[str, Any]) -> List[str]:
+    rule = RuleIssues(details['rule'], None, details.get('key', details.get('constraint', '')))
+    rule.count = details['count']
+    rule.samples = details['samples']
+    rule.rows = details['rows']
+    return format_rule_issues(rule)
+
+
+def iter_report_issues(fname: str, report: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Yields a file report's issues as flat, JSON-ready records, each with the
+    file name, a kind ('error', 'file', 'key', 'column', 'stopped',
+    'skipped' or 'sample') and its report messages. Key and column records
+    also carry their rule's details (count, samples, rows, row_ranges,
+    truncated), and sample records the estimates of check_file_sampled.
+    """
+    if 'error' in report:
+        yield {'file': fname, 'kind': 'error', 'messages': [report['error']]}
+        return
+    if 'skipped' in report:
+        yield {'file': fname, 'kind': 'skipped', 'messages': [report['skipped']]}
+        return
+    key_details = report['key_issue_details']
+    # _build_report appends one message per key rule after the other file issues
+    n_plain = len(report['file_issues']) - len(key_details)
+    for message in report['file_issues'][:n_plain]:
+        yield {'file': fname, 'kind': 'file', 'messages': [message]}
+    for details in key_details:
+        yield dict(details, file=fname, kind='key', messages=_rule_messages(details))
+    for column, column_details in report['issue_details'].items():
+        for details in column_details:
+            yield dict(details, file=fname, kind='column', column=column, messages=_rule_messages(details))
+    if 'stopped' in report:
+        yield dict(report['stopped'], file=fname, kind='stopped', messages=[_stopped_message(report['stopped'])])
+    if 'sample' in report:
+        yield dict(report['sample'], file=fname, kind='sample', messages=sample_messages(report['sample']))
+
+
+def _stopped_message(stopped: Dict[str, Any]) -> str:
+    return f"Stopped at the error limit after {stopped['rows_checked']} fully checked rows; later rows were not checked"
+
+
+def _report_summary(report: Dict[str, Any]) -> Dict[str, Any]:
+    """What quality_check_tabular_data keeps of a file's report with keep_report=False."""
+    summary = {key: report[key] for key in ('error', 'stopped', 'skipped', 'sample') if key in report}
+    summary['issue_count'] = report_error_count(report)
+    return summary
+
+
+def _reference_fingerprints(file_plan: FilePlan, options: CheckOptions) -> Optional[List[Any]]:
+    """
+    What a file's foreign key checks depend on besides the file itself, for
+    its result cache key: each referenced file's fingerprint, or why it has
+    no index. None if a referenced file changed too recently to be trusted.
+    """
+    references: List[Any] = []
+    for foreign_key in file_plan.foreign_keys:
+        index = options.key_indexes.get(foreign_key.reference)
+        if isinstance(index, KeyIndex):
+            if index.fingerprint is None:
+                return None
+            index = index.fingerprint
+        references.append([foreign_key.label, index])
+    return references
+
+
+def quality_check_tabular_data(
+    data_dir: str,
+    data_dictionary_path: str,
+    plan: Optional[ValidationPlan] = None,
+    jobs: Optional[int] = 1,
+    chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE,
+    cache: Optional[ResultCache] = None,
+    options: Optional[CheckOptions] = None
+) -> Dict[str, Any]:
+    """
+    Checks tabular data files in data_dir against the data dictionary.
+    Returns a report dict with file-level and column-level issues.
+    A precompiled plan may be passed to skip loading the dictionary.
+    With jobs > 1 (or jobs=0/None for one per CPU) files are checked in a
+    process pool; the report keeps data dictionary order either way.
+    In parallel runs, CSV files larger than chunk_size bytes are additionally
+    split into chunks validated by separate workers (chunk_size=None disables
+    this); issues report the same rows as a sequential run.
+    With a ResultCache, files whose fingerprint and column specs are unchanged
+    reuse their cached report instead of being read again. Foreign key
+    indexes are built before any file is checked, in the cache's directory
+    if there is one. options (CheckOptions) holds every other setting; the
+    caller's options are not changed.
+    """
+    options = copy.copy(options) if options is not None else CheckOptions()
+    if options.sample is not None and options.sketch_path is not None:
+        raise ValueError('Sketches need every row; they cannot be built from a sample')
+    hooks, on_issue, keep_report = options.hooks, options.on_issue, options.keep_report
+    # Workers are sent the options without the callbacks, which run here
+    options.hooks = options.on_issue = None
+    run_start = time.perf_counter()
+    options.profile = hooks is not None
+    options.sketches = options.sketch_path is not None
+    max_errors = options.max_errors
+    if plan is None:
+        plan = load_plan(data_dictionary_path)
+    file_plans = list(plan.files.values())
+    if options.sample is not None:
+        chunk_size = None
+        options.sample = allocate_files(options.sample, [file_plan.path for file_plan in file_plans])
+    index_tempdir = None
+    if any(file_plan.foreign_keys for file_plan in file_plans):
+        if cache is not None:
+            index_dir = os.path.join(cache.cache_dir, INDEX_DIR_NAME)
+        else:
+            import tempfile
+            index_tempdir = tempfile.TemporaryDirectory(prefix='fairy-keys-', dir=options.spill_dir)
+            index_dir = index_tempdir.name
+        content_hash = cache is not None and cache.content_hash
+        options.key_indexes = build_key_indexes(
+            plan, KeyIndexStore(index_dir, options.unique_memory_bytes, options.spill_dir, content_hash)
+        )
+    results: Dict[str, Dict[str, Any]] = {}
+    file_stats: Dict[str, Dict[str, Any]] = {}
+    cache_keys: Dict[str, str] = {}
+    snapshot = SnapshotBuilder(options.sketch_path) if options.sketch_path is not None else None
+    n_errors = 0
+
+    def deliver(file_plan: FilePlan, file_report: Dict[str, Any], stats: Optional[Dict[str, Any]]) -> None:
+        nonlocal n_errors
+        fname = file_plan.fname
+        key = cache_keys.get(fname)
+        if cache is not None and key is not None and 'error' not in file_report and 'stopped' not in file_report:
+            cache.put(key, file_report)
+        if snapshot is not None:
+            file_report = snapshot.take(fname, file_plan.path, file_report)
+        n_errors += report_error_count(file_report)
+        if on_issue is not None:
+            for issue in iter_report_issues(fname, file_report):
+                on_issue(issue)
+        if hooks is not None and stats is not None:
+            file_stats[fname] = stats
+            hooks.file_checked(fname, stats)
+        results[fname] = file_report if keep_report else _report_summary(file_report)
+
+    def limit_reached() -> bool:
+        return max_errors is not None and n_errors >= max_errors
+
+    pending: List[FilePlan] = []
+    for file_plan in file_plans:
+        if cache is not None and file_plan.path and file_plan.columns and os.path.exists(file_plan.path):
+            settings = dict(options.report_settings(), unique_keys=file_plan.unique_keys)
+            if options.sample is not None:
+                settings['sample_rows'] = options.sample.allocation.get(file_plan.path)
+            references = _reference_fingerprints(file_plan, options)
+            if references:
+                settings['foreign_keys'] = references
+            key = cache.key(file_plan.path, file_plan.columns_meta, settings) if references is not None else None
+            if key is not None:
+                cached = cache.get(key)
+                if cached is not None:
+                    stats = None
+                    if hooks is not None:
+                        cached_stats = _new_file_stats(file_plan, options)
+                        cached_stats.cached = True
+                        stats = cached_stats.to_dict()
+                    deliver(file_plan, cached, stats)
+                    continue
+                cache_keys[file_plan.fname] = key
+        pending.append(file_plan)
+    if not jobs:
+        jobs = os.cpu_count() or 1
+    if jobs > 1 and pending and not limit_reached():
+        entries = _iter_entries_parallel(pending, jobs, chunk_size, options)
+        for file_plan, file_report, stats in entries:
+            deliver(file_plan, file_report, stats)
+            if limit_reached():
+                entries.close()
+                break
+    else:
+        for file_plan in pending:
+            if limit_reached():
+                break
+            if max_errors is not None:
+                # Sequential runs stop exactly at max_errors across files
+                options.max_errors = max_errors - n_errors
+            if hooks is not None:
+                deliver(file_plan, *_check_entry_with_stats(file_plan, options))
+            else:
+                deliver(file_plan, check_entry(file_plan, options), None)
+    report: Dict[str, Any] = {}
+    for file_plan in file_plans:
+        if file_plan.fname not in results:
+            skipped = {'skipped': f'Not checked: the error limit ({max_errors}) was reached'}
+            if on_issue is not None:
+                for issue in iter_report_issues(file_plan.fname, skipped):
+                    on_issue(issue)
+            results[file_plan.fname] = skipped if keep_report else _report_summary(skipped)
+        report[file_plan.fname] = results[file_plan.fname]
+    if hooks is not None:
+        ordered = {file_plan.fname: file_stats[file_plan.fname] for file_plan in file_plans
+                   if file_plan.fname in file_stats}
+        hooks.run_finished(summarize_run(ordered, options.engine, jobs, time.perf_counter() - run_start))
+    if index_tempdir is not None:
+        index_tempdir.cleanup()
+    if snapshot is not None:
+        snapshot.write([file_plan.fname for file_plan in file_plans])
     return report
 
-if __name__ == '__main__':
-    import os
-    import sys
-    config_path = os.environ.get('FAIRY_CONFIG', '.project_config.json')
-    dict_path = os.environ.get('FAIRY_DD_OUT', 'docs/data_dictionaries/data_dictionary.json')
-    # Load config to get data directory
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = json.load(f)
-    data_dir = config.get('data_directory_name', 'data')
-    report = quality_check_tabular_data(data_dir, dict_path)
+
+def print_report(report: Dict[str, Any]) -> bool:
+    """Prints a quality-check report for humans; returns True if any file has issues."""
     any_errors = False
     for fname, issues in report.items():
         print(f'File: {fname}')
@@ -133,6 +2433,9 @@ if __name__ == '__main__':
             print('  ERROR:', issues['error'])
             any_errors = True
             continue
+        if 'skipped' in issues:
+            print('  Skipped:', issues['skipped'])
+            continue
         if issues['file_issues']:
             for issue in issues['file_issues']:
                 print('  File issue:', issue)
@@ -142,10 +2445,84 @@ if __name__ == '__main__':
                 for col_issue in col_issues:
                     print(f'  Column {col}:', col_issue)
                     any_errors = True
+        if 'stopped' in issues:
+            print('  ' + _stopped_message(issues['stopped']))
+        if 'sample' in issues:
+            for message in sample_messages(issues['sample']):
+                print('  ' + message)
         if not issues['file_issues'] and not issues['column_issues'] and 'error' not in issues:
             print('  All checks passed.')
     if not any_errors:
         print('\nAll files passed all quality checks!')
     else:
         print('\nSome files have issues. See above.')
-    sys.exit(1 if any_errors else 0)
+    return any_errors
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs the quality check from the command line; returns the exit status."""
+    import argparse
+    config_path = os.environ.get('FAIRY_CONFIG', '.project_config.json')
+    dict_path = os.environ.get('FAIRY_DD_OUT', 'docs/data_dictionaries/data_dictionary.json')
+    # Load config to get data directory
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    data_dir = config.get('data_directory_name', 'data')
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=1, help='Number of files to check in parallel (0 = one per CPU)')
+    parser.add_argument('--cache', nargs='?', const='.fairy_cache', default=None, metavar='DIR', help='Reuse results for unchanged files from this cache directory')
+    parser.add_argument('--cache-max-mb', type=int, default=256, help='Cache size limit in MiB')
+    parser.add_argument('--cache-content-hash', action='store_true', help='Also hash file contents when fingerprinting')
+    parser.add_argument('--engine', choices=['python', 'vectorized'], default='python', help='Validation engine (vectorized uses pandas)')
+    parser.add_argument('--max-samples', type=int, default=20, help='Offending values/rows shown per rule and column')
+    parser.add_argument('--full-detail', action='store_true', help='Report every offending value and row')
+    parser.add_argument('--unique-memory-mb', type=int, default=64, help='Memory for uniqueness checks per key before spilling to disk, in MiB')
+    parser.add_argument('--spill-dir', default=None, help='Directory for uniqueness spill files (default: system temp)')
+    parser.add_argument('--profile-out', default=None, metavar='PATH', help='Write time, rows, bytes and memory per file, column and rule as JSON')
+    parser.add_argument('--max-errors', type=int, default=None, metavar='N', help='Stop reading files and rows once N violations were found')
+    parser.add_argument('--fail-fast', action='store_true', help='Stop at the first violation (--max-errors 1)')
+    parser.add_argument('--ndjson-out', default=None, metavar='PATH', help="Stream issues to PATH as JSON Lines ('-' for stdout) instead of printing the report")
+    parser.add_argument('--sample', default=None, metavar='SPEC', help="Check a random sample of each CSV file's rows: a total row count (10000), a percentage (5%%) or a fraction (0.05)")
+    parser.add_argument('--sample-seed', type=int, default=0, help='Seed of the --sample seeks; the same seed reads the same rows')
+    parser.add_argument('--rows-per-seek', type=int, default=DEFAULT_ROWS_PER_SEEK, help='Consecutive rows --sample reads after each seek')
+    parser.add_argument('--sketch-out', nargs='?', const=os.path.join(os.path.dirname(dict_path), SKETCH_FILE_NAME), default=None, metavar='PATH', help='Save per-column sketches (count, nulls, min/max, distinct, quantiles) for fairy --drift (default: next to the data dictionary)')
+    parser.add_argument('--date-format', default=None, metavar='FORMAT', help="Format of 'date' columns without a 'Date Format' of their own, e.g. YYYY-MM-DD (default: ISO 8601)")
+    args, _ = parser.parse_known_args(argv)
+    max_errors = 1 if args.fail_fast else args.max_errors
+    if max_errors is not None and max_errors < 1:
+        parser.error('--max-errors must be at least 1')
+    sample = None
+    if args.sample is not None and args.sketch_out is not None:
+        parser.error('--sketch-out needs every row, so it cannot be combined with --sample')
+    if args.sample is not None:
+        try:
+            sample = parse_sample(args.sample, args.sample_seed, args.rows_per_seek)
+        except ValueError as e:
+            parser.error(str(e))
+    sink = NdjsonIssueWriter(args.ndjson_out) if args.ndjson_out else None
+    cache = None
+    if args.cache:
+        cache = ResultCache(args.cache, args.cache_max_mb * 1024 * 1024, args.cache_content_hash)
+    options = CheckOptions(
+        args.engine, None if args.full_detail else args.max_samples, args.unique_memory_mb * 1024 * 1024,
+        args.spill_dir, max_errors=max_errors, date_format=args.date_format, sample=sample,
+        sketch_path=args.sketch_out, hooks=ProfileWriter(args.profile_out) if args.profile_out else None,
+        on_issue=sink, keep_report=sink is None
+    )
+    report = quality_check_tabular_data(data_dir, dict_path, jobs=args.jobs, cache=cache, options=options)
+    if sink is None:
+        return 1 if print_report(report) else 0
+    n_issues = sum(summary['issue_count'] for summary in report.values())
+    sink.close({
+        'files': len(report),
+        'issues': n_issues,
+        'stopped': any('stopped' in summary or 'skipped' in summary for summary in report.values()),
+    })
+    if args.ndjson_out != '-':
+        print(f'{n_issues} issues in {len(report)} files written to {args.ndjson_out}')
+    return 1 if n_issues else 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+# Bump when the checks change in a way that makes old cached reports stale
+CACHE_VERSION = 3
+DEFAULT_CACHE_DIR = '.fairy_cache'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Files modified this recently may still change within the same mtime tick,
+# so their results are not cached
+RACY_WINDOW_SECONDS = 2.0
+
+
+def file_fingerprint(file_path: str, content_hash: bool = False) -> Dict[str, Any]:
+    """
+    Returns size and mtime of a file, plus a SHA-256 of its contents when
+    content_hash is set. Without the hash this costs a single stat call.
+    """
+    st = os.stat(file_path)
+    fingerprint: Dict[str, Any] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    if content_hash:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        fingerprint['sha256'] = digest.hexdigest()
+    return fingerprint
+
+
+def rules_hash(columns_meta: List[Dict[str, Any]]) -> str:
+    """Hashes a file's column specs from the data dictionary."""
+    payload = json.dumps(columns_meta, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent per-file quality-check results stored under cache_dir.
+    Entries are keyed by the data file's path and fingerprint plus the hash of
+    its column specs, so any change to the data or its rules is a miss. When
+    the cache grows beyond max_bytes the least recently used entries are
+    evicted.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        content_hash: bool = False
+    ):
+        self.cache_dir = cache_dir
+        self.results_dir = os.path.join(cache_dir, 'results')
+        self.max_bytes = max_bytes
+        self.content_hash = content_hash
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes: Optional[int] = None
+
+    def key(
+        self,
+        file_path: str,
+        columns_meta: List[Dict[str, Any]],
+        options: Optional[Dict[str, Any]] = None
+    ) -> Optional[str]:
+        """
+        Returns the cache key for a file and its column specs, or None if the
+        file cannot be fingerprinted or was modified too recently to trust.
+        options holds any check settings that change the report.
+        """
+        try:
+            fingerprint = file_fingerprint(file_path, self.content_hash)
+        except OSError:
+            return None
+        if time.time() - fingerprint['mtime_ns'] / 1e9 < RACY_WINDOW_SECONDS:
+            return None
+        payload = json.dumps({
+            'version': CACHE_VERSION,
+            'path': os.path.abspath(file_path),
+            'fingerprint': fingerprint,
+            'rules': rules_hash(columns_meta),
+            'options': options or {},
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.results_dir, key[:2], key + '.json')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached report for key, or None on a miss."""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        # Touch the entry so eviction sees it as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Stores a report under key, then evicts old entries if over budget."""
+        entry_path = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        tmp_path = f'{entry_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, entry_path)
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, _, size in self._entries())
+        else:
+            self._total_bytes += os.path.getsize(entry_path)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _entries(self) -> List[tuple]:
+        entries = []
+        if not os.path.isdir(self.results_dir):
+            return entries
+        for shard in os.scandir(self.results_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.json'):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, entry.path, st.st_size))
+        return entries
+
+    def _evict(self) -> None:
+        """Removes least recently used entries until the cache is 80% of max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        low_water = self.max_bytes * 0.8
+        for _, path, size in entries:
+            if total <= low_water:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
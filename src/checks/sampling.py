@@ -0,0 +1,373 @@
+import copy
+import math
+import os
+import random
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .columnar import is_columnar
+    from .compressed_io import detect_compression
+    from .json_records import is_json_name
+except ImportError:  # executed as a script
+    from columnar import is_columnar
+    from compressed_io import detect_compression
+    from json_records import is_json_name
+
+# Consecutive rows read after each seek; fewer rows per seek spread the
+# sample more evenly, more make each seek cheaper per row
+DEFAULT_ROWS_PER_SEEK = 16
+# Bytes read after the header to estimate a file's row length
+PILOT_BYTES = 1 << 16
+# Confidence of the violation rate intervals, and its two-sided z
+CONFIDENCE = 0.95
+DEFAULT_Z = 1.959964
+
+
+def wilson_interval(violations: int, n: int, z: float = DEFAULT_Z) -> Tuple[float, float]:
+    """
+    Wilson score interval of a violation rate observed as violations out of
+    n rows. Unlike the normal approximation it stays within [0, 1] and is
+    informative for rates near 0, e.g. no violation in 1000 rows gives
+    [0, 0.38%] at 95%.
+    """
+    if n <= 0:
+        return 0.0, 1.0
+    p = violations / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    # Exact at the ends, where rounding would leave the bound a hair off
+    low = 0.0 if violations == 0 else max(0.0, centre - half)
+    high = 1.0 if violations == n else min(1.0, centre + half)
+    return low, high
+
+
+class SampleSpec:
+    """
+    What a sampled run reads: a number of rows spread over all sampled files
+    in proportion to their size (stratified by file), or a fraction of each
+    file's rows. Within a file the rows come from seeks into equal byte
+    strata, rows_per_seek consecutive rows each, at offsets drawn from a
+    generator seeded with seed and the file's name, so a run is repeatable,
+    wherever the data directory is.
+    Plain data, so it can be pickled to worker processes.
+    """
+
+    def __init__(
+        self,
+        rows: Optional[int] = None,
+        fraction: Optional[float] = None,
+        seed: int = 0,
+        rows_per_seek: int = DEFAULT_ROWS_PER_SEEK
+    ):
+        if (rows is None) == (fraction is None):
+            raise ValueError('A sample needs either a row count or a fraction')
+        if rows is not None and rows < 1:
+            raise ValueError('A sample needs at least one row')
+        if fraction is not None and not 0 < fraction <= 1:
+            raise ValueError('A sample fraction must be in (0, 1]')
+        if rows_per_seek < 1:
+            raise ValueError('rows_per_seek must be at least 1')
+        self.rows = rows
+        self.fraction = fraction
+        self.seed = seed
+        self.rows_per_seek = rows_per_seek
+        # Rows per file path, set in the copies allocated returns
+        self.allocation: Dict[str, int] = {}
+
+    def allocated(self, sizes: Dict[str, int]) -> 'SampleSpec':
+        """
+        A copy of this spec with a row-count sample split over files (path ->
+        data bytes) in proportion to their size; this spec is not changed.
+        """
+        spec = copy.copy(self)
+        if self.rows is not None:
+            total = sum(sizes.values())
+            spec.allocation = {
+                path: max(math.ceil(self.rows * size / total), 1) if total else self.rows
+                for path, size in sizes.items()
+            }
+        return spec
+
+    def rows_for(self, file_path: str, estimated_rows: float) -> int:
+        """Rows to sample from a file with about estimated_rows rows."""
+        if self.fraction is not None:
+            return max(math.ceil(self.fraction * estimated_rows), 1)
+        return self.allocation.get(file_path, self.rows or 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'rows': self.rows, 'fraction': self.fraction, 'seed': self.seed, 'rows_per_seek': self.rows_per_seek}
+
+
+def parse_sample(text: str, seed: int = 0, rows_per_seek: int = DEFAULT_ROWS_PER_SEEK) -> SampleSpec:
+    """Parses --sample: a row count ('10000', '1e6'), a percentage ('5%') or a fraction below 1 ('0.05')."""
+    text = text.strip()
+    try:
+        if text.endswith('%'):
+            return SampleSpec(fraction=float(text[:-1]) / 100, seed=seed, rows_per_seek=rows_per_seek)
+        value = float(text)
+    except ValueError:
+        raise ValueError(f'Invalid sample {text!r}; expected a row count, a percentage or a fraction')
+    if 0 < value < 1:
+        return SampleSpec(fraction=value, seed=seed, rows_per_seek=rows_per_seek)
+    if value != int(value):
+        raise ValueError(f'Invalid sample {text!r}; a row count must be a whole number')
+    return SampleSpec(rows=int(value), seed=seed, rows_per_seek=rows_per_seek)
+
+
+class CsvSample:
+    """Records read from seeks into a CSV file, with what is needed to scale them up to the file."""
+
+    def __init__(self, text: str, rows: int, seeks: int, sampled_bytes: int, data_bytes: int, scanned_bytes: int = 0):
+        self.text = text
+        self.rows = rows
+        self.seeks = seeks
+        self.sampled_bytes = sampled_bytes
+        self.data_bytes = data_bytes
+        # Bytes between seeks whose quotes were counted (see RecordScanner)
+        self.scanned_bytes = scanned_bytes
+
+    @property
+    def estimated_rows(self) -> float:
+        """The file's rows, estimated from the mean length of the sampled ones."""
+        if not self.rows or not self.sampled_bytes:
+            return 0.0
+        return self.data_bytes * self.rows / self.sampled_bytes
+
+
+def sample_unsupported(file_path: str) -> Optional[str]:
+    """Why a file cannot be sampled by seeking into it, or None for an uncompressed CSV file."""
+    if is_json_name(file_path):
+        return 'JSON records cannot be located by byte offset'
+    if is_columnar(file_path):
+        return 'columnar files are not sampled'
+    if detect_compression(file_path) is not None:
+        return 'compressed streams cannot be seeked into'
+    return None
+
+
+def allocate_files(spec: SampleSpec, paths: Iterable[str]) -> SampleSpec:
+    """spec.allocated over the sizes of those of paths that exist and can be sampled."""
+    return spec.allocated({
+        path: os.path.getsize(path) for path in paths
+        if path and os.path.exists(path) and sample_unsupported(path) is None
+    })
+
+
+def plan_csv_sample(file_path: str, spec: SampleSpec) -> Tuple[Optional[str], int, int]:
+    """
+    Where a CSV file's data starts and how many rows spec samples from it,
+    as (why the file is checked in full instead, or None; data start
+    offset; rows to sample).
+    """
+    reason = sample_unsupported(file_path)
+    if reason is not None:
+        return reason, 0, 0
+    start = data_start(file_path)
+    data_bytes = os.path.getsize(file_path) - start
+    row_bytes = estimate_row_bytes(file_path, start)
+    if row_bytes is None:
+        return 'no complete row to estimate the row length from', start, 0
+    n_sample = spec.rows_for(file_path, data_bytes / row_bytes)
+    if n_sample * row_bytes >= data_bytes:
+        return 'the sample would cover the whole file', start, n_sample
+    return None, start, n_sample
+
+
+def rate_estimate(violations: int, n_rows: int, estimated_rows: float) -> Dict[str, Any]:
+    """A rule's violations in n_rows sampled rows, scaled up to a file of estimated_rows rows."""
+    rate = violations / n_rows if n_rows else 0.0
+    low, high = wilson_interval(violations, n_rows)
+    return {
+        'violations': violations,
+        'rate': rate,
+        'low': low,
+        'high': high,
+        'estimated_count': round(rate * estimated_rows),
+    }
+
+
+def sample_summary(
+    spec: SampleSpec,
+    sample: CsvSample,
+    n_rows: int,
+    column_violations: Dict[str, Dict[str, int]],
+    key_violations: Dict[str, int]
+) -> Dict[str, Any]:
+    """
+    The 'sample' entry of a sampled report: what was read, and the
+    estimated violation rate of each rule (violations per rule label, per
+    column) and of each foreign key (per label).
+    """
+    estimated_rows = sample.estimated_rows
+    return {
+        'rows_sampled': n_rows,
+        'seeks': sample.seeks,
+        'rows_estimated': round(estimated_rows),
+        'seed': spec.seed,
+        'confidence': CONFIDENCE,
+        'estimates': {
+            column: {label: rate_estimate(count, n_rows, estimated_rows) for label, count in rules.items()}
+            for column, rules in column_violations.items()
+        },
+        'key_estimates': {
+            label: rate_estimate(count, n_rows, estimated_rows) for label, count in key_violations.items()
+        },
+    }
+
+
+def sample_messages(summary: Dict[str, Any]) -> List[str]:
+    """A sampled report's 'sample' entry as messages: what was read, then each rule estimated to have violations."""
+    if 'full_scan' in summary:
+        return [f"Not sampled, all rows checked: {summary['full_scan']}"]
+    messages = [
+        f"Sampled {summary['rows_sampled']} of about {summary['rows_estimated']} rows in {summary['seeks']} seeks "
+        f"(seed {summary['seed']}); rows above are numbered within the sample"
+    ]
+    confidence = f"{summary['confidence']:.0%} CI"
+    estimates = [(f'Column {column}: {label}', estimate)
+                 for column, rules in summary['estimates'].items() for label, estimate in rules.items()]
+    estimates += [(f'Foreign key {label}', estimate) for label, estimate in summary['key_estimates'].items()]
+    for name, estimate in estimates:
+        if estimate['violations']:
+            messages.append(
+                f"{name} fails for ~{estimate['rate']:.2%} of rows ({confidence} {estimate['low']:.2%}-"
+                f"{estimate['high']:.2%}), about {estimate['estimated_count']} rows"
+            )
+    return messages
+
+
+class RecordScanner:
+    """
+    Finds where CSV records start in a file read forward from a record
+    start, with the quote parity rule of find_record_boundaries: a newline
+    ends a record only if the quotes before it are balanced. Quotes are
+    counted, not parsed, so skipping ahead runs at memory speed; scanned
+    counts the bytes skipped that way.
+    """
+
+    def __init__(self, f: BinaryIO, pos: int = 0, block_size: int = 1 << 20):
+        self.f = f
+        self.pos = pos
+        self.odd = False
+        self.block_size = block_size
+        self.scanned = 0
+
+    def restart(self, pos: int) -> None:
+        """Moves the scanner to pos, a known record start."""
+        self.pos = pos
+        self.odd = False
+
+    def next_start(self, offset: int) -> int:
+        """The first record start at or after offset (which is not before pos), or the file size."""
+        f = self.f
+        f.seek(self.pos)
+        while self.pos < offset:
+            block = f.read(min(self.block_size, offset - self.pos))
+            if not block:
+                return self.pos
+            self._skip(block)
+        if offset == 0 or not self.odd and self._follows_newline(offset):
+            return offset
+        while True:
+            block = f.read(self.block_size)
+            if not block:
+                return self.pos
+            search = 0
+            while True:
+                nl = block.find(b'\n', search)
+                if nl < 0:
+                    break
+                self.odd ^= block.count(b'"', search, nl) % 2 == 1
+                search = nl + 1
+                if not self.odd:
+                    self._skip(block[:search], counted=True)
+                    return self.pos
+            self._skip(block)
+
+    def _skip(self, block: bytes, counted: bool = False) -> None:
+        if not counted:
+            self.odd ^= block.count(b'"') % 2 == 1
+        self.pos += len(block)
+        self.scanned += len(block)
+
+    def _follows_newline(self, offset: int) -> bool:
+        self.f.seek(offset - 1)
+        preceding = self.f.read(1)
+        return preceding == b'\n'
+
+
+def data_start(file_path: str) -> int:
+    """
+    Byte offset just past the header record of a CSV file. A quoted column
+    name may span lines: the record ends at the first line end outside
+    quotes, where the quotes seen so far are balanced.
+    """
+    with open(file_path, 'rb') as f:
+        return RecordScanner(f).next_start(1)
+
+
+def estimate_row_bytes(file_path: str, start: int) -> Optional[float]:
+    """Mean row length in the first PILOT_BYTES after start; None if there is no complete row there."""
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        block = f.read(PILOT_BYTES)
+    end = block.rfind(b'\n')
+    if end < 0:
+        return None
+    return (end + 1) / block.count(b'\n', 0, end + 1)
+
+
+def sample_csv_records(file_path: str, start: int, n_rows: int, spec: SampleSpec) -> CsvSample:
+    """
+    Reads about n_rows records after the header (which ends at start) with
+    one seek per byte stratum: the data is cut into ceil(n_rows /
+    rows_per_seek) equal strata, and rows_per_seek records are read from the
+    first record that starts after a random offset in each. A RecordScanner
+    counts the quotes between seeks, so records spanning lines are read
+    whole. A stratum whose start the previous seek read past draws its
+    offset from the part left; none is left if that read ran through it.
+    A record is picked with a probability proportional to the length of the
+    record before it, which is close to uniform unless record lengths vary
+    with the errors. No record is read twice.
+    """
+    size = os.path.getsize(file_path)
+    data_bytes = size - start
+    n_seeks = max(math.ceil(n_rows / spec.rows_per_seek), 1)
+    stratum = data_bytes / n_seeks
+    rng = random.Random(f'{spec.seed}:{os.path.basename(file_path)}')
+    chunks: List[bytes] = []
+    rows = 0
+    seeks = 0
+    resume = start
+    with open(file_path, 'rb') as f:
+        scanner = RecordScanner(f, start)
+        for k in range(n_seeks):
+            low = max(start + int(k * stratum), resume)
+            high = start + int((k + 1) * stratum)
+            if low >= high:
+                continue
+            record_start = scanner.next_start(low + rng.randrange(high - low))
+            if record_start >= size:
+                continue
+            seeks += 1
+            f.seek(record_start)
+            for _ in range(spec.rows_per_seek):
+                record = f.readline()
+                if not record:
+                    break
+                quotes = record.count(b'"')
+                while quotes % 2:
+                    line = f.readline()
+                    if not line:
+                        break
+                    quotes += line.count(b'"')
+                    record += line
+                if not record.endswith(b'\n'):
+                    record += b'\n'
+                chunks.append(record)
+                rows += 1
+            resume = f.tell()
+            scanner.restart(resume)
+    sampled = b''.join(chunks)
+    return CsvSample(sampled.decode('utf-8'), rows, seeks, len(sampled), data_bytes, scanner.scanned)
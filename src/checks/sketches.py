@@ -0,0 +1,387 @@
+import base64
+import json
+import math
+import os
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .key_index import drop_missing, hashing_scheme
+    from .uniqueness import hash_key_columns
+except ImportError:  # executed as a script
+    from key_index import drop_missing, hashing_scheme
+    from uniqueness import hash_key_columns
+
+# Bump when the snapshot layout changes in a way that old snapshots cannot be compared
+SKETCH_VERSION = 1
+SKETCH_FILE_NAME = 'column_sketches.json'
+# 2**12 HyperLogLog registers: 4 KiB per column, about 1.6% standard error
+DEFAULT_HLL_PRECISION = 12
+# Quantiles are within 1% of the true value, with at most 2048 buckets per sign
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BUCKETS = 2048
+# Values closer to 0 than this count as 0 in quantile sketches
+MIN_INDEXABLE = 1e-9
+# Values ColumnSketch.add buffers before sketching them as one batch
+SKETCH_BATCH_ROWS = 65536
+_MASK64 = (1 << 64) - 1
+
+
+def _leading_zeros(words: Any) -> Any:
+    """Leading zero bits of each word of a uint64 array (63 for 0), exactly, by binary search."""
+    import numpy as np
+    words = words.copy()
+    zeros = np.zeros(len(words), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high_clear = words < np.uint64(1 << (64 - shift))
+        zeros += high_clear * shift
+        words[high_clear] <<= np.uint64(shift)
+    return zeros
+
+
+class HyperLogLog:
+    """
+    Distinct count estimate from 2**precision registers of 64-bit hashes
+    (hash_key_columns). Merging two sketches is exact: the result is the
+    sketch of the union of their values, whatever the order they were seen in.
+    """
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION, registers: Optional[bytearray] = None):
+        self.precision = precision
+        self.registers = registers if registers is not None else bytearray(1 << precision)
+
+    def add_hashes(self, hashes: Sequence[int]) -> None:
+        p = self.precision
+        max_rank = 64 - p + 1
+        if hasattr(hashes, 'dtype'):
+            import numpy as np
+            words = np.asarray(hashes, dtype=np.uint64)
+            index = (words >> np.uint64(64 - p)).astype(np.intp)
+            ranks = np.minimum(_leading_zeros(words << np.uint64(p)) + 1, max_rank).astype(np.uint8)
+            np.maximum.at(np.frombuffer(self.registers, dtype=np.uint8), index, ranks)
+            return
+        registers = self.registers
+        for word in hashes:
+            rest = (word << p) & _MASK64
+            rank = min(65 - rest.bit_length(), max_rank)
+            index = word >> (64 - p)
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        if other.precision != self.precision:
+            raise ValueError('Cannot merge HyperLogLog sketches of different precision')
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        empty = self.registers.count(0)
+        if estimate <= 2.5 * m and empty:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / empty)
+        return estimate
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'precision': self.precision,
+            'registers': base64.b64encode(zlib.compress(bytes(self.registers))).decode('ascii'),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'HyperLogLog':
+        return cls(data['precision'], bytearray(zlib.decompress(base64.b64decode(data['registers']))))
+
+
+class QuantileSketch:
+    """
+    DDSketch-style quantile sketch: values are counted in logarithmic
+    buckets, so any quantile is returned within relative_accuracy of the
+    true value. Buckets are plain counts, so merging is exact and order does
+    not matter. Beyond max_buckets per sign, the buckets nearest 0 are
+    collapsed into one, which only coarsens the smallest magnitudes.
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY, max_buckets: int = DEFAULT_MAX_BUCKETS):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+
+    def add_many(self, values: Sequence[float]) -> None:
+        """Adds finite values."""
+        self.count += len(values)
+        if hasattr(values, 'dtype'):
+            import numpy as np
+            for store, magnitudes in ((self.positive, values[values > MIN_INDEXABLE]),
+                                      (self.negative, -values[values < -MIN_INDEXABLE])):
+                if len(magnitudes):
+                    keys, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64),
+                                             return_counts=True)
+                    for key, count in zip(keys.tolist(), counts.tolist()):
+                        store[key] = store.get(key, 0) + count
+            self.zero += int(np.count_nonzero(np.abs(values) <= MIN_INDEXABLE))
+        else:
+            for value in values:
+                if abs(value) <= MIN_INDEXABLE:
+                    self.zero += 1
+                    continue
+                store = self.positive if value > 0 else self.negative
+                key = math.ceil(math.log(abs(value)) / self._log_gamma)
+                store[key] = store.get(key, 0) + 1
+        self._collapse()
+
+    def _collapse(self) -> None:
+        for store in (self.positive, self.negative):
+            if len(store) > self.max_buckets:
+                keys = sorted(store)
+                floor = keys[-self.max_buckets]
+                store[floor] += sum(store.pop(key) for key in keys[:-self.max_buckets])
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Cannot merge quantile sketches of different accuracy')
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+        self._collapse()
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def _buckets(self) -> List[Tuple[Tuple[int, int], int]]:
+        """(position, count) of every bucket in value order; positions compare across sketches of the same accuracy."""
+        buckets = [((0, -key), count) for key, count in sorted(self.negative.items(), reverse=True)]
+        if self.zero:
+            buckets.append(((1, 0), self.zero))
+        buckets.extend(((2, key), count) for key, count in sorted(self.positive.items()))
+        return buckets
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The q-quantile (0 <= q <= 1) of the values, or None if there are none."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for (sign, key), count in self._buckets():
+            seen += count
+            if seen > rank:
+                return 0.0 if sign == 1 else self._value(key) if sign == 2 else -self._value(-key)
+        return None
+
+    def distance(self, other: 'QuantileSketch') -> float:
+        """
+        Kolmogorov-Smirnov distance between the two value distributions: the
+        largest difference of their cumulative fractions, at bucket resolution.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Cannot compare quantile sketches of different accuracy')
+        if not self.count or not other.count:
+            return 0.0
+        fractions: Dict[Tuple[int, int], List[float]] = {}
+        for side, sketch in enumerate((self, other)):
+            for position, count in sketch._buckets():
+                fractions.setdefault(position, [0.0, 0.0])[side] += count / sketch.count
+        distance = 0.0
+        cumulative = [0.0, 0.0]
+        for position in sorted(fractions):
+            cumulative[0] += fractions[position][0]
+            cumulative[1] += fractions[position][1]
+            distance = max(distance, abs(cumulative[0] - cumulative[1]))
+        return distance
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_buckets': self.max_buckets,
+            'zero': self.zero,
+            'positive': sorted(self.positive.items()),
+            'negative': sorted(self.negative.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuantileSketch':
+        sketch = cls(data['relative_accuracy'], data['max_buckets'])
+        sketch.zero = data['zero']
+        sketch.positive = {key: count for key, count in data['positive']}
+        sketch.negative = {key: count for key, count in data['negative']}
+        sketch.count = sketch.zero + sum(sketch.positive.values()) + sum(sketch.negative.values())
+        return sketch
+
+
+def _finite_numbers(values: Sequence[str]) -> Any:
+    """The values that parse as finite numbers, as floats; the others are left out."""
+    try:
+        import numpy as np
+        import pandas as pd
+    except ImportError:
+        numbers = []
+        for v in values:
+            try:
+                number = float(v)
+            except ValueError:
+                continue
+            if math.isfinite(number):
+                numbers.append(number)
+        return numbers
+    try:
+        # float() per element, in C; only a batch with non-numbers needs pandas
+        numbers = np.asarray(values, dtype=object).astype(float)
+    except ValueError:
+        numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=float)
+    return numbers[np.isfinite(numbers)]
+
+
+class ColumnSketch:
+    """
+    Mergeable summary of one column, built alongside its quality check:
+    values seen, nulls (None or one of null_values), minimum and maximum
+    (numeric for numeric columns, else in string order), a HyperLogLog
+    distinct count of the non-null values and, for numeric columns, a
+    quantile sketch of the values that are finite numbers. Values from add
+    are buffered and sketched a batch at a time; the result does not depend
+    on batch sizes or order, so both engines and chunked runs agree.
+    """
+
+    def __init__(self, numeric: bool, null_values: frozenset = frozenset(['']),
+                 precision: int = DEFAULT_HLL_PRECISION):
+        self.numeric = numeric
+        self.null_values = null_values
+        self.count = 0
+        self.nulls = 0
+        self.minimum: Any = None
+        self.maximum: Any = None
+        self.distinct = HyperLogLog(precision)
+        self.quantiles: Optional[QuantileSketch] = QuantileSketch() if numeric else None
+        self.pending: List[Optional[str]] = []
+
+    def add(self, v: Optional[str]) -> None:
+        self.pending.append(v)
+        if len(self.pending) >= SKETCH_BATCH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending:
+            values, self.pending = self.pending, []
+            self.add_batch(values)
+
+    def add_batch(self, values: Sequence[Optional[str]]) -> None:
+        n = len(values)
+        if not n:
+            return
+        _, (present,) = drop_missing([values], [self.null_values])
+        self.count += n
+        self.nulls += n - len(present)
+        if not len(present):
+            return
+        self.distinct.add_hashes(hash_key_columns([present]))
+        if self.quantiles is not None:
+            numbers = _finite_numbers(present)
+            if not len(numbers):
+                return
+            self.quantiles.add_many(numbers)
+            if hasattr(numbers, 'dtype'):
+                self._extend(float(numbers.min()), float(numbers.max()))
+            else:
+                self._extend(min(numbers), max(numbers))
+        elif hasattr(present, 'dtype'):
+            self._extend(present.min(), present.max())
+        else:
+            self._extend(min(present), max(present))
+
+    def _extend(self, low: Any, high: Any) -> None:
+        if low is not None and (self.minimum is None or low < self.minimum):
+            self.minimum = low
+        if high is not None and (self.maximum is None or high > self.maximum):
+            self.maximum = high
+
+    def merge(self, other: 'ColumnSketch') -> None:
+        self.flush()
+        other.flush()
+        self.count += other.count
+        self.nulls += other.nulls
+        self._extend(other.minimum, other.maximum)
+        self.distinct.merge(other.distinct)
+        if self.quantiles is not None and other.quantiles is not None:
+            self.quantiles.merge(other.quantiles)
+
+    def to_dict(self) -> Dict[str, Any]:
+        self.flush()
+        return {
+            'count': self.count,
+            'nulls': self.nulls,
+            'min': self.minimum,
+            'max': self.maximum,
+            'distinct': self.distinct.to_dict(),
+            'quantiles': self.quantiles.to_dict() if self.quantiles is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ColumnSketch':
+        sketch = cls(data['quantiles'] is not None)
+        sketch.count = data['count']
+        sketch.nulls = data['nulls']
+        sketch.minimum = data['min']
+        sketch.maximum = data['max']
+        sketch.distinct = HyperLogLog.from_dict(data['distinct'])
+        if data['quantiles'] is not None:
+            sketch.quantiles = QuantileSketch.from_dict(data['quantiles'])
+        return sketch
+
+
+def write_snapshot(path: str, files: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Writes a sketch snapshot: per data dictionary entry its path and the
+    to_dict of each column's ColumnSketch, with the hashing scheme their
+    distinct counts depend on. The file is replaced atomically.
+    """
+    snapshot = {
+        'version': SKETCH_VERSION,
+        'hashing': hashing_scheme(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'files': files,
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+class SnapshotBuilder:
+    """
+    Collects the 'sketches' entries of a run's file reports as files are
+    done, in any order, and writes them as one snapshot to path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+
+    def take(self, fname: str, file_path: str, report: Dict[str, Any]) -> Dict[str, Any]:
+        """Keeps a file report's sketches, if any; returns the report without them."""
+        if 'sketches' not in report:
+            return report
+        self.files[fname] = {'path': file_path, 'columns': report['sketches']}
+        return {name: value for name, value in report.items() if name != 'sketches'}
+
+    def write(self, fnames: Sequence[str]) -> None:
+        """Writes the sketches of fnames, in that order; files without sketches are left out."""
+        write_snapshot(self.path, {fname: self.files[fname] for fname in fnames if fname in self.files})
+
+
+def load_snapshot(path: str) -> Dict[str, Any]:
+    """Reads a snapshot written by write_snapshot; raises ValueError for another layout version."""
+    with open(path, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SKETCH_VERSION:
+        raise ValueError(f'{path} is not a version {SKETCH_VERSION} sketch snapshot')
+    return snapshot
@@ -0,0 +1,320 @@
+import hashlib
+import heapq
+import os
+from array import array
+from typing import Any, Iterator, List, Optional, Sequence, Set, Tuple
+
+# Hashes buffered in memory per key before a sorted run is spilled to disk
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+_HASH_BYTES = 8
+_READ_BLOCK = 1 << 16
+_NONE_MARKER = b'\xff\xff\xff\xff'
+# Rough in-memory cost of one distinct key held in a Python set
+_EXACT_KEY_BYTES = 160
+_HASH_BATCH = 65536
+
+
+def hash_key(key: Tuple[Optional[str], ...]) -> int:
+    """
+    Returns a 64-bit hash of a key tuple. Parts are length-prefixed so
+    ('ab', 'c') and ('a', 'bc') hash differently; None has its own marker.
+    The hash is stable across processes, unlike the built-in hash().
+    """
+    if len(key) == 1 and key[0] is not None:
+        data = key[0].encode('utf-8', 'surrogatepass')
+    else:
+        parts = []
+        for part in key:
+            if part is None:
+                parts.append(_NONE_MARKER)
+            else:
+                encoded = part.encode('utf-8', 'surrogatepass')
+                parts.append(len(encoded).to_bytes(4, 'little'))
+                parts.append(encoded)
+        data = b''.join(parts)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=_HASH_BYTES).digest(), 'little')
+
+
+def _load_pandas() -> Any:
+    try:
+        import pandas as pd
+    except ImportError:
+        return None
+    return pd
+
+
+def hash_key_columns(key_columns: List[Sequence[Optional[str]]]) -> Sequence[int]:
+    """
+    Hashes the keys formed by zipping key_columns, one hash per row: with
+    pandas' vectorized hashing into a uint64 NumPy array when pandas is
+    installed, otherwise with hash_key into a list. The choice is the same in
+    every process of a run, so hashes from chunks and passes are comparable.
+    """
+    pd = _load_pandas()
+    if pd is None:
+        return [hash_key(key) for key in zip(*key_columns)]
+    import numpy as np
+    if len(key_columns) == 1:
+        return pd.util.hash_array(np.asarray(key_columns[0], dtype=object))
+    frame = pd.DataFrame({i: pd.Series(col, dtype=object) for i, col in enumerate(key_columns)})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def _sorted_hashes(buffer: array) -> array:
+    try:
+        import numpy as np
+    except ImportError:
+        return array('Q', sorted(buffer))
+    # Sorting in numpy avoids boxing every hash as a Python int
+    return array('Q', np.sort(np.frombuffer(buffer, dtype=np.uint64)).tobytes())
+
+
+def _duplicates_in_sorted(hashes: array) -> Set[int]:
+    try:
+        import numpy as np
+    except ImportError:
+        return set(a for a, b in zip(hashes, hashes[1:]) if a == b)
+    arr = np.frombuffer(hashes, dtype=np.uint64)
+    return set(arr[1:][arr[1:] == arr[:-1]].tolist())
+
+
+def _iter_run(path: str) -> Iterator[int]:
+    with open(path, 'rb') as f:
+        while True:
+            block = array('Q')
+            try:
+                block.fromfile(f, _READ_BLOCK)
+            except EOFError:
+                pass
+            if not block:
+                return
+            yield from block
+
+
+class HashRunStore:
+    """
+    Multiset of 64-bit hashes in fixed-width arrays. Up to memory_budget bytes
+    are buffered in memory; beyond that the buffer is sorted and spilled to a
+    run file, and duplicates are found with an external k-way merge.
+    """
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET, spill_dir: Optional[str] = None):
+        self.max_buffered = max(memory_budget // _HASH_BYTES, 1024)
+        self.spill_dir = spill_dir
+        self.buffer = array('Q')
+        self.runs: List[str] = []
+
+    def add(self, key_hash: int) -> None:
+        self.buffer.append(key_hash)
+        if len(self.buffer) >= self.max_buffered:
+            self._spill()
+
+    def extend(self, key_hashes: Any) -> None:
+        """Adds many hashes at once; accepts a sequence of ints or a uint64 NumPy array."""
+        if hasattr(key_hashes, 'dtype'):
+            self.buffer.frombytes(key_hashes.astype('uint64').tobytes())
+        else:
+            self.buffer.extend(key_hashes)
+        if len(self.buffer) >= self.max_buffered:
+            self._spill()
+
+    def merge(self, other: 'HashRunStore') -> None:
+        """Takes over the hashes and run files of another store."""
+        self.runs.extend(other.runs)
+        other.runs = []
+        self.extend(other.buffer)
+
+    def _spill(self) -> None:
+        import tempfile
+        fd, path = tempfile.mkstemp(prefix='fairy-unique-', suffix='.run', dir=self.spill_dir)
+        with os.fdopen(fd, 'wb') as f:
+            _sorted_hashes(self.buffer).tofile(f)
+        self.runs.append(path)
+        self.buffer = array('Q')
+
+    def iter_sorted(self) -> Iterator[int]:
+        """Yields every hash added, in ascending order, merging the spilled runs."""
+        return heapq.merge(_sorted_hashes(self.buffer), *(_iter_run(path) for path in self.runs))
+
+    def duplicate_hashes(self) -> Set[int]:
+        """Returns every hash that was added more than once."""
+        if not self.runs:
+            return _duplicates_in_sorted(_sorted_hashes(self.buffer))
+        duplicates: Set[int] = set()
+        previous = None
+        for key_hash in self.iter_sorted():
+            if key_hash == previous:
+                duplicates.add(key_hash)
+            previous = key_hash
+        return duplicates
+
+    def close(self) -> None:
+        """Deletes spilled run files."""
+        for path in self.runs:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.runs = []
+
+
+class KeyTracker:
+    """
+    Exact uniqueness check for one key: a single column, several columns, or
+    the whole row (columns=None).
+    Keys are kept in a set while they fit the memory budget, which finds
+    duplicates directly; single-column keys are stored as bare values. Beyond it the tracker switches to 8-byte hashes in
+    a HashRunStore; hashes seen more than once are only candidates, and a
+    confirmation pass compares the actual keys behind them, so a hash
+    collision is never reported as a duplicate.
+    """
+
+    def __init__(
+        self,
+        label: str,
+        columns: Optional[List[str]],
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        spill_dir: Optional[str] = None
+    ):
+        self.label = label
+        self.columns = columns
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.max_exact_keys = max(memory_budget // _EXACT_KEY_BYTES, 1)
+        self.single = columns is not None and len(columns) == 1
+        self.keys: Optional[Set[Any]] = set()
+        self.store: Optional[HashRunStore] = None
+        self.pending: List[Tuple[Optional[str], ...]] = []
+        self.candidates: Set[int] = set()
+        self.duplicate_keys: Set[Tuple[Optional[str], ...]] = set()
+        self._first_keys: dict = {}
+
+    @property
+    def skips_missing(self) -> bool:
+        """Column keys ignore rows where a key value is absent; whole-row keys do not."""
+        return self.columns is not None
+
+    def add(self, key: Tuple[Optional[str], ...]) -> None:
+        if self.columns is not None and None in key:
+            return
+        keys = self.keys
+        if keys is None:
+            # Buffered so column keys get the same batch hashing as add_batch
+            self.pending.append(key)
+            if len(self.pending) >= _HASH_BATCH:
+                self._flush()
+            return
+        stored = key[0] if self.single else key
+        if stored in keys:
+            self.duplicate_keys.add(key)
+        else:
+            keys.add(stored)
+            if len(keys) > self.max_exact_keys:
+                self._switch_to_hashes()
+
+    def add_value(self, value: Optional[str]) -> None:
+        """Fast path of add for single-column keys."""
+        keys = self.keys
+        if keys is None or value is None:
+            self.add((value,))
+        elif value in keys:
+            self.duplicate_keys.add((value,))
+        else:
+            keys.add(value)
+            if len(keys) > self.max_exact_keys:
+                self._switch_to_hashes()
+
+    def add_batch(self, key_columns: List[Sequence[Optional[str]]]) -> None:
+        """Adds a batch of keys given column-wise, e.g. one engine batch of rows."""
+        if self.keys is not None and self.single:
+            values = [v for v in key_columns[0] if v is not None]
+            batch = set(values)
+            if len(batch) < len(values):
+                seen: Set[str] = set()
+                for v in values:
+                    if v in seen:
+                        self.duplicate_keys.add((v,))
+                    seen.add(v)
+            self.duplicate_keys.update((v,) for v in batch & self.keys)
+            self.keys |= batch
+            if len(self.keys) > self.max_exact_keys:
+                self._switch_to_hashes()
+            return
+        if self.keys is not None or self.columns is None:
+            for key in zip(*key_columns):
+                self.add(key)
+            return
+        hashes = hash_key_columns(key_columns)
+        if hasattr(hashes, 'dtype'):
+            import numpy as np
+            missing = np.zeros(len(hashes), dtype=bool)
+            for col in key_columns:
+                missing |= np.asarray(col, dtype=object) == None  # noqa: E711 (elementwise)
+            if missing.any():
+                hashes = hashes[~missing]
+        else:
+            hashes = [h for h, key in zip(hashes, zip(*key_columns)) if None not in key]
+        self.store.extend(hashes)
+
+    def hash_keys(self, keys: List[Tuple[Optional[str], ...]]) -> Sequence[int]:
+        """Hashes a list of keys the way this tracker stores them."""
+        if self.columns is None:
+            # Whole rows vary in length, so they cannot be hashed column-wise
+            return [hash_key(key) for key in keys]
+        return hash_key_columns(list(zip(*keys)))
+
+    def _flush(self) -> None:
+        if self.pending:
+            self.store.extend(self.hash_keys(self.pending))
+            self.pending = []
+
+    def _switch_to_hashes(self) -> None:
+        """Moves the distinct keys seen so far into a hash store; known duplicates stay exact."""
+        self.store = HashRunStore(self.memory_budget, self.spill_dir)
+        keys = [(v,) for v in self.keys] if self.single else list(self.keys)
+        self.keys = None
+        for start in range(0, len(keys), _HASH_BATCH):
+            self.store.extend(self.hash_keys(keys[start:start + _HASH_BATCH]))
+
+    def merge(self, other: 'KeyTracker') -> None:
+        """Takes over the keys of a tracker that saw other rows of the same file."""
+        self.duplicate_keys |= other.duplicate_keys
+        if self.keys is not None and other.keys is not None:
+            common = self.keys & other.keys
+            self.duplicate_keys.update(((v,) for v in common) if self.single else common)
+            self.keys |= other.keys
+            if len(self.keys) > self.max_exact_keys:
+                self._switch_to_hashes()
+            return
+        if self.keys is not None:
+            self._switch_to_hashes()
+        if other.keys is not None:
+            other._switch_to_hashes()
+        other._flush()
+        self.store.merge(other.store)
+
+    def start_confirmation(self) -> bool:
+        """Collects candidate hashes; returns True if a confirmation pass is needed."""
+        if self.store is None:
+            return False
+        self._flush()
+        self.candidates = self.store.duplicate_hashes()
+        self._first_keys = {}
+        return bool(self.candidates)
+
+    def confirm(self, key_hash: int, key: Tuple[Optional[str], ...]) -> None:
+        """Feeds one key with a candidate hash during the confirmation pass."""
+        seen = self._first_keys.setdefault(key_hash, set())
+        if key in seen:
+            self.duplicate_keys.add(key)
+        else:
+            seen.add(key)
+
+    def close(self) -> None:
+        """Deletes spilled run files and drops the keys held for the check."""
+        if self.store is not None:
+            self.store.close()
+        self.keys = None
+        self.store = None
+        self.pending = []
+        self._first_keys = {}
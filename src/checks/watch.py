@@ -0,0 +1,354 @@
+import json
+import os
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Set, Tuple, Union
+
+try:
+    from .check_naming_convention import is_compliant, normalize_extensions
+    from .key_index import INDEX_DIR_NAME, KeyIndexStore
+    from .quality_check import (
+        CheckOptions, FilePlan, ValidationPlan, build_key_indexes, check_entry, iter_report_issues, load_plan,
+        report_error_count
+    )
+except ImportError:  # executed as a script
+    from check_naming_convention import is_compliant, normalize_extensions
+    from key_index import INDEX_DIR_NAME, KeyIndexStore
+    from quality_check import (
+        CheckOptions, FilePlan, ValidationPlan, build_key_indexes, check_entry, iter_report_issues, load_plan,
+        report_error_count
+    )
+
+DEFAULT_INTERVAL = 1.0
+# Seconds a changed file must stay unchanged before it is checked
+DEFAULT_DEBOUNCE = 2.0
+
+# What a snapshot keeps per file: size, mtime_ns and inode
+FileState = Tuple[int, int, int]
+
+
+def _file_state(path: str) -> Optional[FileState]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+def snapshot(data_dir: str) -> Dict[str, FileState]:
+    """
+    The state of every file under data_dir, by path. Like the naming check,
+    symlinked directories are not followed and unreadable ones are skipped.
+    """
+    files: Dict[str, FileState] = {}
+    stack = [data_dir]
+    while stack:
+        dir_path = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            if not entry.is_symlink():
+                                stack.append(entry.path)
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    files[entry.path] = (st.st_size, st.st_mtime_ns, st.st_ino)
+        except OSError:
+            pass
+    return files
+
+
+class Debouncer:
+    """
+    Holds back changed files until they settle: a file is ready once its
+    state has stayed the same for quiet seconds, so a file an instrument or
+    a copy is still writing is checked once, when complete.
+    """
+
+    def __init__(self, quiet: float = DEFAULT_DEBOUNCE):
+        self.quiet = quiet
+        self.pending: Dict[str, Tuple[Optional[FileState], float]] = {}
+
+    def touch(self, path: str, state: Optional[FileState], now: float) -> None:
+        """Records a file's latest state (None once removed); a new state restarts its quiet period."""
+        previous = self.pending.get(path)
+        if previous is None or previous[0] != state:
+            self.pending[path] = (state, now)
+
+    def ready(self, now: float) -> List[str]:
+        """Removes and returns, sorted, the files that have been quiet long enough."""
+        done = sorted(path for path, (_, since) in self.pending.items() if now - since >= self.quiet)
+        for path in done:
+            del self.pending[path]
+        return done
+
+
+class PollingWatcher:
+    """Waits between stat snapshots; every wait may have changed any file."""
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        time.sleep(timeout)
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """
+    Linux inotify through ctypes, without extra dependencies: wait returns
+    the paths that events named, as soon as there are any, so only those
+    are stat'ed. New directories are watched as they appear. Raises OSError
+    where inotify is not available.
+    """
+
+    _IN_MODIFY, _IN_ATTRIB, _IN_CLOSE_WRITE = 0x002, 0x004, 0x008
+    _IN_MOVED_FROM, _IN_MOVED_TO, _IN_CREATE, _IN_DELETE = 0x040, 0x080, 0x100, 0x200
+    _IN_Q_OVERFLOW, _IN_ISDIR = 0x4000, 0x40000000
+    _MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+    def __init__(self, data_dir: str):
+        import ctypes
+        import ctypes.util
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            self._add_watch = libc.inotify_add_watch
+            fd = libc.inotify_init1(os.O_CLOEXEC)
+        except (OSError, AttributeError) as e:
+            raise OSError(f'inotify is not available: {e}')
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.fd = fd
+        self.dirs: Dict[int, str] = {}
+        self._watch_tree(data_dir)
+
+    def _watch_tree(self, dir_path: str) -> Set[str]:
+        """Watches dir_path and its subdirectories; returns the files already in them."""
+        files: Set[str] = set()
+        stack = [dir_path]
+        while stack:
+            path = stack.pop()
+            wd = self._add_watch(self.fd, os.fsencode(path), self._MASK)
+            if wd >= 0:
+                self.dirs[wd] = path
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            files.add(entry.path)
+            except OSError:
+                pass
+        return files
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        """Paths named by events within timeout seconds; None if events were lost and anything may have changed."""
+        import select
+        import struct
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        data = os.read(self.fd, 1 << 16)
+        paths: Set[str] = set()
+        pos = 0
+        while pos + 16 <= len(data):
+            wd, mask, _, length = struct.unpack_from('iIII', data, pos)
+            name = data[pos + 16:pos + 16 + length].rstrip(b'\0')
+            pos += 16 + length
+            if mask & self._IN_Q_OVERFLOW:
+                return None
+            if wd not in self.dirs or not name:
+                continue
+            path = os.path.join(self.dirs[wd], os.fsdecode(name))
+            if mask & self._IN_ISDIR:
+                if mask & (self._IN_CREATE | self._IN_MOVED_TO):
+                    paths |= self._watch_tree(path)
+                continue
+            paths.add(path)
+        return paths
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def open_watcher(data_dir: str, poll: bool = False) -> Union[PollingWatcher, InotifyWatcher]:
+    """inotify where available (and poll is not set), else stat polling."""
+    if not poll:
+        try:
+            return InotifyWatcher(data_dir)
+        except OSError:
+            pass
+    return PollingWatcher()
+
+
+class WatchSession:
+    """
+    Warm state of `fairy --watch`: the compiled validation plan (reloaded
+    only when the data dictionary changes), the naming pattern, check
+    options and key indexes, and the last known state of every file under
+    data_dir. Each update compares the files a watcher names (or all of
+    them) with that state, and once changed files settle, only they are
+    checked again, along with the files whose foreign keys reference them.
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        dictionary_path: str,
+        pattern: Pattern,
+        allowed_exts: Optional[frozenset],
+        options: CheckOptions,
+        index_dir: str,
+        debounce: float = DEFAULT_DEBOUNCE,
+        emit: Callable[[str], None] = print
+    ):
+        self.data_dir = data_dir
+        self.dictionary_path = dictionary_path
+        self.pattern = pattern
+        self.allowed_exts = allowed_exts
+        self.options = options
+        self.index_store = KeyIndexStore(index_dir, options.unique_memory_bytes, options.spill_dir)
+        self.debouncer = Debouncer(debounce)
+        self.emit = emit
+        self.files: Dict[str, FileState] = {}
+        self.dictionary_state: Optional[FileState] = None
+        self.plan: Optional[ValidationPlan] = None
+
+    def start(self) -> int:
+        """Takes the first snapshot and checks everything once; returns the number of issues."""
+        self.files = snapshot(self.data_dir)
+        self.dictionary_state = _file_state(self.dictionary_path)
+        return self.check(sorted(self.files))
+
+    def update(self, candidates: Optional[Iterable[str]], now: float) -> List[str]:
+        """
+        Compares the candidate paths (None: every file) with their last known
+        state, reports renames, and returns the changed files that have
+        settled by now. The data dictionary is stat'ed every time, as
+        watchers only name files under data_dir; once an edit of it settles,
+        its path is returned too, and checking it re-checks everything.
+        """
+        if candidates is None:
+            current = snapshot(self.data_dir)
+            paths = set(current) | set(self.files)
+        else:
+            paths = set(candidates)
+            current = {}
+            for path in paths:
+                state = _file_state(path)
+                if state is not None:
+                    current[path] = state
+        removed = {self.files[path][2]: path for path in paths if path in self.files and path not in current}
+        for path in sorted(paths):
+            state = current.get(path)
+            if state == self.files.get(path):
+                continue
+            if state is None:
+                del self.files[path]
+            else:
+                if path not in self.files and state[2] in removed:
+                    self.emit(f'Renamed: {removed[state[2]]} -> {path}')
+                self.files[path] = state
+            self.debouncer.touch(path, state, now)
+        state = _file_state(self.dictionary_path)
+        if state != self.dictionary_state:
+            self.dictionary_state = state
+            self.debouncer.touch(self.dictionary_path, state, now)
+        return self.debouncer.ready(now)
+
+    def check(self, paths: List[str]) -> int:
+        """Checks the names of paths and the dictionary entries they (or their foreign keys) touch."""
+        n_issues = 0
+        for path in paths:
+            if path in self.files and not is_compliant(os.path.basename(path), self.pattern, self.allowed_exts):
+                self.emit(f'Non-compliant name: {path}')
+                n_issues += 1
+        plan = load_plan(self.dictionary_path)
+        entries = self._entries(plan, paths)
+        if plan is not self.plan or any(entry.foreign_keys for entry in plan.files.values() if entry in entries):
+            self.options.key_indexes = build_key_indexes(plan, self.index_store)
+        self.plan = plan
+        for file_plan in entries:
+            report = check_entry(file_plan, self.options)
+            count = report_error_count(report)
+            n_issues += count
+            if not count:
+                self.emit(f'{file_plan.fname}: all checks passed')
+                continue
+            self.emit(f'{file_plan.fname}: {count} issues')
+            for issue in iter_report_issues(file_plan.fname, report):
+                for message in issue['messages']:
+                    self.emit(f'  {message}')
+        return n_issues
+
+    def _entries(self, plan: ValidationPlan, paths: List[str]) -> List[FilePlan]:
+        """
+        Entries to check again: those at paths, and those whose foreign keys
+        reference one of them. A changed data dictionary makes it all of them.
+        """
+        if plan is not self.plan:
+            return list(plan.files.values())
+        changed = set(os.path.abspath(path) for path in paths)
+        touched = set(fname for fname, entry in plan.files.items()
+                      if entry.path and os.path.abspath(entry.path) in changed)
+        return [entry for fname, entry in plan.files.items()
+                if fname in touched or any(fk.ref_file in touched for fk in entry.foreign_keys)]
+
+    def run(
+        self,
+        watcher: Union[PollingWatcher, InotifyWatcher],
+        interval: float = DEFAULT_INTERVAL,
+        stop: Callable[[], bool] = lambda: False
+    ) -> None:
+        """Waits for changes and checks settled files until stop() is true (or Ctrl+C)."""
+        while not stop():
+            # Pending files are due at the end of their quiet period, not a full interval later
+            timeout = min(interval, self.debouncer.quiet) if self.debouncer.pending else interval
+            ready = self.update(watcher.wait(timeout), time.monotonic())
+            if ready:
+                self.check(ready)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs `fairy --watch`: checks everything once, then re-checks files as they change."""
+    import argparse
+    import tempfile
+    config_path = os.environ.get('FAIRY_CONFIG', '.project_config.json')
+    dict_path = os.environ.get('FAIRY_DD_OUT', 'docs/data_dictionaries/data_dictionary.json')
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='Seconds between polls (and longest wait for events)')
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE, help='Seconds a changed file must stay unchanged before it is checked')
+    parser.add_argument('--poll', action='store_true', help='Poll with stat snapshots even where inotify is available')
+    parser.add_argument('--engine', choices=['python', 'vectorized'], default='python', help='Validation engine (vectorized uses pandas)')
+    parser.add_argument('--max-samples', type=int, default=20, help='Offending values/rows shown per rule and column')
+    parser.add_argument('--cache', nargs='?', const='.fairy_cache', default=None, metavar='DIR', help='Keep foreign key indexes in this cache directory across sessions')
+    parser.add_argument('--date-format', default=None, metavar='FORMAT', help="Format of 'date' columns without a 'Date Format' of their own (default: ISO 8601)")
+    args, _ = parser.parse_known_args(argv)
+    data_dir = config.get('data_directory_name', 'data')
+    pattern = re.compile(config['data_naming_convention_regex'])
+    allowed_exts = normalize_extensions(config.get('allowed_file_extensions'))
+    options = CheckOptions(args.engine, args.max_samples, date_format=args.date_format)
+    with tempfile.TemporaryDirectory(prefix='fairy-watch-') as tmp_dir:
+        index_dir = os.path.join(args.cache, INDEX_DIR_NAME) if args.cache else tmp_dir
+        session = WatchSession(data_dir, dict_path, pattern, allowed_exts, options, index_dir, args.debounce)
+        watcher = open_watcher(data_dir, args.poll)
+        try:
+            session.start()
+            mode = 'polling' if isinstance(watcher, PollingWatcher) else 'inotify'
+            print(f'Watching {data_dir} ({mode}); press Ctrl+C to stop.', flush=True)
+            session.run(watcher, args.interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
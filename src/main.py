@@ -1,82 +1,97 @@
 import os
-import subprocess
 import sys
-import json
 
-def main():
-    import sys
+# Each command runs in this process and imports only the modules it needs,
+# so quick commands such as --check-naming (e.g. in a pre-commit hook) do
+# not pay for pandas or great_expectations.
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _use_src_modules():
+    # Import commands as package modules (checks.x, utils.x) so worker
+    # processes of the quality check can unpickle their functions
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+
+
+def run_regex_builder(argv):
+    _use_src_modules()
+    from utils import regex_builder
+    regex_builder.main()
+
+
+def run_check_naming(argv):
+    _use_src_modules()
+    from checks import check_naming_convention
+    check_naming_convention.main(argv)
+
+
+def run_generate_data_dictionary(argv):
     import argparse
-    if '--regex-builder' in sys.argv:
-        subprocess.run([sys.executable, os.path.join(os.path.dirname(__file__), 'utils', 'regex_builder.py')])
-        return
-    if '--check-naming' in sys.argv:
-        subprocess.run([sys.executable, os.path.join(os.path.dirname(__file__), 'checks', 'check_naming_convention.py')])
-        return
-    if '--generate-data-dictionary' in sys.argv:
-        parser = argparse.ArgumentParser()
-        parser.add_argument('--config', type=str, default='.project_config.json', help='Path to config file')
-        parser.add_argument('--out', type=str, default='docs/data_dictionaries/data_dictionary.json', help='Output data dictionary path')
-        args, _ = parser.parse_known_args()
-        env = dict(os.environ)
-        env['FAIRY_CONFIG'] = args.config
-        env['FAIRY_DD_OUT'] = args.out
-        subprocess.run([sys.executable, os.path.join(os.path.dirname(__file__), 'checks', 'generate_data_dictionary.py')], env=env)
-        return
-    if '--quality-check' in sys.argv:
-        # Verbose: print results and always print a success message if all checks pass
-        config_path = os.environ.get('FAIRY_CONFIG', '.project_config.json')
-        dict_path = os.environ.get('FAIRY_DD_OUT', 'docs/data_dictionaries/data_dictionary.json')
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        data_dir = config.get('data_directory_name', 'data')
-        # Import using relative path so it works as a script or CLI
-        import importlib.util
-        import pathlib
-        qc_path = pathlib.Path(__file__).parent / 'checks' / 'quality_check.py'
-        spec = importlib.util.spec_from_file_location('quality_check', qc_path)
-        if spec and spec.loader:
-            qc = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(qc)
-            report = qc.quality_check_tabular_data(data_dir, dict_path)
-        else:
-            print('Could not load quality_check module.')
-            sys.exit(2)
-        any_errors = False
-        for fname, issues in report.items():
-            print(f'File: {fname}')
-            if 'error' in issues:
-                print('  ERROR:', issues['error'])
-                any_errors = True
-                continue
-            if issues['file_issues']:
-                for issue in issues['file_issues']:
-                    print('  File issue:', issue)
-                    any_errors = True
-            if issues['column_issues']:
-                for col, col_issues in issues['column_issues'].items():
-                    for col_issue in col_issues:
-                        print(f'  Column {col}:', col_issue)
-                        any_errors = True
-            if not issues['file_issues'] and not issues['column_issues'] and 'error' not in issues:
-                print('  All checks passed.')
-        if not any_errors:
-            print('\nAll files passed all quality checks!')
-        else:
-            print('\nSome files have issues. See above.')
-        sys.exit(1 if any_errors else 0)
-    if '--zenodo-template' in sys.argv:
-        subprocess.run([sys.executable, os.path.join(os.path.dirname(__file__), 'utils', 'generate_zenodo_json.py'), '--template'])
-        return
-    if '--zenodo-json' in sys.argv:
-        parser = argparse.ArgumentParser()
-        parser.add_argument('--csv', type=str, required=True)
-        parser.add_argument('--out', type=str, required=True)
-        args, _ = parser.parse_known_args()
-        subprocess.run([sys.executable, os.path.join(os.path.dirname(__file__), 'utils', 'generate_zenodo_json.py'), '--csv', args.csv, '--out', args.out])
-        return
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--config', type=str, default='.project_config.json', help='Path to config file')
+    parser.add_argument('--out', type=str, default='docs/data_dictionaries/data_dictionary.json', help='Output data dictionary path (.json or .csv; unchanged files are only skipped for .json)')
+    parser.add_argument('--profile', action='store_true', help='Infer types, ranges, null tokens and examples from the data')
+    parser.add_argument('--sample-rows', type=int, default=None, help='Profile at most this many rows per file')
+    args, _ = parser.parse_known_args(argv)
+    _use_src_modules()
+    from checks import generate_data_dictionary
+    generate_data_dictionary.main(args.config, args.out, args.profile, args.sample_rows)
+
+
+def run_quality_check(argv):
+    # Verbose: print results and always print a success message if all checks pass
+    _use_src_modules()
+    from checks import quality_check
+    sys.exit(quality_check.main(argv))
+
 
+def run_watch(argv):
+    _use_src_modules()
+    from checks import watch
+    sys.exit(watch.main(argv))
+
+
+def run_drift(argv):
+    _use_src_modules()
+    from checks import drift
+    sys.exit(drift.main(argv))
+
+
+def run_zenodo_template(argv):
+    _use_src_modules()
+    from utils import generate_zenodo_json
+    generate_zenodo_json.main(['--template'])
+
+
+def run_zenodo_json(argv):
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--csv', type=str, required=True)
+    parser.add_argument('--out', type=str, required=True)
+    args, _ = parser.parse_known_args(argv)
+    _use_src_modules()
+    from utils import generate_zenodo_json
+    generate_zenodo_json.main(['--csv', args.csv, '--out', args.out])
+
+
+# Command flag -> handler, checked in this order; handlers get the full argv
+COMMANDS = {
+    '--regex-builder': run_regex_builder,
+    '--check-naming': run_check_naming,
+    '--generate-data-dictionary': run_generate_data_dictionary,
+    '--quality-check': run_quality_check,
+    '--watch': run_watch,
+    '--drift': run_drift,
+    '--zenodo-template': run_zenodo_template,
+    '--zenodo-json': run_zenodo_json,
+}
+
+
+def copy_template():
+    import shutil
     cwd = os.getcwd()
-    template_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '{{cookiecutter.project_slug}}'))
+    template_dir = os.path.abspath(os.path.join(SRC_DIR, '..', '{{cookiecutter.project_slug}}'))
     # Only copy the contents of the template directory, not unnecessary folders like examples or tests
     for item in os.listdir(template_dir):
         if item in ("examples", "tests"):  # skip unnecessary folders
@@ -85,10 +100,19 @@ def main():
         dest_path = os.path.join(cwd, item)
         if os.path.isdir(src_path):
             if not os.path.exists(dest_path):
-                subprocess.run(["cp", "-r", src_path, dest_path])
+                shutil.copytree(src_path, dest_path)
         else:
-            subprocess.run(["cp", src_path, dest_path])
+            shutil.copy(src_path, dest_path)
     print("[INFO] FAIRy template files copied to current directory.")
 
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    for flag, handler in COMMANDS.items():
+        if flag in argv:
+            handler(argv)
+            return
+    copy_template()
+
 if __name__ == "__main__":
     main()
@@ -1,94 +1,256 @@
 import csv
-import pandas as pd
+import json
+import math
 import sys
 import os
-import great_expectations as ge
-from great_expectations.data_context import get_context
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-def build_expectations_from_csv(data_dictionary_csv: str) -> list:
+BOOLEAN_VALUE_SET = ["true", "false", "0", "1", "yes", "no"]
+# Data dictionary types -> expect_column_values_to_be_of_type type_
+TYPE_NAMES = {'integer': 'int', 'float': 'float', 'decimal': 'float', 'string': 'str'}
+# Records the dictionary rows each suite was generated from
+DEFAULT_STATE_PATH = os.path.join('.fairy_cache', 'ge_suites.json')
+
+
+def _checks() -> Tuple[Any, Any]:
+    """FAIRy's quality_check and result_cache modules, whether this module was imported as src.utils, utils or run as a script."""
+    try:
+        from ..checks import quality_check, result_cache
+    except ImportError:  # top-level utils package, or executed as a script
+        src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        if src_dir not in sys.path:
+            sys.path.insert(0, src_dir)
+        from checks import quality_check, result_cache
+    return quality_check, result_cache
+
+
+def _text(value: Any) -> str:
+    return '' if value is None else str(value)
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+def _between_kwargs(col: str, interval: Any) -> Dict[str, Any]:
+    """expect_column_values_to_be_between kwargs of an interval; infinite bounds are left open (None)."""
+    kwargs: Dict[str, Any] = {
+        "column": col,
+        "min_value": None if math.isinf(interval.lo) else interval.lo,
+        "max_value": None if math.isinf(interval.hi) else interval.hi,
+    }
+    if interval.lo_open and kwargs["min_value"] is not None:
+        kwargs["strict_min"] = True
+    if interval.hi_open and kwargs["max_value"] is not None:
+        kwargs["strict_max"] = True
+    return kwargs
+
+
+def expectations_for_column(row: Dict[str, Any]) -> list:
     """
-    Reads a data dictionary CSV and returns a list of expectation dicts.
+    Returns the expectation dicts of one data dictionary row (a CSV row, or a
+    column of data_dictionary.json). Numeric ranges are parsed like the
+    quality check parses them, so signed ('-5--1') and interval ('(0, 1]')
+    ranges become a between expectation; a numeric column's range that is
+    neither a range nor a list of numbers gets no expectation.
     """
-    expectations = []
-    df = pd.read_csv(data_dictionary_csv)
-    for _, row in df.iterrows():
-        col = row['Variable Name']
-        dtype = str(row.get('Data Type', '')).lower()
-        allowed = str(row.get('Allowed Values / Range', ''))
-        constraints = str(row.get('Constraints / Validation Rules', '')).lower()
-        # Column exists
+    col = row['Variable Name']
+    dtype = _text(row.get('Data Type')).lower()
+    allowed = _text(row.get('Allowed Values / Range'))
+    constraints = _text(row.get('Constraints / Validation Rules')).lower()
+    # Column exists
+    expectations = [{
+        "expectation_type": "expect_column_to_exist",
+        "kwargs": {"column": col}
+    }]
+    # Data type
+    if dtype in TYPE_NAMES:
         expectations.append({
-            "expectation_type": "expect_column_to_exist",
-            "kwargs": {"column": col}
+            "expectation_type": "expect_column_values_to_be_of_type",
+            "kwargs": {"column": col, "type_": TYPE_NAMES[dtype]}
         })
-        # Data type
-        if dtype in ['integer', 'float', 'decimal', 'string', 'boolean', 'date']:
-            if dtype == 'integer':
-                expectations.append({
-                    "expectation_type": "expect_column_values_to_be_of_type",
-                    "kwargs": {"column": col, "type_": "int"}
-                })
-            elif dtype in ['float', 'decimal']:
-                expectations.append({
-                    "expectation_type": "expect_column_values_to_be_of_type",
-                    "kwargs": {"column": col, "type_": "float"}
-                })
-            elif dtype == 'string':
-                expectations.append({
-                    "expectation_type": "expect_column_values_to_be_of_type",
-                    "kwargs": {"column": col, "type_": "str"}
-                })
-            elif dtype == 'boolean':
+    elif dtype == 'boolean':
+        expectations.append({
+            "expectation_type": "expect_column_values_to_be_in_set",
+            "kwargs": {"column": col, "value_set": list(BOOLEAN_VALUE_SET)}
+        })
+    # Allowed values/range
+    if allowed and allowed.lower() != 'nan':
+        numeric = dtype in ['integer', 'float', 'decimal']
+        interval = _checks()[0].parse_interval(allowed) if numeric else None
+        if interval is not None:
+            expectations.append({
+                "expectation_type": "expect_column_values_to_be_between",
+                "kwargs": _between_kwargs(col, interval)
+            })
+        else:
+            allowed_vals = [a.strip() for a in allowed.split(',') if a.strip()]
+            if numeric and not all(_is_number(a) for a in allowed_vals):
+                allowed_vals = []
+            if allowed_vals:
                 expectations.append({
                     "expectation_type": "expect_column_values_to_be_in_set",
-                    "kwargs": {"column": col, "value_set": ["true", "false", "0", "1", "yes", "no"]}
+                    "kwargs": {"column": col, "value_set": allowed_vals}
                 })
-            elif dtype == 'date':
-                pass
-        # Allowed values/range
-        if allowed and allowed.lower() != 'nan':
-            if dtype in ['integer', 'float', 'decimal'] and '-' in allowed:
-                try:
-                    minv, maxv = allowed.split('-')
-                    minv, maxv = float(minv.strip()), float(maxv.strip())
-                    expectations.append({
-                        "expectation_type": "expect_column_values_to_be_between",
-                        "kwargs": {"column": col, "min_value": minv, "max_value": maxv}
-                    })
-                except Exception:
-                    pass
-            else:
-                allowed_vals = [a.strip() for a in allowed.split(',') if a.strip()]
-                if allowed_vals:
-                    expectations.append({
-                        "expectation_type": "expect_column_values_to_be_in_set",
-                        "kwargs": {"column": col, "value_set": allowed_vals}
-                    })
-        # Constraints
-        if 'unique' in constraints:
-            expectations.append({
-                "expectation_type": "expect_column_values_to_be_unique",
-                "kwargs": {"column": col}
-            })
-        if 'not null' in constraints or 'cannot be null' in constraints:
-            expectations.append({
-                "expectation_type": "expect_column_values_to_not_be_null",
-                "kwargs": {"column": col}
-            })
+    # Constraints
+    if 'unique' in constraints:
+        expectations.append({
+            "expectation_type": "expect_column_values_to_be_unique",
+            "kwargs": {"column": col}
+        })
+    if 'not null' in constraints or 'cannot be null' in constraints:
+        expectations.append({
+            "expectation_type": "expect_column_values_to_not_be_null",
+            "kwargs": {"column": col}
+        })
     return expectations
 
+
+def build_expectations(columns: Iterable[Dict[str, Any]]) -> list:
+    """Returns the expectation dicts of data dictionary rows, in row order."""
+    expectations = []
+    for row in columns:
+        expectations.extend(expectations_for_column(row))
+    return expectations
+
+
+def build_expectations_from_csv(data_dictionary_csv: str) -> list:
+    """
+    Reads a data dictionary CSV and returns a list of expectation dicts.
+    Rows are read with the csv module as plain strings; empty cells count
+    as absent.
+    """
+    with open(data_dictionary_csv, 'r', newline='', encoding='utf-8') as f:
+        return build_expectations(csv.DictReader(f))
+
+
+def expectations_to_columns(expectations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Turns expectation dicts from build_expectations_from_csv into data
+    dictionary columns with the same rules, which FAIRy's quality check
+    runs without great_expectations.
+    """
+    columns: Dict[str, Dict[str, Any]] = {}
+    constraints: Dict[str, List[str]] = {}
+    type_names = {name: dtype for dtype, name in TYPE_NAMES.items() if dtype != 'decimal'}
+    for exp in expectations:
+        kwargs = exp["kwargs"]
+        name = kwargs["column"]
+        col = columns.setdefault(name, {"Variable Name": name})
+        kind = exp["expectation_type"]
+        if kind == "expect_column_values_to_be_of_type":
+            col["Data Type"] = type_names.get(kwargs["type_"], "")
+        elif kind == "expect_column_values_to_be_in_set":
+            if kwargs["value_set"] == BOOLEAN_VALUE_SET and not col.get("Data Type"):
+                col["Data Type"] = "boolean"
+            else:
+                col["Allowed Values / Range"] = ", ".join(kwargs["value_set"])
+        elif kind == "expect_column_values_to_be_between":
+            low, high = kwargs.get("min_value"), kwargs.get("max_value")
+            col["Allowed Values / Range"] = "{}{}, {}{}".format(
+                "(" if kwargs.get("strict_min") else "[", "-inf" if low is None else low,
+                "inf" if high is None else high, ")" if kwargs.get("strict_max") else "]"
+            )
+        elif kind == "expect_column_values_to_be_unique":
+            constraints.setdefault(name, []).append("unique")
+        elif kind == "expect_column_values_to_not_be_null":
+            constraints.setdefault(name, []).append("not null")
+    for name, rules in constraints.items():
+        columns[name]["Constraints / Validation Rules"] = ", ".join(rules)
+    return list(columns.values())
+
+
+def validate_expectations(expectations: List[Dict[str, Any]], data_file: str, options: Any = None) -> Dict[str, Any]:
+    """
+    Runs expectation dicts against a data file with FAIRy's own validators
+    (quality_check.check_file, one streaming pass) instead of a Great
+    Expectations validator; great_expectations is never imported.
+    Returns the quality check report of the file.
+    """
+    quality_check, _ = _checks()
+    return quality_check.check_file(data_file, expectations_to_columns(expectations), options=options)
+
+
+def suite_name_for(fname: str) -> str:
+    """The suite name of a data dictionary entry, e.g. 'P01_run.csv' -> 'P01_run_csv_suite'."""
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in fname) + '_suite'
+
+
+def _expectation_suite(suite_name: str, expectations: List[Dict[str, Any]]) -> Any:
+    from great_expectations.core import ExpectationConfiguration, ExpectationSuite
+    suite = ExpectationSuite(expectation_suite_name=suite_name)
+    for exp in expectations:
+        suite.add_expectation(ExpectationConfiguration(expectation_type=exp["expectation_type"], kwargs=exp["kwargs"]))
+    return suite
+
+
+def build_ge_suites(
+    data_dictionary_json: str,
+    state_path: str = DEFAULT_STATE_PATH,
+    context: Any = None,
+    force: bool = False
+) -> List[str]:
+    """
+    Writes one Great Expectations suite per data dictionary entry
+    (suite_name_for), all through one data context: get_context() unless
+    one is given, created only if a suite needs writing. Suites are built
+    from the expectation configurations directly, so no data file is
+    loaded. An entry's suite is regenerated only when its dictionary rows
+    changed since the run recorded in state_path, or with force.
+    Returns the names of the suites written.
+    """
+    _, result_cache = _checks()
+    with open(data_dictionary_json, 'r', encoding='utf-8') as f:
+        data_dict = json.load(f)
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    changed = []
+    for fname, meta in data_dict.items():
+        suite_name = suite_name_for(fname)
+        digest = result_cache.rules_hash(meta.get('columns', []))
+        if force or state.get(suite_name) != digest:
+            changed.append((suite_name, meta.get('columns', []), digest))
+    if not changed:
+        return []
+    if context is None:
+        from great_expectations.data_context import get_context
+        context = get_context()
+    written = []
+    for suite_name, columns, digest in changed:
+        context.save_expectation_suite(_expectation_suite(suite_name, build_expectations(columns)))
+        state[suite_name] = digest
+        written.append(suite_name)
+    os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+    tmp_path = f'{state_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path)
+    return written
+
+
 def csv_data_dictionary_to_ge_suite(
     data_dictionary_csv: str,
     data_file: str,
-    suite_name: str = "data_dictionary_suite"
+    suite_name: str = "data_dictionary_suite",
+    context: Optional[Any] = None
 ) -> None:
     """
     Reads a data dictionary CSV and creates a Great Expectations suite for the given data file.
+    Pass a context to reuse one data context across calls.
     """
     # Read the data dictionary CSV
     expectations = build_expectations_from_csv(data_dictionary_csv)
     # Create GE context and suite
-    context = get_context()
+    if context is None:
+        from great_expectations.data_context import get_context
+        context = get_context()
     from great_expectations.core.batch import RuntimeBatchRequest
     batch_request = RuntimeBatchRequest(
         datasource_name="default_datasource",
@@ -107,8 +269,32 @@ def csv_data_dictionary_to_ge_suite(
     validator.save_expectation_suite(discard_failed_expectations=False)
     print(f"Great Expectations suite '{suite_name}' created for {data_file}.")
 
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Generate Great Expectations suites from a data dictionary, or run its expectations without GE."
+    )
+    parser.add_argument('data_dictionary', help='Data dictionary CSV (or data_dictionary.json with --batch)')
+    parser.add_argument('data_file', nargs='?', help='Data file the suite is for')
+    parser.add_argument('--batch', action='store_true', help='One suite per entry of data_dictionary.json, through one context')
+    parser.add_argument('--state', default=DEFAULT_STATE_PATH, help='Where --batch records which dictionary rows each suite was built from')
+    parser.add_argument('--force', action='store_true', help='With --batch, regenerate every suite')
+    parser.add_argument('--no-ge', action='store_true', help="Validate data_file with FAIRy's own validators instead of creating a suite")
+    args = parser.parse_args(argv)
+    if args.batch:
+        written = build_ge_suites(args.data_dictionary, args.state, force=args.force)
+        print(f"{len(written)} suites written" + (f": {', '.join(written)}" if written else " (all up to date)"))
+        return 0
+    if args.data_file is None:
+        parser.error('data_file is required without --batch')
+    if args.no_ge:
+        quality_check, _ = _checks()
+        report = validate_expectations(build_expectations_from_csv(args.data_dictionary), args.data_file)
+        return 1 if quality_check.print_report({os.path.basename(args.data_file): report}) else 0
+    csv_data_dictionary_to_ge_suite(args.data_dictionary, args.data_file)
+    return 0
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python csv_to_ge_suite.py <data_dictionary.csv> <data_file.csv>")
-        sys.exit(1)
-    csv_data_dictionary_to_ge_suite(sys.argv[1], sys.argv[2])
+    sys.exit(main())
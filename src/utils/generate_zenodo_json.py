@@ -53,13 +53,13 @@ def csv_to_zenodo_json(csv_path: str, output_path: str) -> None:
         json.dump(zenodo_dict, f, indent=2)
     print(f"Zenodo JSON written to {output_path}")
 
-def main():
+def main(argv=None):
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument('--template', action='store_true', help='Write template CSV and exit')
     parser.add_argument('--csv', type=str, help='CSV file to convert to zenodo.json')
     parser.add_argument('--out', type=str, help='Output zenodo.json path')
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     if args.template:
         write_template_csv('input.csv')
         print('Template CSV created.')
@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import re
+import time
+import pytest
+from src.checks import check_naming_convention
+
+PATTERN = re.compile(r"^P[0-9]{2}_.*")
+
+def make_tree(root):
+    for sub in ("a", os.path.join("a", "b"), "c"):
+        (root / sub).mkdir(parents=True, exist_ok=True)
+    for rel in ("P01_x.csv", "bad.csv", os.path.join("a", "P02_y.CSV"), os.path.join("a", "P03_z.txt"),
+                os.path.join("a", "b", "oops.json"), os.path.join("c", "P04_w.json")):
+        (root / rel).write_text("", encoding='utf-8')
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_scanner_enforces_pattern_and_extensions(tmp_path, workers):
+    make_tree(tmp_path)
+    exts = check_naming_convention.normalize_extensions(["csv", ".json"])
+    found = set(check_naming_convention.iter_non_compliant(str(tmp_path), PATTERN, exts, workers))
+    assert found == {
+        os.path.join(str(tmp_path), "bad.csv"),
+        os.path.join(str(tmp_path), "a", "P03_z.txt"),
+        os.path.join(str(tmp_path), "a", "b", "oops.json"),
+    }
+
+def test_listing_cache_skips_unchanged_directories(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    make_tree(data_dir)
+    old = time.time() - 60
+    for dirpath, _, _ in os.walk(data_dir):
+        os.utime(dirpath, (old, old))
+    cache_dir = str(tmp_path / "cache")
+    first = check_naming_convention.ListingCache(cache_dir, "rules")
+    expected = set(check_naming_convention.iter_non_compliant(str(data_dir), PATTERN, None, 2, first))
+    first.save()
+    listed = []
+    original_scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: listed.append(path) or original_scandir(path))
+    second = check_naming_convention.ListingCache(cache_dir, "rules")
+    assert set(check_naming_convention.iter_non_compliant(str(data_dir), PATTERN, None, 2, second)) == expected
+    assert listed == []
+    # Other naming rules must not reuse the cached verdicts
+    assert check_naming_convention.ListingCache(cache_dir, "other rules").entries == {}
+
+def test_compressed_files_count_as_their_inner_extension():
+    exts = check_naming_convention.normalize_extensions(["csv"])
+    assert check_naming_convention.is_compliant("P01_x.csv.gz", PATTERN, exts)
+    assert check_naming_convention.is_compliant("P01_x.CSV.ZST", PATTERN, exts)
+    assert not check_naming_convention.is_compliant("P01_x.json.gz", PATTERN, exts)
+    assert not check_naming_convention.is_compliant("P01_x.gz", PATTERN, exts)
+    assert check_naming_convention.is_compliant("P01_x.json.gz", PATTERN, frozenset(["json.gz"]))
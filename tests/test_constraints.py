@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import math
+import pytest
+from src.checks.constraints import (
+    ColumnSpec, Compare, ConstraintError, InInterval, Interval, Length, Matches, parse_constraints, parse_interval
+)
+
+NUMBER = ColumnSpec('number', None, frozenset(['', 'NA']))
+TEXT = ColumnSpec('string', None, frozenset(['']))
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("1-5", Interval(1, 5)),
+    ("-5--1", Interval(-5, -1)),
+    ("1e-3 - 2", Interval(0.001, 2)),
+    ("[-1.5, 0)", Interval(-1.5, 0, hi_open=True)),
+    ("(-inf, 10]", Interval(-math.inf, 10, lo_open=True)),
+    ("A,B", None),
+    ("1-2-3", None),
+])
+def test_parse_interval(text, expected):
+    assert parse_interval(text) == expected
+
+
+def test_parse_constraints_flags_and_rules():
+    parsed = parse_constraints(
+        "Unique, NOT NULL; matches 'a\\'b\\d+' and length <= 4, (0, 1], value in [-2, 2], end >= `start date`",
+        "end"
+    )
+    assert parsed.unique and parsed.not_null
+    assert [type(rule) for rule in parsed.rules] == [Matches, Length, InInterval, InInterval, Compare]
+    assert [rule.source for rule in parsed.rules] == [
+        "matches 'a\\'b\\d+'", "length <= 4", "(0, 1]", "value in [-2, 2]", "end >= `start date`"
+    ]
+    assert parsed.rules[0].regex.pattern == "a'b\\d+"
+    assert parsed.rules[1].interval == Interval(hi=4)
+    assert [rule.columns for rule in parsed.rules] == [[], [], [], [], ["start date"]]
+
+
+@pytest.mark.parametrize("text", ["unique not null", "length [1,", "matches abc", "1 < 2", "x >", "value ~ 3"])
+def test_parse_constraints_rejects_malformed_text(text):
+    with pytest.raises(ConstraintError):
+        parse_constraints(text, "x")
+
+
+def test_value_rules_skip_values_their_type_rule_reports():
+    in_range = parse_constraints("[-1, 1)", "x").rules[0]
+    assert [in_range.bind_value(NUMBER)(v) for v in ("-1", "1", "abc", "nan")] == [True, False, True, True]
+    # Text columns have no type rule, so non-numbers violate the interval
+    assert in_range.bind_value(TEXT)("abc") is False
+
+
+def test_row_rules_compare_by_column_kind():
+    rule = parse_constraints("end >= start", "end").rules[0]
+    dates = rule.bind_row("end", {"end": ColumnSpec('date', None, frozenset([''])),
+                                  "start": ColumnSpec('date', 'DD.MM.YYYY', frozenset(['']))})
+    assert dates.check(("2024-01-02", "01.01.2024")) is True
+    assert dates.check(("2023-12-31", "01.01.2024")) is False
+    assert dates.check(("", "01.01.2024")) is True
+    numbers = rule.bind_row("end", {"end": NUMBER, "start": NUMBER})
+    assert numbers.check(("10", "9")) is True
+    assert numbers.check(("NA", "9")) is True
+    with pytest.raises(ConstraintError):
+        parse_constraints("value > 'abc'", "x").rules[0].bind_value(NUMBER)
@@ -35,3 +35,74 @@ def test_build_expectations_from_csv(tmp_path):
             tuple(sorted((k, make_hashable(v)) for k, v in e['kwargs'].items()))
         )
     assert set(map(norm, expectations)) == set(map(norm, expected))
+
+def test_expectations_run_without_great_expectations(tmp_path):
+    from src.utils.csv_to_ge_suite import expectations_to_columns, validate_expectations
+    dict_csv = tmp_path / "data_dictionary.csv"
+    dict_csv.write_text(
+        "Variable Name,Data Type,Allowed Values / Range,Constraints / Validation Rules\n"
+        "id,integer,,unique\n"
+        "flag,boolean,,\n"
+        "score,float,0-10,not null\n"
+        "code,string,\"A,B\",\n", encoding='utf-8')
+    data_csv = tmp_path / "data.csv"
+    data_csv.write_text("id,flag,score,code\n1,yes,5,A\n1,maybe,11,C\nx,no,,B\n", encoding='utf-8')
+    expectations = build_expectations_from_csv(str(dict_csv))
+    assert expectations_to_columns(expectations)[2] == {
+        "Variable Name": "score", "Data Type": "float", "Allowed Values / Range": "[0.0, 10.0]",
+        "Constraints / Validation Rules": "not null"
+    }
+    report = validate_expectations(expectations, str(data_csv))
+    assert report["column_issues"] == {
+        "id": ["Type errors: ['x']", "Duplicate values: ['1']"],
+        "flag": ["Type errors: ['maybe']"],
+        "score": ["Out of range: 11", "Null/missing values at rows: [2]"],
+        "code": ["Invalid value: C"],
+    }
+    assert "great_expectations" not in sys.modules
+
+def test_signed_and_interval_ranges_become_between_expectations():
+    from src.utils.csv_to_ge_suite import expectations_for_column, expectations_to_columns
+    from src.checks.constraints import parse_interval
+    def between(allowed):
+        row = {"Variable Name": "x", "Data Type": "float", "Allowed Values / Range": allowed}
+        return [e["kwargs"] for e in expectations_for_column(row)
+                if e["expectation_type"] not in ("expect_column_to_exist", "expect_column_values_to_be_of_type")]
+    assert between("-40 - 60") == [{"column": "x", "min_value": -40.0, "max_value": 60.0}]
+    assert between("(0, 1]") == [{"column": "x", "min_value": 0.0, "max_value": 1.0, "strict_min": True}]
+    assert between("[-inf, 0)") == [{"column": "x", "min_value": None, "max_value": 0.0, "strict_max": True}]
+    assert between("1, 2") == [{"column": "x", "value_set": ["1", "2"]}]
+    assert between("1-2-3") == []
+    for allowed in ("-5--1", "(0, 1]", "[-inf, 0)"):
+        row = {"Variable Name": "x", "Data Type": "float", "Allowed Values / Range": allowed}
+        back = expectations_to_columns(expectations_for_column(row))[0]["Allowed Values / Range"]
+        assert vars(parse_interval(back)) == vars(parse_interval(allowed))
+
+def test_batch_suites_regenerate_only_changed_entries(tmp_path, monkeypatch):
+    from src.utils import csv_to_ge_suite
+
+    class Context:
+        def __init__(self):
+            self.saved = []
+
+        def save_expectation_suite(self, suite):
+            self.saved.append(suite)
+
+    monkeypatch.setattr(csv_to_ge_suite, "_expectation_suite", lambda name, expectations: (name, len(expectations)))
+    dict_path = tmp_path / "data_dictionary.json"
+    state_path = str(tmp_path / "state" / "ge_suites.json")
+    data_dict = {
+        "P01.csv": {"path": "data/P01.csv", "columns": [{"Variable Name": "id", "Data Type": "integer"}]},
+        "P02 run.csv": {"path": "data/P02 run.csv", "columns": [{"Variable Name": "v"}]},
+    }
+    dict_path.write_text(json.dumps(data_dict), encoding='utf-8')
+    context = Context()
+    assert csv_to_ge_suite.build_ge_suites(str(dict_path), state_path, context) == ["P01_csv_suite", "P02_run_csv_suite"]
+    assert context.saved == [("P01_csv_suite", 2), ("P02_run_csv_suite", 1)]
+    # Nothing changed: no suite is written and no context is needed
+    assert csv_to_ge_suite.build_ge_suites(str(dict_path), state_path) == []
+    data_dict["P02 run.csv"]["columns"][0]["Constraints / Validation Rules"] = "unique"
+    dict_path.write_text(json.dumps(data_dict), encoding='utf-8')
+    assert csv_to_ge_suite.build_ge_suites(str(dict_path), state_path, context) == ["P02_run_csv_suite"]
+    assert context.saved[-1] == ("P02_run_csv_suite", 2)
+    assert len(csv_to_ge_suite.build_ge_suites(str(dict_path), state_path, context, force=True)) == 2
@@ -128,3 +128,141 @@ def test_generate_data_dictionary_handles_non_csv(tmp_path):
         assert result["file.txt"]["columns"] == []
     finally:
         os.chdir(orig_cwd)
+
+def test_profile_fills_only_empty_fields(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    rows = [{"id": str(i), "site": "AB"[i % 2], "score": f"{i / 4}", "flag": "yes" if i % 3 else "no",
+             "when": "2024-01-0%d" % (i % 9 + 1), "note": "NA" if i % 5 == 0 else f"text {i}"} for i in range(100)]
+    create_sample_csv(data_dir / "sample.csv", list(rows[0]), rows)
+    dict_path = tmp_path / "dd.json"
+    with open(dict_path, 'w', encoding='utf-8') as f:
+        json.dump({"sample.csv": {"path": str(data_dir / "sample.csv"), "columns": [
+            {"Variable Name": "id", "Data Type": "string", "Example Value": "curated"}]}}, f)
+    config_path = tmp_path / ".project_config.json"
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({"data_directory_name": str(data_dir)}, f)
+    generate_data_dictionary.main(str(config_path), str(dict_path), profile=True, sample_rows=50)
+    with open(dict_path, 'r', encoding='utf-8') as f:
+        cols = {col["Variable Name"]: col for col in json.load(f)["sample.csv"]["columns"]}
+    assert cols["id"]["Data Type"] == "string" and cols["id"]["Example Value"] == "curated"
+    assert not cols["id"].get("Allowed Values / Range")
+    assert cols["site"]["Data Type"] == "string" and cols["site"]["Allowed Values / Range"] == "A,B"
+    # Only the first 50 rows are profiled
+    assert cols["score"]["Data Type"] == "float" and cols["score"]["Allowed Values / Range"] == "0.0-12.25"
+    assert cols["flag"]["Data Type"] == "boolean"
+    assert cols["when"]["Data Type"] == "date"
+    assert cols["note"]["Data Type"] == "string" and cols["note"]["Missing Value Representation"] == "NA"
+    assert cols["note"]["Example Value"].startswith("text ")
+
+def test_unchanged_files_are_skipped_and_deleted_files_pruned(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    create_sample_csv(data_dir / "a.csv", ["id"], [{"id": "1"}])
+    create_sample_csv(data_dir / "b.csv", ["id", "value"], [{"id": "1", "value": "x"}])
+    old = 1_600_000_000_000_000_000
+    for name in ("a.csv", "b.csv"):
+        os.utime(data_dir / name, ns=(old, old))
+    dict_path = tmp_path / "dd.json"
+    config_path = tmp_path / ".project_config.json"
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({"data_directory_name": str(data_dir)}, f)
+    generate_data_dictionary.main(str(config_path), str(dict_path))
+    with open(dict_path, 'r', encoding='utf-8') as f:
+        first = json.load(f)
+    assert first["a.csv"]["fingerprint"]["mtime_ns"] == old
+    assert set(first["b.csv"]["fingerprint"]) == {"size", "mtime_ns"}
+    # Unchanged files are not opened and the dictionary is not rewritten
+    os.utime(dict_path, ns=(old, old))
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda path, *a, **kw: opened.append(str(path)) or real_open(path, *a, **kw))
+    generate_data_dictionary.main(str(config_path), str(dict_path))
+    monkeypatch.undo()
+    assert not any(path.endswith(".csv") for path in opened)
+    assert os.stat(dict_path).st_mtime_ns == old
+    # A changed file is read again, a deleted one is pruned
+    create_sample_csv(data_dir / "a.csv", ["id", "extra"], [{"id": "1", "extra": "y"}])
+    os.utime(data_dir / "a.csv", ns=(old + 1, old + 1))
+    (data_dir / "b.csv").unlink()
+    generate_data_dictionary.main(str(config_path), str(dict_path))
+    with open(dict_path, 'r', encoding='utf-8') as f:
+        result = json.load(f)
+    assert list(result) == ["a.csv"]
+    assert [col["Variable Name"] for col in result["a.csv"]["columns"]] == ["id", "extra"]
+    assert result["a.csv"]["fingerprint"]["mtime_ns"] == old + 1
+
+def test_csv_dictionary_keeps_curator_edits(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    create_sample_csv(data_dir / "a.csv", ["id", "value"], [{"id": "1", "value": "x"}])
+    create_sample_csv(data_dir / "b.csv", ["id"], [{"id": "1"}])
+    dict_path = tmp_path / "dd.csv"
+    config_path = tmp_path / ".project_config.json"
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({"data_directory_name": str(data_dir)}, f)
+    generate_data_dictionary.main(str(config_path), str(dict_path))
+    import csv
+    with open(dict_path, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    rows[1]["Description"] = "curated"
+    with open(dict_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    (data_dir / "b.csv").unlink()
+    generate_data_dictionary.main(str(config_path), str(dict_path))
+    with open(dict_path, 'r', encoding='utf-8', newline='') as f:
+        result = list(csv.DictReader(f))
+    assert [(row["Filename"], row["Variable Name"], row["Description"]) for row in result] == [
+        ("a.csv", "id", ""), ("a.csv", "value", "curated")]
+
+def test_columnar_files_get_csv_like_entries(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    pyarrow.parquet.write_table(pa.table({"id": [1, 2, 3], "site": ["A", "B", "A"]}), data_dir / "sample.parquet")
+    create_sample_csv(data_dir / "sample.csv", ["id", "site"], [{"id": "1", "site": "A"}, {"id": "2", "site": "B"},
+                                                                {"id": "3", "site": "A"}])
+    dict_path = tmp_path / "dd.json"
+    config_path = tmp_path / ".project_config.json"
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({"data_directory_name": str(data_dir)}, f)
+    generate_data_dictionary.main(str(config_path), str(dict_path), profile=True)
+    with open(dict_path, 'r', encoding='utf-8') as f:
+        result = json.load(f)
+    assert result["sample.parquet"]["columns"] == result["sample.csv"]["columns"]
+    assert [col["Variable Name"] for col in result["sample.parquet"]["columns"]] == ["id", "site"]
+    assert result["sample.parquet"]["columns"][0]["Data Type"] == "integer"
+
+def test_compressed_csv_gets_entry(tmp_path):
+    import gzip
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "sample.csv.gz").write_bytes(gzip.compress(b"id,site\n1,A\n2,B\n3,A\n"))
+    dict_path = tmp_path / "dd.json"
+    config_path = tmp_path / ".project_config.json"
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({"data_directory_name": str(data_dir)}, f)
+    generate_data_dictionary.main(str(config_path), str(dict_path), profile=True)
+    with open(dict_path, 'r', encoding='utf-8') as f:
+        cols = json.load(f)["sample.csv.gz"]["columns"]
+    assert [col["Variable Name"] for col in cols] == ["id", "site"]
+    assert cols[1]["Allowed Values / Range"] == "A,B"
+
+def test_json_lines_get_flattened_field_entries(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "events.jsonl").write_text('{"id": 1, "meta": {"site": "A"}}\n{"id": 2, "extra": true}\n'
+                                           '{"id": 3, "meta": {"site": "A"}}\n', encoding='utf-8')
+    dict_path = tmp_path / "dd.json"
+    config_path = tmp_path / ".project_config.json"
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({"data_directory_name": str(data_dir)}, f)
+    generate_data_dictionary.main(str(config_path), str(dict_path), profile=True)
+    with open(dict_path, 'r', encoding='utf-8') as f:
+        cols = {col["Variable Name"]: col for col in json.load(f)["events.jsonl"]["columns"]}
+    assert list(cols) == ["id", "meta.site", "extra"]
+    assert cols["id"]["Data Type"] == "integer"
+    assert cols["meta.site"]["Data Type"] == "string" and cols["extra"]["Data Type"] == "boolean"
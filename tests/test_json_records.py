@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import pytest
+from src.checks import json_records
+
+RECORDS = [{"id": i, "meta": {"site": "AB"[i % 2], "tags": [i, 2.5]}, "ok": i % 3 == 0, "note": None}
+           for i in range(200)]
+
+@pytest.mark.parametrize("block_chars", [5, 64, 1 << 18])
+@pytest.mark.parametrize("layout", ["array", "lines"])
+def test_records_stream_across_blocks(tmp_path, block_chars, layout):
+    path = tmp_path / "records.json"
+    if layout == "array":
+        path.write_text(json.dumps(RECORDS, indent=2), encoding='utf-8')
+    else:
+        path.write_text("\n".join(json.dumps(r) for r in RECORDS) + "\n", encoding='utf-8')
+    assert list(json_records.iter_json_values(str(path), block_chars)) == RECORDS
+
+def test_records_are_flattened_to_csv_like_text(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_text('{"id": 7, "meta": {"site": "A", "tags": [1, 2.5]}, "ok": true, "note": null}\n{"x": {}}\n',
+                    encoding='utf-8')
+    assert list(json_records.iter_json_records(str(path))) == [
+        {"id": "7", "meta.site": "A", "meta.tags": "[1,2.5]", "ok": "true", "note": ""},
+        {"x": "{}"},
+    ]
+    assert json_records.discover_fields(str(path)) == ["id", "meta.site", "meta.tags", "ok", "note", "x"]
+
+def test_truncated_array_and_non_object_records_are_errors(tmp_path):
+    path = tmp_path / "bad.json"
+    path.write_text('[{"id": 1},', encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(json_records.iter_json_values(str(path)))
+    path.write_text('[1, 2]', encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(json_records.iter_json_records(str(path)))
+
+@pytest.mark.parametrize("block_chars", [5, 64, 1 << 18])
+def test_malformed_record_fails_at_its_position_in_the_file(tmp_path, block_chars):
+    path = tmp_path / "bad.jsonl"
+    path.write_text('{"id": 1}\n{"id": x}\n' + '{"id": 2}\n' * 1000, encoding='utf-8')
+    with pytest.raises(json.JSONDecodeError) as excinfo:
+        list(json_records.iter_json_values(str(path), block_chars))
+    assert (excinfo.value.lineno, excinfo.value.colno, excinfo.value.pos) == (2, 8, 17)
+    # The rest of the file is not read into the buffer
+    assert len(excinfo.value.doc) < max(100, 2 * block_chars)
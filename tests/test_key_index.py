@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+from src.checks.key_index import KeyIndexStore, drop_missing
+from src.checks.uniqueness import hash_key_columns
+
+def write_keys(path, keys, age=60):
+    path.write_text("\n".join(keys) + "\n", encoding='utf-8')
+    old = time.time() - age
+    os.utime(path, (old, old))
+
+def reader(path, calls):
+    def read_keys():
+        calls.append(path)
+        yield [path.read_text(encoding='utf-8').split()]
+    return read_keys
+
+def test_index_holds_distinct_keys_across_spilled_runs(tmp_path):
+    keys = [f"k{i % 3000}" for i in range(9000)]
+    path = tmp_path / "keys.txt"
+    write_keys(path, keys)
+    # A 1-byte budget spills a sorted run every 1024 hashes
+    store = KeyIndexStore(str(tmp_path / "index"), memory_budget=1, spill_dir=str(tmp_path))
+    index = store.get(str(path), ["id"], reader(path, []))
+    assert index.count == 3000
+    probe = ["k0", "k2999", "k3000", "x"]
+    assert list(index.contains(hash_key_columns([probe]))) == [True, True, False, False]
+    assert not list(tmp_path.glob("fairy-unique-*"))
+
+def test_store_rebuilds_only_when_the_file_changes(tmp_path):
+    path = tmp_path / "keys.txt"
+    write_keys(path, ["a", "b"])
+    store = KeyIndexStore(str(tmp_path / "index"))
+    calls = []
+    first = store.get(str(path), ["id"], reader(path, calls))
+    second = KeyIndexStore(str(tmp_path / "index")).get(str(path), ["id"], reader(path, calls))
+    assert len(calls) == 1 and second.path == first.path and second.count == 2
+    write_keys(path, ["a", "b", "c"], age=30)
+    third = store.get(str(path), ["id"], reader(path, calls))
+    assert len(calls) == 2 and third.count == 3
+    # Another set of key columns is another index
+    store.get(str(path), ["other"], reader(path, calls))
+    assert len(calls) == 3 and store.built == 3
+
+def test_recently_modified_file_is_indexed_for_one_run_only(tmp_path):
+    path = tmp_path / "keys.txt"
+    write_keys(path, ["a"], age=0)
+    store = KeyIndexStore(str(tmp_path / "index"))
+    calls = []
+    assert store.get(str(path), ["id"], reader(path, calls)).fingerprint is None
+    store.get(str(path), ["id"], reader(path, calls))
+    assert len(calls) == 2 and store.reused == 0
+
+def test_drop_missing_skips_none_and_null_tokens():
+    rows, columns = drop_missing([["a", "", "b", None, "c"], ["1", "2", "NA", "4", "5"]],
+                                 [frozenset([""]), frozenset(["", "NA"])])
+    assert list(rows) == [0, 4]
+    assert [list(col) for col in columns] == [["a", "c"], ["1", "5"]]
@@ -0,0 +1,28 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import subprocess
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+def test_check_naming_runs_in_process_without_heavy_imports(tmp_path):
+    config = {"data_naming_convention_regex": r"^P[0-9]{2}\.csv$", "data_directory_name": "data",
+              "allowed_file_extensions": ["csv"]}
+    (tmp_path / ".project_config.json").write_text(json.dumps(config), encoding='utf-8')
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "P01.csv").write_text("a\n", encoding='utf-8')
+    script = (
+        "import sys, subprocess\n"
+        f"sys.path.insert(0, {SRC_DIR!r})\n"
+        "def no_subprocess(*args, **kwargs):\n"
+        "    raise AssertionError('command started a subprocess')\n"
+        "subprocess.run = no_subprocess\n"
+        "import main\n"
+        "main.main(['--check-naming'])\n"
+        "print(sorted(m for m in ('pandas', 'numpy', 'great_expectations') if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ["All files are compliant.", "[]"]
@@ -6,6 +6,7 @@ import json
 import tempfile
 import pytest
 from src.checks import quality_check
+from src.checks.constraints import Interval
 
 def create_data_and_dictionary(tmp_path, csv_columns, csv_rows, dict_columns):
     import csv
@@ -96,3 +97,628 @@ def test_uniqueness_and_not_null(tmp_path):
     assert "id" in col_issues
     assert any("Duplicate values" in msg for msg in col_issues["id"])
     assert any("Null/missing values" in msg for msg in col_issues["id"])
+
+def test_check_file_streams_rows_in_order(tmp_path):
+    csv_columns = ["id", "score"]
+    csv_rows = [{"id": str(i), "score": "" if i % 250 == 0 else "5"} for i in range(1000)]
+    dict_columns = [
+        {"Variable Name": "id", "Data Type": "integer", "Constraints / Validation Rules": "unique"},
+        {"Variable Name": "score", "Data Type": "integer", "Allowed Values / Range": "0-4",
+         "Constraints / Validation Rules": "not null"}
+    ]
+    data_dir, dict_path = create_data_and_dictionary(tmp_path, csv_columns, csv_rows, dict_columns)
+    result = quality_check.check_file(str(data_dir / "sample.csv"), dict_columns)
+    assert result["file_issues"] == []
+    assert "id" not in result["column_issues"]
+    score_issues = result["column_issues"]["score"]
+    assert score_issues[-1] == "Null/missing values at rows: [0, 250, 500, 750]"
+    assert sum(1 for msg in score_issues if msg.startswith("Out of range")) == 21
+    assert "Out of range: 976 more values not shown" in score_issues
+    full = quality_check.check_file(str(data_dir / "sample.csv"), dict_columns, options=quality_check.CheckOptions(max_samples=None))
+    assert sum(1 for msg in full["column_issues"]["score"] if msg.startswith("Out of range")) == 996
+
+def test_compiled_plan_is_cached_and_reusable(tmp_path):
+    csv_columns = ["id", "grade"]
+    csv_rows = [{"id": "1", "grade": "A"}, {"id": "2", "grade": "Z"}]
+    dict_columns = [
+        {"Variable Name": "id", "Data Type": "integer", "Allowed Values / Range": "1-5"},
+        {"Variable Name": "grade", "Allowed Values / Range": "A, B", "Missing Value Representation": "NA"}
+    ]
+    data_dir, dict_path = create_data_and_dictionary(tmp_path, csv_columns, csv_rows, dict_columns)
+    plan = quality_check.load_plan(str(dict_path))
+    assert quality_check.load_plan(str(dict_path)) is plan
+    id_plan, grade_plan = plan.files["sample.csv"].columns
+    assert id_plan.range_bounds == Interval(1.0, 5.0)
+    assert grade_plan.allowed_values == frozenset(["A", "B"])
+    assert grade_plan.null_values == frozenset(["", "NA"])
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), plan=plan)
+    assert report["sample.csv"]["column_issues"] == {"grade": ["Invalid value: Z"]}
+
+def create_many_files(tmp_path, count):
+    import csv
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    dictionary = {}
+    for i in range(count):
+        csv_path = data_dir / f"file{i}.csv"
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(["id"])
+            writer.writerow([str(i)])
+            writer.writerow(["bad"])
+        dictionary[f"file{i}.csv"] = {
+            "path": str(csv_path),
+            "columns": [{"Variable Name": "id", "Data Type": "integer"}]
+        }
+    dict_path = tmp_path / "data_dictionary.json"
+    with open(dict_path, 'w', encoding='utf-8') as f:
+        json.dump(dictionary, f)
+    return data_dir, dict_path
+
+def test_parallel_jobs_match_sequential_order(tmp_path):
+    data_dir, dict_path = create_many_files(tmp_path, 6)
+    sequential = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path))
+    parallel = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), jobs=3)
+    assert parallel == sequential
+    assert list(parallel) == [f"file{i}.csv" for i in range(6)]
+
+def test_parallel_worker_crash_marks_only_that_file(tmp_path, monkeypatch):
+    import multiprocessing
+    if multiprocessing.get_start_method() != 'fork':
+        pytest.skip("requires fork so workers inherit the patched check_file")
+    data_dir, dict_path = create_many_files(tmp_path, 4)
+    original = quality_check.check_file
+
+    def crashing_check_file(file_path, *args, **kwargs):
+        if file_path.endswith("file2.csv"):
+            os._exit(1)
+        return original(file_path, *args, **kwargs)
+
+    monkeypatch.setattr(quality_check, "check_file", crashing_check_file)
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), jobs=2)
+    assert "error" in report["file2.csv"]
+    for name in ("file0.csv", "file1.csv", "file3.csv"):
+        assert report[name]["column_issues"] == {"id": ["Type errors: ['bad']"]}
+
+def test_chunked_validation_matches_sequential(tmp_path):
+    csv_columns = ["id", "note"]
+    csv_rows = []
+    for i in range(300):
+        note = "line one\nline two" if i % 7 == 0 else f"note {i}"
+        csv_rows.append({"id": str(i % 120) if i % 50 else "", "note": note})
+    dict_columns = [
+        {"Variable Name": "id", "Data Type": "integer", "Allowed Values / Range": "0-100",
+         "Constraints / Validation Rules": "unique, not null"},
+        {"Variable Name": "note", "Data Type": "string"}
+    ]
+    data_dir, dict_path = create_data_and_dictionary(tmp_path, csv_columns, csv_rows, dict_columns)
+    csv_path = str(data_dir / "sample.csv")
+    layout = quality_check.plan_csv_chunks(csv_path, 256)
+    assert layout is not None and len(layout.ranges) > 5
+    assert layout.fieldnames == csv_columns
+    sequential = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path))
+    chunked = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), jobs=4, chunk_size=256)
+    assert chunked == sequential
+    id_issues = sequential["sample.csv"]["column_issues"]["id"]
+    assert id_issues[-1] == "Null/missing values at rows: [0, 50, 100, 150, 200, 250]"
+
+def test_vectorized_engine_matches_python_engine(tmp_path):
+    pytest.importorskip("pandas")
+    csv_columns = ["id", "amount", "flag", "when", "site"]
+    values = {
+        "id": ["1", "2", "2", "x", "", "1_0"],
+        "amount": ["1.5", "-2", "abc", "NA", "1e3", " 7 "],
+        "flag": ["true", "No", "maybe", "1", "", "YES"],
+        "when": ["2024-01-01", "2024-13-01", "", "2024-02-02", "2024-01-01", "soon"],
+        "site": ["A", "B", "C", "A", "NA", "b"],
+    }
+    csv_rows = [{col: values[col][i] for col in csv_columns} for i in range(6)]
+    dict_columns = [
+        {"Variable Name": "id", "Data Type": "integer", "Constraints / Validation Rules": "unique, not null"},
+        {"Variable Name": "amount", "Data Type": "float", "Allowed Values / Range": "0-10",
+         "Missing Value Representation": "NA"},
+        {"Variable Name": "flag", "Data Type": "boolean"},
+        {"Variable Name": "when", "Data Type": "date", "Constraints / Validation Rules": "not null"},
+        {"Variable Name": "site", "Allowed Values / Range": "A,B", "Missing Value Representation": "NA"},
+    ]
+    data_dir, dict_path = create_data_and_dictionary(tmp_path, csv_columns, csv_rows, dict_columns)
+    python_report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path))
+    vectorized_report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), options=quality_check.CheckOptions("vectorized"))
+    assert vectorized_report == python_report
+    assert set(python_report["sample.csv"]["column_issues"]) == set(csv_columns)
+
+def test_unknown_engine_is_rejected(tmp_path):
+    data_dir, dict_path = create_data_and_dictionary(tmp_path, ["id"], [{"id": "1"}], [{"Variable Name": "id"}])
+    with pytest.raises(ValueError):
+        quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), options=quality_check.CheckOptions("fast"))
+
+def test_issue_details_are_bounded(tmp_path):
+    csv_columns = ["id"]
+    csv_rows = [{"id": "" if 10 <= i < 20 or i == 500 else "x"} for i in range(1000)]
+    dict_columns = [{"Variable Name": "id", "Data Type": "integer", "Constraints / Validation Rules": "not null"}]
+    data_dir, dict_path = create_data_and_dictionary(tmp_path, csv_columns, csv_rows, dict_columns)
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), options=quality_check.CheckOptions(max_samples=5))
+    type_rule, null_rule = report["sample.csv"]["issue_details"]["id"]
+    assert type_rule["rule"] == "type" and type_rule["count"] == 989
+    assert type_rule["samples"] == ["x"] * 5 and type_rule["rows"] == [0, 1, 2, 3, 4]
+    assert type_rule["row_ranges"] == [[0, 9], [20, 499], [501, 999]]
+    assert type_rule["truncated"]
+    assert null_rule["count"] == 11
+    assert null_rule["row_ranges"] == [[10, 19], [500, 500]]
+    messages = report["sample.csv"]["column_issues"]["id"]
+    assert messages == [
+        "Type errors: ['x', 'x', 'x', 'x', 'x'] (and 984 more)",
+        "Null/missing values at rows: [10, 11, 12, 13, 14] (and 6 more)",
+    ]
+
+def write_keyed_file(tmp_path, n_rows):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    csv_path = data_dir / "visits.csv"
+    lines = ["subject,visit,value"] + [f"s{i},v{i % 3},{i}" for i in range(n_rows)]
+    # One repeated (subject, visit) pair and one fully repeated row
+    lines += ["s7,v1,x", "s8,v2,8"]
+    csv_path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    dict_path = tmp_path / "data_dictionary.json"
+    columns = [{"Variable Name": name} for name in ("subject", "visit", "value")]
+    columns[0]["Constraints / Validation Rules"] = "unique"
+    with open(dict_path, 'w', encoding='utf-8') as f:
+        json.dump({"visits.csv": {"path": str(csv_path), "columns": columns,
+                                  "unique_keys": [["subject", "visit"], "*", ["visit", "site"]]}}, f)
+    return data_dir, dict_path
+
+@pytest.mark.parametrize("engine", ["python", "vectorized"])
+@pytest.mark.parametrize("memory_bytes", [64 * 1024 * 1024, 1])
+def test_unique_keys_are_exact_within_memory_budget(tmp_path, engine, memory_bytes):
+    data_dir, dict_path = write_keyed_file(tmp_path, 3000)
+    report = quality_check.quality_check_tabular_data(
+        str(data_dir), str(dict_path), options=quality_check.CheckOptions(engine, unique_memory_bytes=memory_bytes, spill_dir=str(tmp_path))
+    )["visits.csv"]
+    assert report["file_issues"] == [
+        "Unique key (visit, site) uses columns missing in data: ['site']",
+        "Duplicate values for key (subject, visit): [['s7', 'v1'], ['s8', 'v2']]",
+        "Duplicate rows: [['s8', 'v2', '8']]",
+    ]
+    assert report["column_issues"] == {"subject": ["Duplicate values: ['s7', 's8']"]}
+    assert [detail["key"] for detail in report["key_issue_details"]] == ["(subject, visit)", "*"]
+    # Spilled hash runs are removed once the check is done
+    assert not list(tmp_path.glob("fairy-unique-*"))
+
+def test_chunked_unique_keys_match_sequential(tmp_path):
+    data_dir, dict_path = write_keyed_file(tmp_path, 3000)
+    sequential = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path))
+    chunked = quality_check.quality_check_tabular_data(
+        str(data_dir), str(dict_path), jobs=2, chunk_size=4096, options=quality_check.CheckOptions(unique_memory_bytes=1)
+    )
+    assert chunked == sequential
+
+@pytest.mark.parametrize("engine", ["python", "vectorized"])
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_columnar_files_match_csv_report(tmp_path, engine, fmt):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.feather
+    import pyarrow.parquet
+    n = 3000
+    table = pa.table({
+        "id": [i % 2500 for i in range(n)],
+        "score": [[1.5, 2.0, None, -3.25][i % 4] for i in range(n)],
+        "flag": [[True, False, None][i % 3] for i in range(n)],
+        "site": [["A", "B", "C", None][i % 4] for i in range(n)],
+        "unused": list(range(n)),
+    })
+    path = tmp_path / f"data.{fmt}"
+    if fmt == "parquet":
+        pyarrow.parquet.write_table(table, path, row_group_size=1000)
+    else:
+        pyarrow.feather.write_feather(table, path)
+    csv_path = tmp_path / "data.csv"
+    lines = ["id,score,flag,site,unused"] + [
+        ",".join([str(i % 2500), ["1.5", "2", "", "-3.25"][i % 4], ["true", "false", ""][i % 3],
+                  ["A", "B", "C", ""][i % 4], str(i)])
+        for i in range(n)
+    ]
+    csv_path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    columns = [
+        {"Variable Name": "id", "Data Type": "integer", "Constraints / Validation Rules": "unique"},
+        {"Variable Name": "score", "Data Type": "integer", "Allowed Values / Range": "0-50"},
+        {"Variable Name": "flag", "Data Type": "boolean", "Constraints / Validation Rules": "not null"},
+        {"Variable Name": "site", "Allowed Values / Range": "A,B"},
+        {"Variable Name": "gone"},
+    ]
+    options = quality_check.CheckOptions(engine, 5, unique_memory_bytes=1)
+    unique_keys = [["site", "flag"], "*"]
+    expected = quality_check.check_file(str(csv_path), columns, unique_keys=unique_keys, options=options)
+    report = quality_check.check_file(str(path), columns, unique_keys=unique_keys, options=options)
+    assert report == expected
+    assert report["column_issues"]["id"] == ["Duplicate values: ['0', '1', '10', '100', '101'] (and 495 more)"]
+
+@pytest.mark.parametrize("engine", ["python", "vectorized"])
+@pytest.mark.parametrize("name", ["data.csv.gz", "data.csv.bz2", "data.csv.xz", "data.csv.zst", "gzipped.csv"])
+def test_compressed_csv_matches_plain_report(tmp_path, engine, name):
+    import bz2
+    import gzip
+    import lzma
+    compressors = {"gz": gzip.compress, "bz2": bz2.compress, "xz": lzma.compress, "csv": gzip.compress}
+    if name.endswith(".zst"):
+        zstandard = pytest.importorskip("zstandard")
+        compressors["zst"] = zstandard.ZstdCompressor().compress
+    text = "id,score\n" + "".join(f"{i % 900},{'x' if i % 97 == 0 else i}\n" for i in range(1000))
+    plain = tmp_path / "plain.csv"
+    plain.write_text(text, encoding='utf-8')
+    packed = tmp_path / name
+    packed.write_bytes(compressors[name.rpartition(".")[2]](text.encode('utf-8')))
+    columns = [{"Variable Name": "id", "Constraints / Validation Rules": "unique"},
+               {"Variable Name": "score", "Data Type": "integer"}]
+    options = quality_check.CheckOptions(engine, 5, unique_memory_bytes=1)
+    expected = quality_check.check_file(str(plain), columns, unique_keys=["*"], options=options)
+    assert expected["column_issues"]["score"]
+    assert quality_check.check_file(str(packed), columns, unique_keys=["*"], options=options) == expected
+
+@pytest.mark.parametrize("engine", ["python", "vectorized"])
+@pytest.mark.parametrize("memory_bytes", [64 * 1024 * 1024, 1])
+def test_json_records_match_csv_report(tmp_path, engine, memory_bytes):
+    records = [{"id": i % 900, "meta": {"site": ["A", "B", "C", None][i % 4], "score": [1, 2.5, "x"][i % 3]},
+                "flag": [True, False, "maybe"][i % 5 % 3]} for i in range(1000)]
+    json_path = tmp_path / "records.json"
+    json_path.write_text(json.dumps(records), encoding='utf-8')
+    csv_path = tmp_path / "records.csv"
+    lines = ["id,meta.site,meta.score,flag"] + [
+        ",".join([str(r["id"]), r["meta"]["site"] or "", str(r["meta"]["score"]), str(r["flag"]).lower()])
+        for r in records
+    ]
+    csv_path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    columns = [
+        {"Variable Name": "id", "Data Type": "integer", "Constraints / Validation Rules": "unique"},
+        {"Variable Name": "meta.score", "Data Type": "integer", "Allowed Values / Range": "0-2"},
+        {"Variable Name": "flag", "Data Type": "boolean"},
+        {"Variable Name": "meta.site", "Allowed Values / Range": "A,B"},
+        {"Variable Name": "gone", "Constraints / Validation Rules": "not null"},
+    ]
+    options = quality_check.CheckOptions(engine, 5, unique_memory_bytes=memory_bytes)
+    unique_keys = [["meta.site", "flag"], ["id", "gone"]]
+    expected = quality_check.check_file(str(csv_path), columns, unique_keys=unique_keys, options=options)
+    report = quality_check.check_file(str(json_path), columns, unique_keys=unique_keys, options=options)
+    assert report == expected
+    assert "Missing columns in data: ['gone']" in report["file_issues"]
+    assert set(report["column_issues"]) == {"id", "meta.score", "flag", "meta.site"}
+
+def test_json_key_trackers_are_all_closed(tmp_path, monkeypatch):
+    json_path = tmp_path / "records.jsonl"
+    json_path.write_text('{"id": 1}\n{"id": 1}\n', encoding='utf-8')
+    opened, closed = [], []
+    tracker_init = quality_check.KeyTracker.__init__
+    tracker_close = quality_check.KeyTracker.close
+    def recording_init(self, *args, **kwargs):
+        opened.append(self)
+        tracker_init(self, *args, **kwargs)
+    def recording_close(self):
+        closed.append(self)
+        tracker_close(self)
+    monkeypatch.setattr(quality_check.KeyTracker, "__init__", recording_init)
+    monkeypatch.setattr(quality_check.KeyTracker, "close", recording_close)
+    columns = [{"Variable Name": "id", "Data Type": "integer"}]
+    report = quality_check.check_file(str(json_path), columns, unique_keys=[["id"], ["id", "gone"]])
+    assert report["file_issues"][0] == "Unique key (id, gone) uses columns missing in data: ['gone']"
+    assert report["key_issue_details"][0]["count"] == 1
+    assert len(opened) == 2
+    assert set(map(id, closed)) == set(map(id, opened))
+
+class RecordingHooks(quality_check.CheckHooks):
+    def __init__(self):
+        self.files = {}
+        self.run = None
+
+    def file_checked(self, fname, stats):
+        self.files[fname] = stats
+
+    def run_finished(self, stats):
+        self.run = stats
+
+@pytest.mark.parametrize("engine,jobs,chunk_size", [
+    ("python", 1, None), ("vectorized", 1, None), ("python", 2, 4096)
+])
+def test_hooks_report_file_column_and_rule_stats(tmp_path, engine, jobs, chunk_size):
+    if engine == "vectorized":
+        pytest.importorskip("pandas")
+    data_dir, dict_path = write_keyed_file(tmp_path, 3000)
+    plain = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), options=quality_check.CheckOptions(engine))
+    hooks = RecordingHooks()
+    report = quality_check.quality_check_tabular_data(
+        str(data_dir), str(dict_path), jobs=jobs, chunk_size=chunk_size, options=quality_check.CheckOptions(engine, hooks=hooks)
+    )
+    assert report == plain
+    stats = hooks.files["visits.csv"]
+    assert stats["rows"] == 3002
+    assert stats["bytes_read"] >= os.path.getsize(data_dir / "visits.csv")
+    assert stats["seconds"] > 0 and stats["rows_per_sec"] > 0
+    assert set(stats["columns"]) == {"subject", "visit", "value"}
+    assert stats["columns"]["subject"]["values"] == 3002
+    assert "unique" in stats["columns"]["subject"]["rules"]
+    assert "unique" in stats["rules"]
+    assert set(stats["unique_keys"]) == {"(subject, visit)", "row"}
+    assert stats["chunks"] > 1 if chunk_size else stats["chunks"] == 1
+    assert hooks.run["rows"] == 3002 and hooks.run["engine"] == engine
+    assert list(hooks.run["files"]) == ["visits.csv"]
+
+def test_profile_out_writes_json_and_marks_cached_files(tmp_path, monkeypatch):
+    data_dir, dict_path = create_many_files(tmp_path, 2)
+    # Files modified within the cache's racy window are never cached
+    for path in data_dir.iterdir():
+        os.utime(path, (1e9, 1e9))
+    config_path = tmp_path / ".project_config.json"
+    config_path.write_text(json.dumps({"data_directory_name": str(data_dir)}), encoding='utf-8')
+    monkeypatch.setenv("FAIRY_CONFIG", str(config_path))
+    monkeypatch.setenv("FAIRY_DD_OUT", str(dict_path))
+    profile_path = tmp_path / "stats.json"
+    cache_dir = str(tmp_path / "cache")
+    for cached in (False, True):
+        quality_check.main(["--cache", cache_dir, "--profile-out", str(profile_path)])
+        with open(profile_path, 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+        assert stats["rows"] == (0 if cached else 4)
+        assert [s["cached"] for s in stats["files"].values()] == [cached, cached]
+        assert stats["peak_rss_mb"] is None or stats["peak_rss_mb"] > 0
+
+@pytest.mark.parametrize("engine", ["python", "vectorized"])
+def test_max_errors_stops_reading_and_skips_remaining_files(tmp_path, engine):
+    if engine == "vectorized":
+        pytest.importorskip("pandas")
+    data_dir, dict_path = create_many_files(tmp_path, 4)
+    full = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), options=quality_check.CheckOptions(engine))
+    assert quality_check.quality_check_tabular_data(
+        str(data_dir), str(dict_path), options=quality_check.CheckOptions(engine, max_errors=10)
+    ) == full
+    options = quality_check.CheckOptions(engine, max_errors=2)
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), options=options)
+    assert options.max_errors == 2
+    # file1's last row reaches the limit, so it was read to its end
+    assert report["file0.csv"] == full["file0.csv"]
+    assert report["file1.csv"] == full["file1.csv"]
+    assert [report[f"file{i}.csv"]["skipped"] for i in (2, 3)] == [
+        "Not checked: the error limit (2) was reached"
+    ] * 2
+
+@pytest.mark.parametrize("engine", ["python", "vectorized"])
+def test_max_errors_records_at_most_the_limit(tmp_path, engine):
+    if engine == "vectorized":
+        pytest.importorskip("pandas")
+    columns = [{"Variable Name": "id", "Data Type": "integer", "Constraints / Validation Rules": "unique"}]
+    path = tmp_path / "bad.csv"
+    path.write_text("id\n1\nx\ny\nz\n2\n", encoding='utf-8')
+    options = quality_check.CheckOptions(engine, max_errors=2)
+    report = quality_check.check_file(str(path), columns, options=options)
+    assert report["issue_details"]["id"][0]["count"] == 2
+    assert "stopped" in report
+    options = quality_check.CheckOptions(engine, max_errors=3)
+    report = quality_check.check_file(str(path), columns, options=options)
+    assert report == quality_check.check_file(str(path), columns, options=quality_check.CheckOptions(engine))
+
+@pytest.mark.parametrize("text,max_errors", [
+    ("a,b\nx,y\n1,z\nw,2\n", 2),
+    ("a,b\n1,y\nw,z\n", 1),
+    ("a,b\n1,y\nw,z\n3,4\n", 2),
+])
+def test_max_errors_stops_on_the_same_row_with_both_engines(tmp_path, text, max_errors):
+    pytest.importorskip("pandas")
+    columns = [{"Variable Name": "a", "Data Type": "integer"},
+               {"Variable Name": "b", "Data Type": "integer", "Constraints / Validation Rules": "b > a"}]
+    path = tmp_path / "bad.csv"
+    path.write_text(text, encoding='utf-8')
+    reports = [quality_check.check_file(str(path), columns, options=quality_check.CheckOptions(engine, max_errors=max_errors))
+               for engine in ("python", "vectorized")]
+    assert reports[0] == reports[1]
+    assert "stopped" in reports[0]
+
+def test_parallel_fail_fast_finds_at_least_one_error(tmp_path):
+    data_dir, dict_path = create_many_files(tmp_path, 6)
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), jobs=2, options=quality_check.CheckOptions(max_errors=1))
+    assert list(report) == [f"file{i}.csv" for i in range(6)]
+    assert sum(quality_check.report_error_count(file_report) for file_report in report.values()) >= 1
+
+def test_ndjson_out_streams_issues(tmp_path, monkeypatch):
+    data_dir, dict_path = create_many_files(tmp_path, 3)
+    config_path = tmp_path / ".project_config.json"
+    config_path.write_text(json.dumps({"data_directory_name": str(data_dir)}), encoding='utf-8')
+    monkeypatch.setenv("FAIRY_CONFIG", str(config_path))
+    monkeypatch.setenv("FAIRY_DD_OUT", str(dict_path))
+    out_path = tmp_path / "issues.ndjson"
+    assert quality_check.main(["--ndjson-out", str(out_path), "--fail-fast"]) == 1
+    records = [json.loads(line) for line in out_path.read_text(encoding='utf-8').splitlines()]
+    assert records[0] == {
+        "file": "file0.csv", "kind": "column", "column": "id", "rule": "type", "count": 1,
+        "samples": ["bad"], "rows": [1], "row_ranges": [[1, 1]], "truncated": False,
+        "messages": ["Type errors: ['bad']"],
+    }
+    assert [record["kind"] for record in records] == ["column", "skipped", "skipped", "summary"]
+    assert records[-1] == {"files": 3, "issues": 1, "stopped": True, "kind": "summary"}
+
+@pytest.mark.parametrize("max_entries", [4096, 4, 1])
+def test_verdict_memo_matches_vectorized_engine(tmp_path, monkeypatch, max_entries):
+    pytest.importorskip("pandas")
+    csv_rows = [
+        {"code": "x" if i % 37 == 0 else str(i % 3), "amount": f"{i * 0.5}", "flag": "maybe" if i % 11 == 0 else "yes"}
+        for i in range(300)
+    ]
+    dict_columns = [
+        {"Variable Name": "code", "Data Type": "integer", "Allowed Values / Range": "0-1"},
+        {"Variable Name": "amount", "Data Type": "float", "Allowed Values / Range": "0-100"},
+        {"Variable Name": "flag", "Data Type": "boolean"},
+    ]
+    data_dir, dict_path = create_data_and_dictionary(tmp_path, ["code", "amount", "flag"], csv_rows, dict_columns)
+    expected = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), options=quality_check.CheckOptions("vectorized"))
+    # Small memos are emptied (low-cardinality columns) or dropped (high-cardinality ones)
+    monkeypatch.setattr(quality_check, "MEMO_MAX_ENTRIES", max_entries)
+    assert quality_check.quality_check_tabular_data(str(data_dir), str(dict_path)) == expected
+    assert set(expected["sample.csv"]["column_issues"]) == {"code", "amount", "flag"}
+
+@pytest.mark.parametrize("engine", ["python", "vectorized"])
+def test_date_formats_from_dictionary_and_run(tmp_path, engine):
+    if engine == "vectorized":
+        pytest.importorskip("pandas")
+    csv_rows = [
+        {"visit": "2024-02-29", "born": "29.02.2024"},
+        {"visit": "2023-02-29", "born": "2024-02-29"},
+        {"visit": "2024-01-01T10:00", "born": "01.13.2000"},
+    ]
+    dict_columns = [
+        {"Variable Name": "visit", "Data Type": "date"},
+        {"Variable Name": "born", "Data Type": "date", "Date Format": "DD.MM.YYYY"},
+    ]
+    data_dir, dict_path = create_data_and_dictionary(tmp_path, ["visit", "born"], csv_rows, dict_columns)
+    def type_samples(report, column):
+        return [d["samples"] for d in report["sample.csv"]["issue_details"][column] if d["rule"] == "type"][0]
+    iso = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), options=quality_check.CheckOptions(engine))
+    assert type_samples(iso, "visit") == ["2023-02-29"]
+    report = quality_check.quality_check_tabular_data(
+        str(data_dir), str(dict_path), options=quality_check.CheckOptions(engine, date_format="YYYY-MM-DD")
+    )
+    assert type_samples(report, "visit") == ["2023-02-29", "2024-01-01T10:00"]
+    assert type_samples(report, "born") == ["2024-02-29", "01.13.2000"]
+
+def test_config_date_format_choice_does_not_apply_to_values(tmp_path, monkeypatch):
+    csv_rows = [{"visit": "2024-01-01T10:00"}, {"visit": "2024-13-01"}]
+    dict_columns = [{"Variable Name": "visit", "Data Type": "date"}]
+    data_dir, dict_path = create_data_and_dictionary(tmp_path, ["visit"], csv_rows, dict_columns)
+    config_path = tmp_path / ".project_config.json"
+    config_path.write_text(json.dumps({"data_directory_name": str(data_dir), "date_format_choice": "YYYY-MM-DD"}), encoding='utf-8')
+    monkeypatch.setenv("FAIRY_CONFIG", str(config_path))
+    monkeypatch.setenv("FAIRY_DD_OUT", str(dict_path))
+    out_path = tmp_path / "issues.ndjson"
+    quality_check.main(["--ndjson-out", str(out_path)])
+    records = [json.loads(line) for line in out_path.read_text(encoding='utf-8').splitlines()]
+    assert [record["samples"] for record in records if record["kind"] == "column"] == [["2024-13-01"]]
+
+@pytest.mark.parametrize("engine", ["python", "vectorized"])
+def test_malformed_numeric_range_is_a_file_issue(tmp_path, engine):
+    if engine == "vectorized":
+        pytest.importorskip("pandas")
+    csv_rows = [{"dose": "1"}, {"dose": "2.5"}, {"dose": "x"}]
+    dict_columns = [{"Variable Name": "dose", "Data Type": "float", "Allowed Values / Range": "1-2-3"}]
+    data_dir, dict_path = create_data_and_dictionary(tmp_path, ["dose"], csv_rows, dict_columns)
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), options=quality_check.CheckOptions(engine))["sample.csv"]
+    assert report["file_issues"] == ["Invalid range for column dose: '1-2-3' is neither a range nor a list of numbers"]
+    assert report["column_issues"] == {"dose": ["Type errors: ['x']"]}
+
+def create_constraint_data(tmp_path, n_rows=400):
+    csv_columns = ["code", "temp", "score", "start", "end", "label"]
+    csv_rows = [{
+        "code": ["AB12", "ab12", "CD345", "EF1234", ""][i % 5],
+        "temp": ["-12.5", "-40", "0", "61", "x", "-41"][i % 6],
+        "score": ["1", "0", "0.5", "NA"][i % 4],
+        "start": "2024-01-10",
+        "end": ["2024-01-11", "2024-01-09", "", "later", "2024-01-10T00:00"][i % 5],
+        "label": ["b", "a", "c"][i % 3],
+    } for i in range(n_rows)]
+    dict_columns = [
+        {"Variable Name": "code", "Constraints / Validation Rules": 'matches "[A-Z]{2}[0-9]+", length <= 5'},
+        {"Variable Name": "temp", "Data Type": "float", "Allowed Values / Range": "-40 - 60",
+         "Constraints / Validation Rules": "value != 0"},
+        {"Variable Name": "score", "Data Type": "float", "Allowed Values / Range": "(0, 1]",
+         "Missing Value Representation": "NA"},
+        {"Variable Name": "start", "Data Type": "date"},
+        {"Variable Name": "end", "Data Type": "date", "Constraints / Validation Rules": "not null; end >= start"},
+        {"Variable Name": "label", "Constraints / Validation Rules": "label >= `code` and value in [0, 1]"},
+    ]
+    return create_data_and_dictionary(tmp_path, csv_columns, csv_rows, dict_columns)
+
+def test_constraint_rules_in_both_engines_and_chunks(tmp_path):
+    pytest.importorskip("pandas")
+    data_dir, dict_path = create_constraint_data(tmp_path)
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), options=quality_check.CheckOptions(max_samples=3))
+    for engine, jobs, chunk_size in (("vectorized", 1, None), ("python", 2, 2048), ("vectorized", 2, 2048)):
+        assert quality_check.quality_check_tabular_data(
+            str(data_dir), str(dict_path), jobs=jobs, chunk_size=chunk_size, options=quality_check.CheckOptions(engine, 3)
+        ) == report
+    issues = report["sample.csv"]["column_issues"]
+    details = {col: {d.get("constraint", d["rule"]): d for d in column} for col, column in report["sample.csv"]["issue_details"].items()}
+    assert issues["code"][:2] == ["Violates 'matches \"[A-Z]{2}[0-9]+\"': ['ab12', 'ab12', 'ab12'] (and 77 more)",
+                                  "Violates 'length <= 5': ['EF1234', 'EF1234', 'EF1234'] (and 77 more)"]
+    assert details["temp"]["range"]["samples"] == ["61", "-41", "61"]
+    assert details["temp"]["value != 0"]["samples"] == ["0", "0", "0"]
+    assert details["score"]["range"]["samples"] == ["0", "0", "0"]
+    assert details["end"]["end >= start"]["samples"][0] == {"end": "2024-01-09", "start": "2024-01-10"}
+    assert details["end"]["end >= start"]["rows"][:2] == [1, 6]
+    assert details["end"]["type"]["samples"][0] == "later"
+    assert details["label"]["label >= `code`"]["count"] == 27
+    assert details["label"]["value in [0, 1]"]["count"] == 400
+
+def test_invalid_constraints_and_missing_rule_columns_are_file_issues(tmp_path):
+    data_dir, dict_path = create_data_and_dictionary(tmp_path, ["id", "end"], [{"id": "1", "end": "2"}, {"id": "1", "end": ""}], [
+        {"Variable Name": "id", "Constraints / Validation Rules": "Unique identifier of the subject"},
+        {"Variable Name": "end", "Constraints / Validation Rules": "end >= start, not null"},
+        {"Variable Name": "other", "Constraints / Validation Rules": "length [1, "},
+    ])
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path))["sample.csv"]
+    assert report["file_issues"] == [
+        "Missing columns in data: ['other']",
+        "Constraint 'end >= start' of column end uses columns missing in data: ['start']",
+        "Invalid constraint for column other: Unexpected end of constraint",
+    ]
+    assert report["column_issues"] == {"id": ["Duplicate values: ['1']"], "end": ["Null/missing values at rows: [1]"]}
+
+def create_foreign_key_data(tmp_path, n_rows=600):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    samples = data_dir / "samples.csv"
+    samples.write_text("id,site\n" + "".join(f"s{j},site{j % 4}\n" for j in range(50)) + "NA,site0\n", encoding='utf-8')
+    rows = [("NA" if i % 13 == 0 else f"s{i % 60}", f"site{i % 3}") for i in range(n_rows)]
+    measurements = data_dir / "measurements.csv"
+    measurements.write_text("sample_id,site\n" + "".join(f"{s},{site}\n" for s, site in rows), encoding='utf-8')
+    records = data_dir / "measurements.jsonl"
+    records.write_text("".join(json.dumps({"sample_id": s, "site": site}) + "\n" for s, site in rows), encoding='utf-8')
+    columns = [{"Variable Name": "sample_id", "Missing Value Representation": "NA"}, {"Variable Name": "site"}]
+    foreign_keys = [
+        {"columns": "sample_id", "references": {"file": "samples.csv", "columns": "id"}},
+        {"columns": ["sample_id", "site"], "references": {"file": "samples.csv", "columns": ["id", "site"]}},
+    ]
+    dict_path = tmp_path / "data_dictionary.json"
+    with open(dict_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "samples.csv": {"path": str(samples), "columns": [
+                {"Variable Name": "id", "Missing Value Representation": "NA"}, {"Variable Name": "site"}
+            ]},
+            "measurements.csv": {"path": str(measurements), "columns": columns, "foreign_keys": foreign_keys},
+            "measurements.jsonl": {"path": str(records), "columns": columns, "foreign_keys": foreign_keys},
+        }, f)
+    return data_dir, dict_path, rows
+
+def test_foreign_keys_in_both_engines_and_chunks(tmp_path):
+    data_dir, dict_path, rows = create_foreign_key_data(tmp_path)
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), options=quality_check.CheckOptions(max_samples=3))
+    for engine, jobs, chunk_size in (("vectorized", 1, None), ("python", 2, 1024), ("vectorized", 2, 1024)):
+        assert quality_check.quality_check_tabular_data(
+            str(data_dir), str(dict_path), jobs=jobs, chunk_size=chunk_size, options=quality_check.CheckOptions(engine, 3)
+        ) == report
+    assert report["measurements.jsonl"]["key_issue_details"] == report["measurements.csv"]["key_issue_details"]
+    single, composite = report["measurements.csv"]["key_issue_details"]
+    orphans = [i for i, (s, _) in enumerate(rows) if s != "NA" and int(s[1:]) >= 50]
+    assert single["count"] == len(orphans) and single["rows"] == orphans[:3]
+    assert report["measurements.csv"]["file_issues"][0] == (
+        f"Values not found for foreign key (sample_id) -> samples.csv (id): ['s50', 's51', 's53'] "
+        f"(and {len(orphans) - 3} more)"
+    )
+    mismatched = [i for i, (s, site) in enumerate(rows) if s != "NA" and (int(s[1:]) >= 50 or f"site{int(s[1:]) % 4}" != site)]
+    assert composite["count"] == len(mismatched)
+    assert composite["samples"][0] == list(rows[mismatched[0]])
+    assert report["samples.csv"]["file_issues"] == []
+
+def test_invalid_foreign_keys_are_file_issues(tmp_path):
+    data_dir, dict_path, _ = create_foreign_key_data(tmp_path, 10)
+    with open(dict_path, encoding='utf-8') as f:
+        dictionary = json.load(f)
+    dictionary["measurements.csv"]["foreign_keys"] = [
+        {"columns": ["sample_id", "site"], "references": {"file": "samples.csv", "columns": ["id"]}},
+        {"columns": "visit", "references": "samples.csv"},
+        {"columns": "sample_id", "references": "subjects.csv"},
+        {"columns": "site", "references": "samples.csv"},
+        {"columns": "sample_id", "references": {"file": "samples.csv", "columns": "code"}},
+    ]
+    with open(dict_path, 'w', encoding='utf-8') as f:
+        json.dump(dictionary, f)
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path))["measurements.csv"]
+    assert report["file_issues"] == [
+        "Invalid foreign key (sample_id, site) -> samples.csv (id): it references a different number of columns",
+        "Foreign key (visit) -> samples.csv (visit) uses columns missing in data: ['visit']",
+        "Foreign key (sample_id) -> subjects.csv (sample_id) not checked: the referenced file is not in the data dictionary",
+        "Foreign key (sample_id) -> samples.csv (code) not checked: columns missing in samples.csv: ['code']",
+    ]
@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import time
+import pytest
+from src.checks import quality_check
+from src.checks import result_cache
+
+def write_sample(tmp_path, rows):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(exist_ok=True)
+    csv_path = data_dir / "sample.csv"
+    csv_path.write_text("id\n" + "".join(f"{r}\n" for r in rows), encoding='utf-8')
+    # Age the file past the racy window so its result may be cached
+    old = time.time() - 60
+    os.utime(csv_path, (old, old))
+    return data_dir, csv_path
+
+def write_dictionary(tmp_path, csv_path, dtype):
+    dict_path = tmp_path / "data_dictionary.json"
+    with open(dict_path, 'w', encoding='utf-8') as f:
+        json.dump({"sample.csv": {"path": str(csv_path),
+                                  "columns": [{"Variable Name": "id", "Data Type": dtype}]}}, f)
+    return dict_path
+
+def test_unchanged_file_reuses_cached_report(tmp_path, monkeypatch):
+    data_dir, csv_path = write_sample(tmp_path, ["1", "x"])
+    dict_path = write_dictionary(tmp_path, csv_path, "integer")
+    cache = result_cache.ResultCache(str(tmp_path / ".fairy_cache"))
+    first = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), cache=cache)
+    assert cache.misses == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("file should not be re-read")
+
+    monkeypatch.setattr(quality_check, "check_file", fail)
+    second = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), cache=cache)
+    assert second == first
+    assert cache.hits == 1
+
+def test_changed_rules_or_data_invalidate_cache(tmp_path):
+    data_dir, csv_path = write_sample(tmp_path, ["1", "x"])
+    dict_path = write_dictionary(tmp_path, csv_path, "integer")
+    cache = result_cache.ResultCache(str(tmp_path / ".fairy_cache"))
+    quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), cache=cache)
+    dict_path = write_dictionary(tmp_path, csv_path, "string")
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), cache=cache)
+    assert report["sample.csv"]["column_issues"] == {}
+    write_sample(tmp_path, ["1", "2", "y"])
+    dict_path = write_dictionary(tmp_path, csv_path, "integer")
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), cache=cache)
+    assert report["sample.csv"]["column_issues"] == {"id": ["Type errors: ['y']"]}
+    assert cache.hits == 0
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path / ".fairy_cache"), max_bytes=1000)
+    for i in range(20):
+        cache.put(f"{i:064x}", {"file_issues": ["x" * 100], "column_issues": {}})
+    total = sum(size for _, _, size in cache._entries())
+    assert total <= 1000
+    assert cache.get(f"{19:064x}") is not None
+
+def test_referenced_file_change_invalidates_referencing_report(tmp_path):
+    data_dir, csv_path = write_sample(tmp_path, ["1", "2"])
+    ids = data_dir / "ids.csv"
+    ids.write_text("id\n1\n", encoding='utf-8')
+    old = time.time() - 60
+    os.utime(ids, (old, old))
+    dict_path = tmp_path / "data_dictionary.json"
+    with open(dict_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "ids.csv": {"path": str(ids), "columns": [{"Variable Name": "id"}]},
+            "sample.csv": {"path": str(csv_path), "columns": [{"Variable Name": "id"}],
+                           "foreign_keys": [{"columns": "id", "references": "ids.csv"}]},
+        }, f)
+    cache = result_cache.ResultCache(str(tmp_path / ".fairy_cache"))
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), cache=cache)
+    assert report["sample.csv"]["file_issues"] == ["Values not found for foreign key (id) -> ids.csv (id): ['2']"]
+    index_files = sorted((tmp_path / ".fairy_cache" / "key_index").iterdir())
+    built = [path.stat().st_mtime_ns for path in index_files]
+    assert quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), cache=cache) == report
+    assert cache.hits == 2
+    assert [path.stat().st_mtime_ns for path in index_files] == built
+    ids.write_text("id\n1\n2\n", encoding='utf-8')
+    os.utime(ids, (old + 1, old + 1))
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), cache=cache)
+    assert report["sample.csv"]["file_issues"] == []
+    assert cache.hits == 2
@@ -0,0 +1,113 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import gzip
+import json
+import random
+import pytest
+from src.checks import quality_check
+from src.checks.quality_check import CheckOptions, check_file, check_file_sampled
+from src.checks.sampling import SampleSpec, parse_sample, wilson_interval
+
+COLUMNS = [
+    {"Variable Name": "id", "Data Type": "integer"},
+    {"Variable Name": "score", "Data Type": "integer", "Allowed Values / Range": "0-100"},
+    {"Variable Name": "flag", "Data Type": "boolean", "Constraints / Validation Rules": "not null"},
+]
+
+def write_scores(path, n_rows, error_rate=0.02, seed=1):
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write("id,score,flag\n")
+        for i in range(n_rows):
+            score = "x" if rng.random() < error_rate else str(rng.randint(0, 100))
+            f.write(f"{i},{score},{rng.choice(['yes', 'no'])}\n")
+
+def test_wilson_interval_bounds():
+    low, high = wilson_interval(0, 1000)
+    assert low == 0.0 and 0.003 < high < 0.004
+    low, high = wilson_interval(20, 1000)
+    assert low < 0.02 < high
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+
+def test_parse_sample():
+    assert parse_sample("10000").rows == 10000
+    assert parse_sample("5%").fraction == pytest.approx(0.05)
+    assert parse_sample("0.05", seed=7).fraction == 0.05
+    with pytest.raises(ValueError):
+        parse_sample("ten")
+    with pytest.raises(ValueError):
+        parse_sample("0")
+
+def test_sample_is_repeatable_and_estimates_the_rate(tmp_path):
+    path = str(tmp_path / "scores.csv")
+    write_scores(path, 100000)
+    true_count = check_file(path, COLUMNS)['issue_details']['score'][0]['count']
+    reports = [
+        check_file_sampled(path, COLUMNS, options=CheckOptions(engine, sample=SampleSpec(rows=4000, seed=3)))
+        for engine in ('python', 'vectorized', 'python')
+    ]
+    assert reports[0] == reports[1] == reports[2]
+    sample = reports[0]['sample']
+    assert 4000 <= sample['rows_sampled'] < 4016
+    assert sample['rows_estimated'] == pytest.approx(100000, rel=0.02)
+    score = sample['estimates']['score']
+    assert score['type']['low'] < true_count / 100000 < score['type']['high']
+    assert score['range']['violations'] == 0
+    assert set(sample['estimates']['flag']) == {'type', 'not_null'}
+    other_seed = check_file_sampled(path, COLUMNS, options=CheckOptions(sample=SampleSpec(rows=4000, seed=4)))
+    assert other_seed['sample']['estimates'] != sample['estimates']
+
+def test_unseekable_or_small_files_are_checked_in_full(tmp_path):
+    small = str(tmp_path / "small.csv")
+    write_scores(small, 100)
+    compressed = str(tmp_path / "scores.csv.gz")
+    with open(small, 'rb') as src, gzip.open(compressed, 'wb') as dst:
+        dst.write(src.read())
+    options = CheckOptions(sample=SampleSpec(rows=1000))
+    for path in (small, compressed):
+        report = check_file_sampled(path, COLUMNS, options=options)
+        assert 'full_scan' in report['sample']
+        del report['sample']
+        assert report == check_file(path, COLUMNS)
+
+def test_row_count_is_split_across_files_by_size(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    write_scores(str(data_dir / "big.csv"), 60000)
+    write_scores(str(data_dir / "small.csv"), 20000, seed=2)
+    dict_path = tmp_path / "data_dictionary.json"
+    with open(dict_path, 'w', encoding='utf-8') as f:
+        json.dump({name: {"path": str(data_dir / name), "columns": COLUMNS} for name in ("big.csv", "small.csv")}, f)
+    spec = SampleSpec(rows=2000, rows_per_seek=8)
+    report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), options=CheckOptions(sample=spec))
+    assert spec.allocation == {}
+    sizes = {name: os.path.getsize(data_dir / name) for name in report}
+    for name, size in sizes.items():
+        share = 2000 * size / sum(sizes.values())
+        assert share <= report[name]['sample']['rows_sampled'] < share + 8
+
+def test_quoted_header_spanning_lines(tmp_path):
+    path = str(tmp_path / "scores.csv")
+    write_scores(path, 20000)
+    with open(path, 'r', encoding='utf-8') as f:
+        body = f.read().split("\n", 1)[1]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('id,"sc\nore",flag\n' + body)
+    columns = [dict(COLUMNS[0]), dict(COLUMNS[1], **{"Variable Name": "sc\nore"}), dict(COLUMNS[2])]
+    report = check_file_sampled(path, columns, options=CheckOptions(sample=SampleSpec(rows=1000)))
+    assert not report["file_issues"]
+    assert report["sample"]["rows_estimated"] == pytest.approx(20000, rel=0.05)
+    assert set(report["sample"]["estimates"]) == {"id", "sc\nore", "flag"}
+
+def test_seeks_resync_to_records_spanning_lines(tmp_path):
+    path = str(tmp_path / "notes.csv")
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write("id,note,flag\n")
+        for i in range(20000):
+            f.write(f'{i},"first ""line""\nsecond, {i}",yes\n')
+    columns = [dict(COLUMNS[0]), {"Variable Name": "note"}, dict(COLUMNS[2])]
+    report = check_file_sampled(path, columns, options=CheckOptions(sample=SampleSpec(rows=1000, rows_per_seek=4)))
+    assert report["column_issues"] == {}
+    assert 1000 <= report["sample"]["rows_sampled"] < 1004
@@ -0,0 +1,107 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import random
+import time
+import pytest
+from src.checks import drift, quality_check
+from src.checks.result_cache import ResultCache
+from src.checks.sketches import ColumnSketch, HyperLogLog, QuantileSketch, load_snapshot
+from src.checks.uniqueness import hash_key_columns
+
+COLUMNS = [
+    {"Variable Name": "id", "Data Type": "integer", "Constraints / Validation Rules": "unique"},
+    {"Variable Name": "dose", "Data Type": "float", "Missing Value Representation": "NA"},
+    {"Variable Name": "arm", "Allowed Values / Range": "A, B"},
+]
+
+def write_release(path, n_rows, shift=0.0, null_rate=0.01, seed=1):
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write("id,dose,arm\n")
+        for i in range(n_rows):
+            dose = "NA" if rng.random() < null_rate else f"{rng.gauss(10 + shift, 2):.3f}"
+            f.write(f"{i},{dose},{rng.choice('AB')}\n")
+    old = time.time() - 60
+    os.utime(path, (old, old))
+
+def snapshot_release(tmp_path, name, n_rows, **kwargs):
+    data_dir = tmp_path / name
+    data_dir.mkdir()
+    write_release(data_dir / "trial.csv", n_rows, **kwargs)
+    dict_path = tmp_path / f"{name}.json"
+    with open(dict_path, 'w', encoding='utf-8') as f:
+        json.dump({"trial.csv": {"path": str(data_dir / "trial.csv"), "columns": COLUMNS}}, f)
+    sketch_path = tmp_path / f"{name}_sketches.json"
+    quality_check.quality_check_tabular_data(
+        str(data_dir), str(dict_path), options=quality_check.CheckOptions(sketch_path=str(sketch_path))
+    )
+    return load_snapshot(str(sketch_path))
+
+def test_column_sketch_is_independent_of_batches_and_merges():
+    rng = random.Random(0)
+    values = [f"{rng.gauss(0, 5):.2f}" for _ in range(20000)] + ["", "NA", "x", None]
+    whole = ColumnSketch(True, frozenset(["", "NA"]))
+    for v in values:
+        whole.add(v)
+    first, second = ColumnSketch(True, frozenset(["", "NA"])), ColumnSketch(True, frozenset(["", "NA"]))
+    first.add_batch(values[:7777])
+    second.add_batch(values[7777:])
+    first.merge(second)
+    assert whole.to_dict() == first.to_dict()
+    assert whole.count == 20004 and whole.nulls == 3
+    assert ColumnSketch.from_dict(json.loads(json.dumps(whole.to_dict()))).to_dict() == whole.to_dict()
+
+def test_hyperloglog_and_quantile_accuracy():
+    hashes = hash_key_columns([[str(i) for i in range(30000)]])
+    hll = HyperLogLog()
+    hll.add_hashes(hashes)
+    assert hll.estimate() == pytest.approx(30000, rel=0.05)
+    # The pure-Python path fills the same registers
+    plain = HyperLogLog()
+    plain.add_hashes([int(h) for h in hashes])
+    assert plain.registers == hll.registers
+    quantiles = QuantileSketch()
+    quantiles.add_many([float(i) for i in range(1, 1001)] + [0.0, -50.0])
+    assert quantiles.quantile(0.5) == pytest.approx(499, rel=0.01)
+    assert quantiles.quantile(0.0) == pytest.approx(-50, rel=0.01)
+    assert quantiles.quantile(1.0) == pytest.approx(1000, rel=0.01)
+
+def test_snapshot_is_the_same_for_engines_chunks_and_cache(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    write_release(data_dir / "trial.csv", 5000)
+    dict_path = tmp_path / "data_dictionary.json"
+    with open(dict_path, 'w', encoding='utf-8') as f:
+        json.dump({"trial.csv": {"path": str(data_dir / "trial.csv"), "columns": COLUMNS}}, f)
+    cache = ResultCache(str(tmp_path / "cache"))
+    runs = [("python", {}), ("vectorized", {}), ("python", dict(jobs=2, chunk_size=20000)),
+            ("python", dict(cache=cache)), ("python", dict(cache=cache))]
+    snapshots = []
+    for i, (engine, kwargs) in enumerate(runs):
+        path = str(tmp_path / f"sketches{i}.json")
+        options = quality_check.CheckOptions(engine, sketch_path=path)
+        report = quality_check.quality_check_tabular_data(str(data_dir), str(dict_path), options=options, **kwargs)
+        assert 'sketches' not in report["trial.csv"]
+        snapshots.append(load_snapshot(path)["files"])
+    assert cache.hits == 1
+    assert all(snapshot == snapshots[0] for snapshot in snapshots)
+    columns = snapshots[0]["trial.csv"]["columns"]
+    assert columns["dose"]["quantiles"] is not None and columns["arm"]["quantiles"] is None
+    assert columns["arm"]["min"] == "A" and columns["arm"]["max"] == "B"
+
+def test_drift_between_releases(tmp_path, capsys):
+    old = snapshot_release(tmp_path, "v1", 4000)
+    same = snapshot_release(tmp_path, "v2", 4000, seed=2)
+    shifted = snapshot_release(tmp_path, "v3", 4000, shift=3.0, null_rate=0.2, seed=3)
+    assert not drift.has_drift(drift.compare_snapshots(old, same))
+    comparison = drift.compare_snapshots(old, shifted)
+    dose = comparison["files"]["trial.csv"]["columns"]["dose"]
+    assert dose["drift"] == ["null_rate", "distribution"]
+    assert dose["median"][1] - dose["median"][0] == pytest.approx(3, abs=0.3)
+    status = drift.main(["--drift", str(tmp_path / "v1_sketches.json"), str(tmp_path / "v3_sketches.json")])
+    out = capsys.readouterr().out
+    assert status == 1
+    assert "Column dose: null rate" in out and "distribution shifted" in out
@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.checks import uniqueness
+
+def test_hash_store_spills_sorted_runs_and_finds_duplicates(tmp_path):
+    store = uniqueness.HashRunStore(memory_budget=1, spill_dir=str(tmp_path))
+    for i in range(5000):
+        store.add(i)
+    store.add(1234)
+    store.add(4321)
+    assert len(store.runs) == 4
+    assert store.duplicate_hashes() == {1234, 4321}
+    store.close()
+    assert not list(tmp_path.iterdir())
+
+def test_hash_collisions_are_not_reported_as_duplicates(monkeypatch):
+    # Every key hashes alike, so all of them become candidates
+    monkeypatch.setattr(uniqueness, "hash_key_columns", lambda key_columns: [0] * len(key_columns[0]))
+    tracker = uniqueness.KeyTracker("id", ["id"], memory_budget=1)
+    keys = [("a",), ("b",), ("c",), ("b",)]
+    for key in keys:
+        tracker.add(key)
+    assert tracker.keys is None
+    assert tracker.start_confirmation()
+    for key in keys:
+        tracker.confirm(0, key)
+    assert tracker.duplicate_keys == {("b",)}
+
+def test_composite_keys_skip_missing_values_but_rows_do_not():
+    columns = uniqueness.KeyTracker("(a, b)", ["a", "b"])
+    row = uniqueness.KeyTracker("row", None)
+    for key in [("1", None), ("1", None), ("1", "2"), ("1", "2")]:
+        columns.add(key)
+        row.add(key)
+    assert columns.duplicate_keys == {("1", "2")}
+    assert row.duplicate_keys == {("1", None), ("1", "2")}
+    assert uniqueness.hash_key(("ab", "c")) != uniqueness.hash_key(("a", "bc"))
@@ -0,0 +1,115 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import re
+import pytest
+from src.checks import quality_check
+from src.checks.quality_check import CheckOptions
+from src.checks.watch import Debouncer, InotifyWatcher, WatchSession
+
+def write(path, text, mtime):
+    path.write_text(text, encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+def create_session(tmp_path, debounce=2.0):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    write(data_dir / "P01.csv", "id,n\na,1\n", 1e9)
+    write(data_dir / "P02.csv", "id,n\nb,2\n", 1e9)
+    dict_path = tmp_path / "data_dictionary.json"
+    columns = [{"Variable Name": "id"}, {"Variable Name": "n", "Data Type": "integer"}]
+    with open(dict_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "P01.csv": {"path": str(data_dir / "P01.csv"), "columns": columns},
+            "P02.csv": {"path": str(data_dir / "P02.csv"), "columns": columns,
+                        "foreign_keys": [{"columns": "id", "references": "P01.csv"}]},
+        }, f)
+    lines = []
+    session = WatchSession(str(data_dir), str(dict_path), re.compile(r"^P[0-9]{2}\.csv$"), frozenset(["csv"]),
+                           CheckOptions(), str(tmp_path / "index"), debounce, lines.append)
+    return data_dir, session, lines
+
+def test_debouncer_waits_for_files_to_settle():
+    debouncer = Debouncer(2.0)
+    debouncer.touch("a", (1, 1, 1), 0.0)
+    debouncer.touch("a", (2, 2, 1), 1.5)
+    debouncer.touch("b", (1, 1, 2), 1.0)
+    # An unchanged state does not restart the quiet period
+    debouncer.touch("b", (1, 1, 2), 2.5)
+    assert debouncer.ready(3.0) == ["b"]
+    assert debouncer.ready(3.4) == []
+    assert debouncer.ready(3.5) == ["a"]
+
+def test_session_rechecks_only_settled_changes(tmp_path, monkeypatch):
+    data_dir, session, lines = create_session(tmp_path)
+    assert session.start() == 1
+    assert lines == ["P01.csv: all checks passed", "P02.csv: 1 issues",
+                     "  Values not found for foreign key (id) -> P01.csv (id): ['b']"]
+    checked = []
+    check_entry = quality_check.check_entry
+
+    def counting_check_entry(file_plan, options):
+        checked.append(file_plan.fname)
+        return check_entry(file_plan, options)
+
+    monkeypatch.setattr("src.checks.watch.check_entry", counting_check_entry)
+    del lines[:]
+    write(data_dir / "P02.csv", "id,n\na,x\n", 1e9 + 1)
+    assert session.update(None, 10.0) == []
+    write(data_dir / "P02.csv", "id,n\na,x\na,3\n", 1e9 + 2)
+    assert session.update(None, 11.0) == []
+    assert session.update(None, 12.9) == []
+    ready = session.update(None, 13.0)
+    assert ready == [str(data_dir / "P02.csv")]
+    session.check(ready)
+    assert checked == ["P02.csv"]
+    assert lines == ["P02.csv: 1 issues", "  Type errors: ['x']"]
+    # A changed referenced file also rechecks the files referencing it
+    del lines[:], checked[:]
+    write(data_dir / "P01.csv", "id,n\nb,1\n", 1e9 + 3)
+    os.rename(data_dir / "P02.csv", data_dir / "bad name.csv")
+    session.check(session.update(None, 20.0) + session.update(None, 22.0))
+    assert checked == ["P01.csv", "P02.csv"]
+    assert lines[0] == f"Renamed: {data_dir / 'P02.csv'} -> {data_dir / 'bad name.csv'}"
+    assert f"Non-compliant name: {data_dir / 'bad name.csv'}" in lines
+    assert "P02.csv: 1 issues" in lines
+
+def test_dictionary_edit_alone_rechecks_everything(tmp_path, monkeypatch):
+    data_dir, session, lines = create_session(tmp_path)
+    session.start()
+    checked = []
+    check_entry = quality_check.check_entry
+    monkeypatch.setattr("src.checks.watch.check_entry",
+                        lambda file_plan, options: checked.append(file_plan.fname) or check_entry(file_plan, options))
+    dict_path = tmp_path / "data_dictionary.json"
+    data_dict = json.loads(dict_path.read_text(encoding='utf-8'))
+    del data_dict["P02.csv"]["foreign_keys"]
+    write(dict_path, json.dumps(data_dict), 1e9 + 1)
+    # Events only name data files, so the dictionary is noticed on any update
+    assert session.update(set(), 10.0) == []
+    ready = session.update(set(), 12.0)
+    assert ready == [str(dict_path)]
+    del lines[:]
+    assert session.check(ready) == 0
+    assert checked == ["P01.csv", "P02.csv"]
+    assert lines == ["P01.csv: all checks passed", "P02.csv: all checks passed"]
+    assert session.update(set(), 20.0) == []
+
+def test_inotify_watcher_names_changed_files(tmp_path):
+    try:
+        watcher = InotifyWatcher(str(tmp_path))
+    except OSError:
+        pytest.skip("inotify is not available")
+    try:
+        (tmp_path / "sub").mkdir()
+        assert watcher.wait(1.0) == set()
+        (tmp_path / "sub" / "a.csv").write_text("x\n", encoding='utf-8')
+        paths = set()
+        while str(tmp_path / "sub" / "a.csv") not in paths:
+            events = watcher.wait(1.0)
+            assert events
+            paths |= events
+    finally:
+        watcher.close()